@@ -0,0 +1,38 @@
+"""
+Crawl benchmark: sequential crawl (one fetch at a time, 0.2s pause per page,
+as the crawler used to behave) versus the asyncio engine, against the local
+fixture server.
+
+Usage: python benchmarks/bench_crawl.py [pages] [latency_seconds]
+"""
+import sys
+import time
+import contextlib
+import io
+
+from fixture_server import SiteFixture
+from scanner.crawler import crawl_site
+
+
+def run(label, fixture, pages, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        links, forms = crawl_site(fixture.url, max_pages=pages, timeout=10, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f}s  {len(forms):5d} forms  {len(forms) / elapsed:8.1f} pages/s")
+    return elapsed
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+    with SiteFixture(total=pages * 2, latency=latency) as fixture:
+        print(f"Crawling {pages} pages, {latency * 1000:.0f}ms server latency")
+        sequential = run("sequential (legacy)", fixture, pages, concurrency=1, per_host_concurrency=1, delay=0.2)
+        concurrent = run("asyncio engine (defaults)", fixture, pages)
+        print(f"Speedup: {sequential / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
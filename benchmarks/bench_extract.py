@@ -0,0 +1,88 @@
+"""
+Extraction benchmark: BeautifulSoup(html.parser) tree + find_all (the old
+crawler path) versus the streaming lxml extractor, on large synthetic pages.
+Each mode runs in its own process so peak RSS is measured independently.
+
+Usage: python benchmarks/bench_extract.py [page_size_mb] [pages]
+"""
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_page(size_mb):
+    """Build an HTML page of roughly size_mb megabytes with links, text and forms"""
+    block = (
+        '<div class="item"><h2>Product {i}</h2><p>' + "Lorem ipsum dolor sit amet. " * 8 + '</p>'
+        '<a href="/product/{i}?ref=list">View</a><a href="/cart/add/{i}">Add</a>'
+        '<table><tr><td>Price</td><td>{i}.99</td></tr></table></div>'
+    )
+    form = (
+        '<form action="/review/{i}" method="post"><input type="hidden" name="csrf" value="tok{i}">'
+        '<input name="title"><textarea name="body">text</textarea>'
+        '<select name="stars"><option>1</option><option selected value="5">5</option></select>'
+        '<input type="submit"></form>'
+    )
+    parts = ["<html><head><title>Catalog</title></head><body>"]
+    size, i = 0, 0
+    while size < size_mb * 1024 * 1024:
+        chunk = block.format(i=i) + (form.format(i=i) if i % 50 == 0 else "")
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    parts.append("</body></html>")
+    return "".join(parts).encode()
+
+
+def run_bs4(page):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page.decode(), "html.parser")
+    forms = soup.find_all("form")
+    for form in forms:
+        form.find_all(["input", "textarea", "select"])
+    hrefs = [a["href"] for a in soup.find_all("a", href=True)]
+    return len(hrefs), len(forms)
+
+
+def run_lxml(page):
+    from scanner.extract import extract_page
+    hrefs, forms = extract_page(page, encoding="utf-8")
+    return len(hrefs), len(forms)
+
+
+LABELS = {"bs4": "bs4 html.parser", "lxml": "lxml streaming"}
+
+
+def child(mode, size_mb, pages):
+    page = build_page(size_mb)
+    func = run_bs4 if mode == "bs4" else run_lxml
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(pages):
+        counts = func(page)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{LABELS[mode]:<22} {pages / elapsed:8.2f} pages/s  "
+          f"peak RSS +{(peak_rss - baseline_rss) / 1024:7.1f} MB  ({counts[0]} links, {counts[1]} forms)")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], float(sys.argv[3]), int(sys.argv[4]))
+        return
+
+    size_mb = sys.argv[1] if len(sys.argv) > 1 else "5"
+    pages = sys.argv[2] if len(sys.argv) > 2 else "3"
+    print(f"Extracting links/forms from {pages} x {size_mb} MB pages")
+    for mode in ("bs4", "lxml"):
+        result = subprocess.run([sys.executable, __file__, "--child", mode, size_mb, pages],
+                                capture_output=True, text=True, check=True)
+        print(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+SQLi localization benchmark: the legacy per-field loop (one request per
+payload and field) versus batched probing with group-testing bisection, on
+wide forms whose database errors do not name the offending parameter.
+
+Usage: python benchmarks/bench_group_testing.py [latency_seconds]
+"""
+import sys
+import time
+import contextlib
+import io
+
+from fixture_server import FormFixture
+from scanner.forms import FormSpec, FormField
+from scanner.sqli import SQLI_PAYLOADS, SQL_ERROR_MATCHER, test_sqli
+from scanner.transport import submit
+
+
+def legacy_sqli(form):
+    """The pre-batching loop: every payload into every field, one at a time"""
+    inputs = form.default_inputs()
+    found = set()
+    for payload in SQLI_PAYLOADS:
+        for field_name in inputs:
+            test_inputs = inputs.copy()
+            test_inputs[field_name] = payload
+            response = submit(form.action, form.method, test_inputs, timeout=15)
+            if SQL_ERROR_MATCHER.search(response.content):
+                found.add(field_name)
+                break
+    return found
+
+
+def batched_sqli(form):
+    with contextlib.redirect_stdout(io.StringIO()):
+        findings = test_sqli([], [(form.action, form)], finding_callback=lambda f: None)
+    return {f["details"].split("'")[1] for f in findings}
+
+
+def run(label, func, fixture, form):
+    fixture.requests = 0
+    start = time.perf_counter()
+    found = func(form)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {fixture.requests:6d} requests {elapsed:8.2f}s  found {sorted(found)}")
+    return fixture.requests
+
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.005
+    print(f"{len(SQLI_PAYLOADS)} payloads, {latency * 1000:.0f}ms server latency")
+    for width, vulnerable in ((20, ["f7"]), (40, ["f31"]), (40, ["f3", "f22"]), (64, [])):
+        with FormFixture(vulnerable=vulnerable, latency=latency) as fixture:
+            form = FormSpec(fixture.url, "get", [FormField(f"f{i}") for i in range(width)])
+            print(f"\n[{width} fields, vulnerable: {vulnerable or 'none'}]")
+            legacy = run("per-field (legacy)", legacy_sqli, fixture, form)
+            batched = run("batched + bisection", batched_sqli, fixture, form)
+            print(f"  Requests saved: {legacy - batched} ({legacy / batched:.1f}x fewer)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Signature matching microbenchmark: per-response cost of the legacy checks
+(decode, lowercase, one substring scan per signature / per payload) versus
+the matchers, on 1 MB response bodies. SQL errors use an OrderedMatcher
+(one lowercased copy, substring scans in list order with an early exit);
+the "trie" row is a SignatureMatcher over the same table and the
+IGNORECASE row the same trie folding case inside the regex instead of
+scanning a lowercased copy. XSS reflections use the trie SignatureMatcher.
+
+In "match at end" the planted SQL signature is seventh in list order, so
+the substring loops stop after seven scans; the trie's cost is the same
+whichever signature is present, which is why it only pays off for the
+XSS payloads, where every payload is looked for.
+
+Usage: python benchmarks/bench_matcher.py [body_size_mb] [iterations]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.sqli import SQL_ERRORS, SQL_ERROR_MATCHER
+from scanner.xss import XSS_PAYLOADS, XSS_MATCHER
+from scanner.matcher import SignatureMatcher, _trie_regex
+
+WORDS = [
+    "<div class='row'>", "</div>", "<td>", "</td>", "lorem", "ipsum", "SELECT", "query",
+    "error", "mysql", "<script src='/static/app.js'></script>", "données", "résumé", "data",
+]
+
+
+def build_body(size_mb, seed=1):
+    random.seed(seed)
+    target = int(size_mb * 1024 * 1024)
+    parts, size = [], 0
+    while size < target:
+        word = random.choice(WORDS)
+        parts.append(word)
+        size += len(word.encode()) + 1
+    return " ".join(parts).encode("utf-8")
+
+
+def legacy_sqli(body):
+    response_text = body.decode("utf-8").lower()
+    for error_sig in SQL_ERRORS:
+        if error_sig.lower() in response_text:
+            return error_sig
+    return None
+
+
+def legacy_xss(body):
+    reflected = []
+    for payload in XSS_PAYLOADS:
+        text = body.decode("utf-8")
+        if payload in text or payload.lower() in text.lower():
+            reflected.append(payload)
+    return reflected
+
+
+def timed(func, body, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(body)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    clean = build_body(size_mb)
+    # Signature near the end, so both paths scan almost the whole body
+    hit = clean[:-200] + b" You have an error in your SQL syntax <svg onload=alert('xss')>"
+    trie = SignatureMatcher(SQL_ERRORS)
+    ignorecase = re.compile(_trie_regex(list(SQL_ERROR_MATCHER.lookup)), re.IGNORECASE)
+
+    print(f"Per-response matching cost, {size_mb:g} MB body, {len(SQL_ERRORS)} SQL signatures, "
+          f"{len(XSS_PAYLOADS)} XSS payloads")
+    for label, body in (("no match", clean), ("match at end", hit)):
+        print(f"\n  [{label}]")
+        print(f"  {'SQL errors  legacy':<28}{timed(legacy_sqli, body, iterations):8.2f} ms")
+        print(f"  {'SQL errors  matcher.search':<28}{timed(SQL_ERROR_MATCHER.search, body, iterations):8.2f} ms")
+        print(f"  {'SQL errors  trie':<28}{timed(trie.search, body, iterations):8.2f} ms")
+        print(f"  {'SQL errors  IGNORECASE':<28}{timed(ignorecase.search, body, iterations):8.2f} ms")
+        print(f"  {'XSS reflect legacy':<28}{timed(legacy_xss, body, iterations):8.2f} ms")
+        print(f"  {'XSS reflect matcher.findall':<28}{timed(XSS_MATCHER.findall, body, iterations):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Port scan benchmark: a blocking connect() loop (one port at a time) versus
+the asyncio connect scanner, against listeners on localhost. Besides open
+and closed ports, a few "tarpit" listeners with a full accept backlog drop
+incoming SYNs, standing in for firewalled ports that never answer.
+
+Usage: python benchmarks/bench_portscan.py [ports] [listeners] [tarpits]
+"""
+import os
+import sys
+import time
+import socket
+import contextlib
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.portscan import connect_scan, INITIAL_TIMEOUT
+
+
+def open_listeners(low, high, count):
+    """Listen on up to `count` ports spread over [low, high]"""
+    listeners = []
+    step = max(1, (high - low) // count)
+    for port in range(low, high + 1, step):
+        sock = socket.socket()
+        try:
+            sock.bind(("127.0.0.1", port))
+            sock.listen(16)
+            listeners.append(sock)
+        except OSError:
+            sock.close()
+    return listeners
+
+
+def open_tarpits(low, count):
+    """Listeners whose backlog is filled by one unaccepted connection, so later SYNs go unanswered"""
+    sockets = []
+    port = low
+    while len(sockets) < 2 * count and port < 65536:
+        listener = socket.socket()
+        try:
+            listener.bind(("127.0.0.1", port))
+            listener.listen(0)
+            filler = socket.create_connection(("127.0.0.1", port))
+            sockets += [listener, filler]
+        except OSError:
+            listener.close()
+        port += 1
+    return sockets
+
+
+def blocking_scan(low, high):
+    found = []
+    for port in range(low, high + 1):
+        with socket.socket() as sock:
+            sock.settimeout(INITIAL_TIMEOUT)
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                found.append(port)
+    return found
+
+
+def run(label, func, ports):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        found = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f}s  {len(found):5d} open  {ports / elapsed:10.0f} ports/s")
+    return elapsed
+
+
+def main():
+    ports = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    tarpits = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    low, high = 40000, 40000 + ports - 1
+
+    listeners = open_listeners(low, high, count)
+    listeners += open_tarpits(high - tarpits * 4, tarpits)
+    try:
+        print(f"Scanning {ports} localhost ports, {count} listening and {tarpits} unanswered (up to)")
+        blocking = run("blocking connect loop", lambda: blocking_scan(low, high), ports)
+        concurrent = run("asyncio connect scanner", lambda: connect_scan("127.0.0.1", f"{low}-{high}"), ports)
+        print(f"Speedup: {blocking / concurrent:.1f}x")
+    finally:
+        for sock in listeners:
+            sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Local fixture web server used by the benchmarks.
+
+Serves a synthetic site of interlinked pages (each with a search form), or
+a single wide form endpoint, and adds a fixed per-request latency so the
+numbers resemble a remote target.
+"""
+import sys
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def render_page(n, total, fanout=5):
+    """Render page n with links to the next `fanout` pages and one form"""
+    links = "".join(
+        f'<li><a href="/page/{(n + i) % total}">Page {(n + i) % total}</a></li>'
+        for i in range(1, fanout + 1)
+    )
+    return (
+        f"<html><head><title>Page {n}</title></head><body>"
+        f"<h1>Page {n}</h1><ul>{links}</ul>"
+        f'<form action="/search" method="get"><input type="text" name="q">'
+        f'<input type="submit" value="Go"></form>'
+        f"</body></html>"
+    )
+
+
+class SiteFixture:
+    """Threaded HTTP server serving `total` pages on localhost"""
+
+    def __init__(self, total=500, latency=0.05, fanout=5):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                time.sleep(fixture.latency)
+                fixture.requests += 1
+                path = self.path.split("?")[0]
+                if path == "/":
+                    n = 0
+                elif path.startswith("/page/"):
+                    n = int(path.rsplit("/", 1)[-1])
+                else:
+                    n = 0
+                body = render_page(n, fixture.total, fixture.fanout).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.total = total
+        self.latency = latency
+        self.fanout = fanout
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FormFixture:
+    """
+    Threaded HTTP server with one wide GET form endpoint at /form. Fields in
+    `vulnerable` return a generic database error (no query text quoted back,
+    so nothing identifies the parameter) when their value has an odd number
+    of single quotes.
+    """
+
+    def __init__(self, vulnerable=(), latency=0.01):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                time.sleep(fixture.latency)
+                fixture.requests += 1
+                params = parse_qs(urlsplit(self.path).query, keep_blank_values=True)
+                broken = any(params.get(name, [""])[0].count("'") % 2 for name in fixture.vulnerable)
+                body = b"<p>Warning: database error</p>" if broken else b"<p>OK</p>"
+                self.send_response(500 if broken else 200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.vulnerable = set(vulnerable)
+        self.latency = latency
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/form"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
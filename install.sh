@@ -109,13 +109,20 @@ echo -e "${GREEN}[✓] Launcher scripts created${NC}"
 
 # Test installation
 echo -e "${BLUE}[*] Testing installation...${NC}"
-if python -c "import nmap, requests, bs4, colorama, tqdm" 2>/dev/null; then
+if python -c "import requests, bs4, lxml, colorama, tqdm" 2>/dev/null; then
     echo -e "${GREEN}[✓] All dependencies imported successfully${NC}"
 else
     echo -e "${RED}[✗] Some dependencies failed to import${NC}"
     exit 1
 fi
 
+# nmap is optional: without it (or without root) port scans use the built-in TCP connect scanner
+if command -v nmap &> /dev/null; then
+    echo -e "${GREEN}[✓] nmap found: SYN scans available when run as root${NC}"
+else
+    echo -e "${YELLOW}[!] nmap not found: port scans will use the built-in TCP connect scanner${NC}"
+fi
+
 # Create desktop entry for GUI (optional)
 if command -v desktop-file-install &> /dev/null; then
     echo -e "${BLUE}[*] Creating desktop entry...${NC}"
@@ -3,12 +3,17 @@ import sys
 import time
 import json
 from functools import partial
-from scanner.portscan import scan_ports
-from scanner.crawler import crawl_site
-from scanner.xss import test_xss
-from scanner.sqli import test_sqli
-#from scanner.adv_sqli import run_sqlmap_scan # Uncomment and implement if using sqlmap-api
-from scanner.parallel import parallel_scan
+from scanner.portscan import scan_targets
+from scanner.portcache import PortStateCache, incremental_scan, RESCAN_SAMPLE_RATE
+from scanner.services import identify_services
+from scanner.pipeline import ScanPipeline
+from scanner.xss import XSS_PAYLOADS
+from scanner.sqli import SQLI_PAYLOADS
+from scanner.transport import connection_stats
+from scanner.dbms import dbms_stats
+from scanner.adv_sqli import run_sqlmap_scans, SQLMAP_CONCURRENCY
+from scanner.redirect import test_open_redirect
+from scanner.parallel import host_of
 from scanner.report import generate_report
 from colorama import Fore, Style, init
 from tqdm import tqdm
@@ -52,11 +57,23 @@ Examples:
     parser.add_argument("--url", required=True, help="Target URL (e.g., https://example.com)")
     parser.add_argument("--threads", type=int, default=5, help="Number of concurrent threads (default: 5)")
     parser.add_argument("--output", choices=["cli", "json", "csv"], default="cli", help="Output format (default: cli)")
-    parser.add_argument("--enable-portscan", action="store_true", help="Enable Nmap port scanning")
+    parser.add_argument("--enable-portscan", action="store_true", help="Enable port scanning (Nmap SYN scan as root, else a TCP connect scan)")
+    parser.add_argument("--portscan-targets", help="Hosts, IPs or CIDR ranges to port scan instead of the URL's host "
+                        "(comma separated, e.g. 10.0.0.0/24,db.internal)")
+    parser.add_argument("--port-cache", action="store_true",
+                        help="Keep open ports between scans; rescans within 24h re-verify them, sample the other ports "
+                        "and report only changes")
+    parser.add_argument("--rescan-sample", type=float, default=RESCAN_SAMPLE_RATE,
+                        help=f"Fraction of the other ports probed on a cached rescan (default: {RESCAN_SAMPLE_RATE})")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="Run every check on every form instead of planning checks from the detected tech stack")
     parser.add_argument("--max-pages", type=int, default=10, help="Maximum pages to crawl (default: 10)")
     parser.add_argument("--timeout", type=int, default=5, help="Request timeout in seconds (default: 5)")
     parser.add_argument("--gui-comms", action="store_true", help="Enable structured JSON output for GUI communication.")
-    #parser.add_argument("--enable-adv-sqli", action="store_true", help="Enable advanced SQLi scan with sqlmap-api")
+    parser.add_argument("--enable-adv-sqli", action="store_true",
+                        help="Also test every unique form with sqlmap through a running sqlmap API server (sqlmapapi -s)")
+    parser.add_argument("--sqlmap-concurrency", type=int, default=SQLMAP_CONCURRENCY,
+                        help=f"sqlmap tasks running at once (default: {SQLMAP_CONCURRENCY})")
     
     args = parser.parse_args()
     
@@ -78,136 +95,202 @@ Examples:
     args.url = validate_url(args.url)
     
     findings = []
+    scan_stats = {}
     start_time = time.time()
 
     try:
         # Network scanning
         if args.enable_portscan:
             host = args.url.split("//")[-1].split("/")[0]
+            targets = args.portscan_targets or host
             if not args.gui_comms:
-                print(f"{Fore.CYAN}[*] Starting port scan for: {host}{Style.RESET_ALL}")
+                print(f"{Fore.CYAN}[*] Starting port scan for: {targets}{Style.RESET_ALL}")
             else:
-                log_to_gui('log', {'level': 'info', 'message': f"Starting port scan for: {host}"})
+                log_to_gui('log', {'level': 'info', 'message': f"Starting port scan for: {targets}"})
+
+            # Open ports become findings as soon as the scanner reports them
+            open_ports = []
+
+            def port_found(port_host, port_info):
+                finding = {
+                    'type': 'Open Port',
+                    'url': port_host,
+                    'details': f"{port_info['port']}/{port_info['protocol']} {port_info['service']}",
+                    'severity': 'info'
+                }
+                open_ports.append((port_host, port_info, finding))
+                findings.append(finding)
+                if args.gui_comms:
+                    log_to_gui('finding', finding)
+
+            def run_port_scan(progress_callback):
+                if not args.port_cache:
+                    scan_targets(targets, progress_callback=progress_callback, port_callback=port_found)
+                    return
+                # Rescans against the cache report only what changed since the last scan
+                _, changes = incremental_scan(targets, cache=PortStateCache(), sample_rate=args.rescan_sample,
+                                              progress_callback=progress_callback)
+                for change in changes:
+                    port_info = change['port_info']
+                    if change['change'] == "opened":
+                        port_found(change['host'], port_info)
+                        continue
+                    finding = {
+                        'type': 'Closed Port',
+                        'url': change['host'],
+                        'details': f"{port_info['port']}/{port_info['protocol']} {port_info['service']} is no longer open",
+                        'severity': 'info'
+                    }
+                    findings.append(finding)
+                    if args.gui_comms:
+                        log_to_gui('finding', finding)
 
             # In GUI mode, we can't use tqdm, so we create a simple callback
             if args.gui_comms:
-                progress_callback = lambda: log_to_gui('progress', {'stage': 'portscan'})
-                open_ports = scan_ports(host, progress_callback=progress_callback)
+                run_port_scan(lambda n=1: log_to_gui('progress', {'stage': 'portscan'}))
             else:
                 with tqdm(desc="Port Scanning", unit="ports") as pbar:
-                    open_ports = scan_ports(host, progress_callback=pbar.update)
-                
+                    run_port_scan(pbar.update)
+
             if open_ports:
                 if not args.gui_comms:
                     print(f"{Fore.GREEN}[✓] Found {len(open_ports)} open ports{Style.RESET_ALL}")
-                for port_info in open_ports:
-                    findings.append({
-                        'type': 'Open Port', 
-                        'url': host, 
-                        'details': f"{port_info['port']}/{port_info['protocol']} {port_info['service']}",
-                        'severity': 'info'
-                    })
-                if args.gui_comms:
+                    print(f"{Fore.CYAN}[*] Identifying services...{Style.RESET_ALL}")
+                else:
                     log_to_gui('log', {'level': 'success', 'message': f"Found {len(open_ports)} open ports"})
+
+                # Probe the open ports for banners and versions, and refine their findings
+                ports = [(port_host, port_info) for port_host, port_info, _ in open_ports]
+                if args.gui_comms:
+                    identify_services(ports, progress_callback=lambda n=1: log_to_gui('progress', {'stage': 'services'}))
+                else:
+                    with tqdm(total=len(ports), desc="Service Detection", unit="ports") as pbar:
+                        identify_services(ports, progress_callback=pbar.update)
+                for port_host, port_info, finding in open_ports:
+                    finding['details'] = f"{port_info['port']}/{port_info['protocol']} {port_info['service']}"
+                    if port_info.get('banner'):
+                        finding['banner'] = port_info['banner']
             else:
+                message = "No new open ports since the last scan" if args.port_cache else "No open ports found in the scanned range"
                 if not args.gui_comms:
-                    print(f"{Fore.YELLOW}[!] No open ports found in the scanned range{Style.RESET_ALL}")
+                    print(f"{Fore.YELLOW}[!] {message}{Style.RESET_ALL}")
                 else:
-                    log_to_gui('log', {'level': 'warning', 'message': "No open ports found"})
+                    log_to_gui('log', {'level': 'warning', 'message': message})
 
-        # Crawl web application
+        # Crawl and test as one streaming pipeline: each form is tested as soon as it is found
         if not args.gui_comms:
-            print(f"\n{Fore.CYAN}[*] Crawling {args.url} for forms and links...{Style.RESET_ALL}")
+            print(f"\n{Fore.CYAN}[*] Crawling {args.url} and testing forms for XSS and SQL Injection...{Style.RESET_ALL}")
         else:
-            log_to_gui('log', {'level': 'info', 'message': f"Crawling {args.url}..."})
+            log_to_gui('log', {'level': 'info', 'message': f"Crawling and testing {args.url}..."})
 
-        def crawl_progress_gui(increment):
-            log_to_gui('progress', {'stage': 'crawl', 'increment': increment})
-            log_to_gui('update_pages', increment)
+        pbar = None if args.gui_comms else tqdm(total=0, desc="Scanning", unit="tests")
 
-        if args.gui_comms:
-            links, forms = crawl_site(args.url, max_pages=args.max_pages, timeout=args.timeout, progress_callback=crawl_progress_gui)
-        else:
-            with tqdm(desc="Crawling", unit="pages") as pbar:
-                links, forms = crawl_site(args.url, max_pages=args.max_pages, timeout=args.timeout, progress_callback=pbar.update)
-        
-        log_to_gui('update_forms', len(forms))
+        def pipeline_progress(stage, counts):
+            if args.gui_comms:
+                if stage == 'crawl':
+                    log_to_gui('update_pages', counts['pages'])
+                    log_to_gui('update_forms', counts['forms_found'])
+                log_to_gui('progress', {'stage': stage})
+                return
+            pbar.total = counts['tests_total']
+            pbar.n = counts['tests_done']
+            pbar.set_postfix(pages=counts['pages'], forms=counts['forms_found'],
+                             unique=counts['unique_forms'], findings=counts['findings'])
+
+        pipeline = ScanPipeline(args.url, max_pages=args.max_pages, timeout=args.timeout,
+                                threads=args.threads, progress_callback=pipeline_progress, plan=not args.full_scan)
+
+        # Findings stream in while the crawl is still running
+        for finding in pipeline.run():
+            findings.append(finding)
+            if args.gui_comms:
+                log_to_gui('finding', finding)
+            else:
+                pbar.write(f"{Fore.RED}[!] {finding['type']} Found: {finding['url']} - {finding['details']}{Style.RESET_ALL}")
+        if pbar:
+            pbar.close()
 
-        if not forms:
+        form_index = pipeline.form_index
+        if not form_index.total:
             if not args.gui_comms:
                 print(f"{Fore.YELLOW}[!] No forms found for vulnerability testing{Style.RESET_ALL}")
                 print(f"{Fore.BLUE}[i] Consider testing with a target that has forms{Style.RESET_ALL}")
             else:
                 log_to_gui('log', {'level': 'warning', 'message': "No forms found for vulnerability testing"})
         else:
+            scan_stats.update(form_index.stats(len(XSS_PAYLOADS) + len(SQLI_PAYLOADS)))
+            pages = len({url for group in form_index.groups.values() for url in group['pages']})
             if not args.gui_comms:
-                print(f"{Fore.GREEN}[✓] Found {len(forms)} forms across {len(set(url for url, _ in forms))} pages{Style.RESET_ALL}")
+                print(f"{Fore.GREEN}[✓] Tested {len(form_index.groups)} unique forms ({form_index.total} found across {pages} pages){Style.RESET_ALL}")
             else:
-                log_to_gui('log', {'level': 'success', 'message': f"Found {len(forms)} forms."})
+                log_to_gui('log', {'level': 'success', 'message': f"Found {form_index.total} forms ({len(form_index.groups)} unique)."})
 
-            # Multi-threaded XSS testing
+        # GET parameters from crawled links, tested once per URL pattern
+        inventory = pipeline.inventory
+        if inventory.total:
+            scan_stats.update(inventory.stats(len(XSS_PAYLOADS) + len(SQLI_PAYLOADS)))
             if not args.gui_comms:
-                print(f"\n{Fore.CYAN}[*] Testing for XSS vulnerabilities...{Style.RESET_ALL}")
+                print(f"{Fore.GREEN}[✓] Tested {len(inventory.groups)} link patterns ({inventory.total} parameterized links){Style.RESET_ALL}")
             else:
-                log_to_gui('log', {'level': 'info', 'message': "Testing for XSS..."})
-            
-            def xss_progress_gui(finding):
-                log_to_gui('finding', finding)
+                log_to_gui('log', {'level': 'success', 'message': f"Found {inventory.total} parameterized links ({len(inventory.groups)} patterns)."})
 
+        # Open redirects: one round-trip per probe on each distinct link or form pattern with a redirect-like parameter
+        redirect_forms = form_index.unique_forms()
+        if args.gui_comms:
+            redirect_findings = test_open_redirect(list(pipeline.query_links), redirect_forms, threads=args.threads,
+                                                   progress_callback=lambda n=1: log_to_gui('progress', {'stage': 'redirect'}))
+        else:
+            redirect_findings = test_open_redirect(list(pipeline.query_links), redirect_forms, threads=args.threads)
+        for finding in redirect_findings:
+            findings.append(finding)
             if args.gui_comms:
-                 xss_findings = parallel_scan(
-                    lambda f: test_xss([f[0]], [f], progress_callback=lambda: log_to_gui('progress', {'stage': 'xss'}), finding_callback=xss_progress_gui),
-                    forms,
-                    threads=args.threads
-                )
-            else:
-                with tqdm(total=len(forms), desc="XSS Testing", unit="forms") as pbar:
-                    xss_findings = parallel_scan(
-                        lambda f: test_xss([f[0]], [f], progress_callback=pbar.update), 
-                        forms, 
-                        threads=args.threads
-                    )
-            findings.extend(xss_findings)
-
-            # Multi-threaded SQLi testing
-            if not args.gui_comms:
-                print(f"{Fore.CYAN}[*] Testing for SQL Injection vulnerabilities...{Style.RESET_ALL}")
-            else:
-                log_to_gui('log', {'level': 'info', 'message': "Testing for SQLi..."})
-
-            def sqli_progress_gui(finding):
                 log_to_gui('finding', finding)
-
-            if args.gui_comms:
-                sqli_findings = parallel_scan(
-                    lambda f: test_sqli([f[0]], [f], progress_callback=lambda: log_to_gui('progress', {'stage': 'sqli'}), finding_callback=sqli_progress_gui),
-                    forms,
-                    threads=args.threads
-                )
             else:
-                with tqdm(total=len(forms), desc="SQLi Testing", unit="forms") as pbar:
-                    sqli_findings = parallel_scan(
-                        lambda f: test_sqli([f[0]], [f], progress_callback=pbar.update), 
-                        forms, 
-                        threads=args.threads
-                    )
-            findings.extend(sqli_findings)
-
-        # Optional: Advanced SQLi (requires sqlmap-api)
-        #if args.enable_adv_sqli:
-        #    print(f"{Fore.CYAN}[*] Advanced SQLi scan with sqlmap-api...{Style.RESET_ALL}")
-        #    for url, form in forms:
-        #        findings += run_sqlmap_scan(url)
+                print(f"{Fore.RED}[!] {finding['type']} Found: {finding['url']} - {finding['details']}{Style.RESET_ALL}")
+
+        # Optional: Advanced SQLi (requires sqlmap-api), on the forms and link patterns whose host plan keeps SQLi
+        if args.enable_adv_sqli and (form_index.total or inventory.total):
+            forms = [(url, form) for url, form in form_index.unique_forms() + inventory.endpoints()
+                     if "sqli" in pipeline.planner.plan_for(host_of(form.action)).modules]
+            if not args.gui_comms:
+                print(f"{Fore.CYAN}[*] Advanced SQLi scan of {len(forms)} forms with sqlmap-api...{Style.RESET_ALL}")
+            try:
+                if args.gui_comms:
+                    sqlmap_findings = run_sqlmap_scans(forms, progress_callback=lambda n=1: log_to_gui('progress', {'stage': 'sqlmap'}),
+                                                       concurrency=args.sqlmap_concurrency)
+                else:
+                    with tqdm(total=len(forms), desc="sqlmap", unit="forms") as sqlmap_bar:
+                        sqlmap_findings = run_sqlmap_scans(forms, progress_callback=sqlmap_bar.update,
+                                                           concurrency=args.sqlmap_concurrency)
+            except RuntimeError as e:
+                sqlmap_findings = []
+                if not args.gui_comms:
+                    print(f"{Fore.YELLOW}[!] {e}{Style.RESET_ALL}")
+                else:
+                    log_to_gui('log', {'level': 'warning', 'message': str(e)})
+            for finding in sqlmap_findings:
+                findings.append(finding)
+                if args.gui_comms:
+                    log_to_gui('finding', finding)
+                else:
+                    print(f"{Fore.RED}[!] {finding['type']} Found: {finding['url']} - {finding['details']}{Style.RESET_ALL}")
 
         # Calculate scan time
         scan_time = time.time() - start_time
+        scan_stats['connection_reuse'] = connection_stats()
+        if dbms_stats():
+            scan_stats['dbms_pruning'] = dbms_stats()
+        if pipeline.fingerprinter.stats():
+            scan_stats['tech_stack'] = pipeline.fingerprinter.stats()
+        if pipeline.planner.stats():
+            scan_stats['scan_plan'] = pipeline.planner.stats()
         
         if not args.gui_comms:
             print(f"\n{Fore.CYAN}[*] Scan completed in {scan_time:.2f} seconds{Style.RESET_ALL}")
             print(f"{Fore.GREEN}[✓] Found {len(findings)} total findings{Style.RESET_ALL}\n")
-            generate_report(findings, output=args.output, scan_time=scan_time, target=args.url)
+            generate_report(findings, output=args.output, scan_time=scan_time, target=args.url, stats=scan_stats)
         else:
-            log_to_gui('scan_complete', {'findings': len(findings), 'scan_time': scan_time})
+            log_to_gui('scan_complete', {'findings': len(findings), 'scan_time': scan_time, 'stats': scan_stats})
 
     except KeyboardInterrupt:
         if not args.gui_comms:
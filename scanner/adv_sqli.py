@@ -1,23 +1,283 @@
-import requests
+import heapq
+import os
 import time
+from urllib.parse import urlencode, urlsplit, urlunsplit
+import requests
+from colorama import Fore, Style
+
+# sqlmap REST API server, started with `sqlmapapi -s` (see config/production.env)
+SQLMAP_API_URL = os.environ.get('SCANNER_SQLMAP_API', "http://127.0.0.1:8775")
+
+# sqlmap tasks running at once; each one is a full sqlmap process on the API server
+SQLMAP_CONCURRENCY = 4
+
+# Status polling: first delay, growth factor and longest delay (seconds)
+POLL_INITIAL = 0.5
+POLL_BACKOFF = 1.5
+POLL_MAX = 10.0
+
+# Seconds a task may run before it is stopped and its partial results collected
+TASK_DEADLINE = 600
+
+# Timeout of each API call
+API_TIMEOUT = 10
+
+# Options sent with every task
+SQLMAP_OPTIONS = {"batch": True, "level": 1, "risk": 1}
+
+class SqlmapTask:
+    """One target on its way through the API: queued, running, then finished"""
+    __slots__ = ("target", "options", "taskid", "started", "deadline", "interval", "polls", "state", "data", "error")
+
+    def __init__(self, target, options):
+        self.target = target
+        self.options = options
+        self.taskid = None
+        self.started = None
+        self.deadline = None
+        self.interval = POLL_INITIAL
+        self.polls = 0
+        self.state = "queued"
+        self.data = []
+        self.error = None
+
+class SqlmapOrchestrator:
+    """
+    Runs many sqlmap tasks through one sqlmap API server. Up to
+    `concurrency` tasks run at once; a single poller checks whichever task
+    is due next, each task backing off from POLL_INITIAL to POLL_MAX
+    between checks, so polling load stays flat however many tasks are
+    queued. A task past its deadline is stopped and its partial results
+    are kept. Every task created is deleted from the server, even when the
+    run is interrupted.
+
+    Usage:
+        orchestrator = SqlmapOrchestrator(concurrency=4)
+        for task in orchestrator.run(form_targets(forms)):
+            task.state, task.data
+    """
+
+    def __init__(self, api_url=SQLMAP_API_URL, concurrency=SQLMAP_CONCURRENCY, deadline=TASK_DEADLINE,
+                 poll_initial=POLL_INITIAL, poll_max=POLL_MAX, options=None):
+        self.api_url = api_url.rstrip("/")
+        self.concurrency = max(1, concurrency)
+        self.deadline = deadline
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.options = dict(SQLMAP_OPTIONS, **(options or {}))
+        self.session = requests.Session()
+
+    def _call(self, path, options=None):
+        """One API call; returns its JSON, raising RuntimeError if it failed"""
+        url = f"{self.api_url}{path}"
+        if options is None:
+            response = self.session.get(url, timeout=API_TIMEOUT)
+        else:
+            response = self.session.post(url, json=options, timeout=API_TIMEOUT)
+        response.raise_for_status()
+        result = response.json()
+        if not result.get("success", False):
+            raise RuntimeError(result.get("message") or f"{path} failed")
+        return result
+
+    def check(self):
+        """Raise RuntimeError if the API server does not answer"""
+        try:
+            self.session.get(f"{self.api_url}/version", timeout=API_TIMEOUT).raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"sqlmap API not reachable at {self.api_url}: {e}") from e
+
+    def _start(self, task, now):
+        task.taskid = self._call("/task/new")["taskid"]
+        self._call(f"/scan/{task.taskid}/start", dict(self.options, **task.options))
+        task.state = "running"
+        task.started = now
+        task.deadline = now + self.deadline
+        task.interval = self.poll_initial
+
+    def _finish(self, task, state):
+        """Collect what the task found, then delete it from the server"""
+        if state == "timeout":
+            self._stop(task)
+        try:
+            task.data = self._call(f"/scan/{task.taskid}/data").get("data", [])
+        except (requests.exceptions.RequestException, ValueError, RuntimeError) as e:
+            task.error = str(e)[:200]
+            state = "error" if state == "done" else state
+        # Deleted before the task leaves "running", so an interrupted delete is retried by run()
+        self._delete(task)
+        task.state = state
+
+    def _stop(self, task):
+        try:
+            self._call(f"/scan/{task.taskid}/stop")
+        except (requests.exceptions.RequestException, ValueError, RuntimeError):
+            pass  # Already finished
+
+    def _delete(self, task):
+        try:
+            self._call(f"/task/{task.taskid}/delete")
+        except (requests.exceptions.RequestException, ValueError, RuntimeError):
+            pass  # The server drops it on restart; nothing else to do
+
+    def run(self, targets, progress_callback=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Run every target and wait for all of them
+        Args:
+            targets: List of (target, options) where options holds sqlmap
+                options such as 'url', 'data' and 'method' (see form_targets())
+            progress_callback: Optional callback(task), called as each task finishes
+        Returns:
+            List of SqlmapTask in target order; state is "done", "timeout" or "error"
+        """
+        tasks = [SqlmapTask(target, options) for target, options in targets]
+        queued = list(reversed(tasks))
+        due = []  # Heap of (next poll time, order, task)
+        order = 0
+
+        def finished(task, state):
+            self._finish(task, state)
+            if progress_callback:
+                progress_callback(task)
+
+        try:
+            while queued or due:
+                now = clock()
+                while queued and len(due) < self.concurrency:
+                    task = queued.pop()
+                    try:
+                        self._start(task, now)
+                    except (requests.exceptions.RequestException, ValueError, RuntimeError, KeyError) as e:
+                        task.error = str(e)[:200]
+                        if task.taskid:
+                            self._delete(task)
+                        task.state = "error"
+                        if progress_callback:
+                            progress_callback(task)
+                        continue
+                    order += 1
+                    heapq.heappush(due, (now + task.interval, order, task))
+                if not due:
+                    continue
+
+                # Sleep before popping, so an interrupted sleep leaves the task in `due`
+                when = due[0][0]
+                if when > now:
+                    sleep(when - now)
+                    now = clock()
+                _, _, task = heapq.heappop(due)
+                task.polls += 1
+                try:
+                    status = self._call(f"/scan/{task.taskid}/status").get("status")
+                except (requests.exceptions.RequestException, ValueError, RuntimeError):
+                    status = None  # Asked again at the next poll; the deadline bounds the retries
+
+                if status == "terminated":
+                    finished(task, "done")
+                elif now >= task.deadline:
+                    finished(task, "timeout")
+                else:
+                    task.interval = min(task.interval * POLL_BACKOFF, self.poll_max)
+                    order += 1
+                    heapq.heappush(due, (min(now + task.interval, task.deadline), order, task))
+        finally:
+            # Interrupted: stop and delete whatever is still on the server,
+            # including tasks between start and their first poll
+            for task in tasks:
+                if task.taskid and task.state in ("queued", "running"):
+                    self._stop(task)
+                    self._delete(task)
+                    task.state = "error"
+                    task.error = "interrupted"
+        return tasks
+
+def form_targets(forms):
+    """
+    sqlmap targets for forms: GET forms as a URL with their default query,
+    POST forms with their default body
+    Args:
+        forms: List of (page_url, FormSpec)
+    Returns:
+        List of ((page_url, FormSpec), options)
+    """
+    targets = []
+    for url, form in forms:
+        inputs = form.default_inputs()
+        if not inputs:
+            continue
+        if form.method == "post":
+            options = {"url": form.action, "data": urlencode(inputs), "method": "POST"}
+        else:
+            parts = urlsplit(form.action)
+            query = "&".join(part for part in (parts.query, urlencode(inputs)) if part)
+            options = {"url": urlunsplit(parts._replace(query=query))}
+        targets.append(((url, form), options))
+    return targets
+
+def findings_from(url, action, data):
+    """
+    Turn a task's data into findings: one per injectable parameter sqlmap
+    reported (content type 1, the injection techniques)
+    """
+    findings = []
+    for entry in data:
+        if entry.get("type") != 1:
+            continue
+        for injection in entry.get("value") or []:
+            techniques = list((injection.get("data") or {}).values())
+            dbms = injection.get("dbms") or ""
+            if isinstance(dbms, list):
+                dbms = ", ".join(dbms)
+            findings.append({
+                "type": "SQL Injection",
+                "subtype": "sqlmap: " + ", ".join(technique.get("title", "") for technique in techniques),
+                "url": url,
+                "details": f"sqlmap confirmed SQLi in parameter '{injection.get('parameter')}' "
+                           f"({injection.get('place')}) at {action}",
+                "payload": techniques[0].get("payload", "") if techniques else "",
+                "method": injection.get("place", ""),
+                "dbms": dbms,
+                "severity": "critical"
+            })
+    return findings
+
+def run_sqlmap_scans(forms, progress_callback=None, concurrency=SQLMAP_CONCURRENCY, deadline=TASK_DEADLINE,
+                     api_url=SQLMAP_API_URL):
+    """
+    Test forms with sqlmap through its API, several at once
+    Args:
+        forms: List of (page_url, FormSpec), e.g. FormIndex.unique_forms()
+        progress_callback: Optional callback, called with 1 per form finished
+        concurrency: sqlmap tasks running at once
+        deadline: Seconds per task before it is stopped
+    Returns:
+        List of findings
+    Raises:
+        RuntimeError: The API server is not reachable
+    """
+    orchestrator = SqlmapOrchestrator(api_url, concurrency, deadline)
+    orchestrator.check()
+
+    def task_done(task):
+        if progress_callback:
+            progress_callback(1)
 
-SQLMAP_API_URL = "http://127.0.0.1:8775"
+    findings = []
+    for task in orchestrator.run(form_targets(forms), task_done):
+        url, form = task.target
+        if task.state == "timeout":
+            print(f"{Fore.YELLOW}[!] sqlmap stopped after {deadline}s on {form.action} (partial results kept){Style.RESET_ALL}")
+        elif task.error:
+            print(f"{Fore.YELLOW}[!] sqlmap failed on {form.action}: {task.error[:100]}{Style.RESET_ALL}")
+        findings += findings_from(url, form.action, task.data)
+    return findings
 
 def run_sqlmap_scan(target_url, data=None):
-    # Start task
-    new_task = requests.get(f"{SQLMAP_API_URL}/task/new").json()
-    taskid = new_task['taskid']
-    # Set options
+    """
+    Run one sqlmap task and return its raw data (see run_sqlmap_scans() for many)
+    """
     options = {'url': target_url}
     if data:
         options['data'] = data
-    requests.post(f"{SQLMAP_API_URL}/scan/{taskid}/start", json=options)
-    # Poll status
-    while True:
-        status = requests.get(f"{SQLMAP_API_URL}/scan/{taskid}/status").json()
-        if status['status'] == 'terminated':
-            break
-        time.sleep(2)
-    # Fetch data
-    result = requests.get(f"{SQLMAP_API_URL}/scan/{taskid}/data").json()
-    return result.get('data', [])
\ No newline at end of file
+    tasks = SqlmapOrchestrator().run([(target_url, options)])
+    return tasks[0].data
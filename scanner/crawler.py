@@ -1,10 +1,23 @@
+import asyncio
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse, urldefrag
 from colorama import Fore, Style
+from scanner.frontier import URLFrontier
+from scanner.extract import extract_page, CHUNK_SIZE
+from scanner.forms import FormSpec
+from scanner.transport import crawl_session
 
-def crawl_site(url, max_pages=10, timeout=5, progress_callback=None):
+# Global cap on fetches in flight and cap per target host
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST_CONCURRENCY = 8
+
+# Extensions that never lead to pages with forms
+SKIP_EXTENSIONS = ['.js', '.css', '.jpg', '.png', '.gif', '.pdf', '.zip']
+
+def crawl_site(url, max_pages=10, timeout=5, progress_callback=None,
+               concurrency=DEFAULT_CONCURRENCY, per_host_concurrency=DEFAULT_PER_HOST_CONCURRENCY,
+               delay=0, bloom_capacity=None, form_callback=None, fingerprinter=None, link_callback=None):
     """
     Crawl a website to find forms and links
     Args:
@@ -12,75 +25,194 @@ def crawl_site(url, max_pages=10, timeout=5, progress_callback=None):
         max_pages: Maximum number of pages to crawl
         timeout: Request timeout in seconds
         progress_callback: Optional callback for progress updates
-    Returns: 
-        (links, forms) where forms is a list of (url, form_element) tuples
+        concurrency: Maximum number of fetches in flight across all hosts
+        per_host_concurrency: Maximum number of fetches in flight per host
+        delay: Optional pause (seconds) a host slot is held after each fetch
+        bloom_capacity: Track seen URLs in a Bloom filter sized for this many
+            URLs (for very large crawls) instead of an exact set
+        form_callback: Optional callback(page_url, FormSpec) called as soon as
+            a form is extracted, from a fetch thread; if it blocks, that fetch
+            slot is held, which slows the crawl down (backpressure)
+        fingerprinter: Optional TechFingerprinter fed every response fetched
+        link_callback: Optional callback(page_url, link_url) for every
+            same-domain link found, whether or not it is crawled; called
+            from a fetch thread and, like form_callback, may block
+    Returns:
+        (links, forms) where forms is a list of (url, FormSpec) tuples
+    """
+    crawler = AsyncCrawler(url, max_pages=max_pages, timeout=timeout, progress_callback=progress_callback,
+                           concurrency=concurrency, per_host_concurrency=per_host_concurrency, delay=delay,
+                           bloom_capacity=bloom_capacity, form_callback=form_callback,
+                           fingerprinter=fingerprinter, link_callback=link_callback)
+    return asyncio.run(crawler.run())
+
+class AsyncCrawler:
+    """
+    Asyncio crawl engine. Pages are fetched by a pool of worker coroutines;
+    the blocking fetch/extract work runs in a thread pool so many
+    fetches stay in flight at once, bounded by a global and a per-host cap.
+    URLs are scheduled from a URLFrontier, most promising first.
     """
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    })
-    
-    visited = set()
-    to_visit = [url]
-    links = []
-    forms = []
-    
-    pages_crawled = 0
-    
-    while to_visit and pages_crawled < max_pages:
-        current_url = to_visit.pop(0)
-        if current_url in visited:
-            continue
-            
+
+    def __init__(self, url, max_pages=10, timeout=5, progress_callback=None,
+                 concurrency=DEFAULT_CONCURRENCY, per_host_concurrency=DEFAULT_PER_HOST_CONCURRENCY,
+                 delay=0, bloom_capacity=None, form_callback=None, fingerprinter=None, link_callback=None):
+        self.base_url = url
+        self.base_netloc = urlparse(url).netloc
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+        self.form_callback = form_callback
+        self.fingerprinter = fingerprinter
+        self.link_callback = link_callback
+        self.concurrency = max(1, concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.delay = delay
+
+        self.session = crawl_session()
+
+        self.frontier = URLFrontier(max_size=max_pages * 2, bloom_capacity=bloom_capacity)
+        self.links = []
+        self.forms = []
+        self.pages_crawled = 0
+        self.dispatched = 0
+        self.in_flight = 0
+        self.host_slots = {}
+
+    async def run(self):
+        """Crawl until the frontier is exhausted or max_pages is reached"""
+        self.ready = asyncio.Condition()
+        self.global_slots = asyncio.Semaphore(self.concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        self.frontier.add(self.base_url)
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self.executor.shutdown(wait=False)
+
+        print(f"{Fore.GREEN}[✓] Crawling complete: {len(self.forms)} forms found across {self.pages_crawled} pages{Style.RESET_ALL}")
+        return self.links, self.forms
+
+    async def _next_url(self):
+        """
+        Wait for the next URL to fetch. Returns (url, depth), or None once the
+        frontier is empty (or the page budget is spent) and nothing is in flight.
+        """
+        async with self.ready:
+            while True:
+                # Reserve a page from the budget before fetching so concurrent
+                # workers never overshoot max_pages
+                if self.frontier and self.dispatched < self.max_pages:
+                    self.dispatched += 1
+                    self.in_flight += 1
+                    return self.frontier.pop()
+                if not self.in_flight:
+                    self.ready.notify_all()
+                    return None
+                await self.ready.wait()
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._next_url()
+            if item is None:
+                return
+            current_url, depth = item
+            try:
+                host = urlparse(current_url).netloc
+                host_slot = self.host_slots.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+                async with self.global_slots, host_slot:
+                    page = await loop.run_in_executor(self.executor, self._fetch_page, current_url)
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+
+                if page is None:
+                    # Failed fetches do not consume the page budget
+                    self.dispatched -= 1
+                else:
+                    self._handle_page(current_url, depth, *page)
+            finally:
+                async with self.ready:
+                    self.in_flight -= 1
+                    self.ready.notify_all()
+
+    def _fetch_page(self, current_url):
+        """Fetch one page and stream it through the extractor (runs in the thread pool)"""
         try:
-            response = session.get(current_url, timeout=timeout, allow_redirects=True)
-            visited.add(current_url)
-            pages_crawled += 1
-            
-            if progress_callback:
-                progress_callback(1)
-            
-            if response.status_code == 200 and 'text/html' in response.headers.get('content-type', '').lower():
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Find all forms
-                page_forms = soup.find_all('form')
-                for form in page_forms:
-                    forms.append((current_url, form))
-                
-                print(f"{Fore.BLUE}[i] Crawled: {current_url} - Found {len(page_forms)} forms{Style.RESET_ALL}")
-                
-                # Find all links for further crawling (only if we haven't reached max pages)
-                if pages_crawled < max_pages:
-                    for link in soup.find_all('a', href=True):
-                        try:
-                            full_url = urljoin(current_url, link['href'])
-                            parsed_url = urlparse(full_url)
-                            base_parsed = urlparse(url)
-                            
-                            # Only crawl same domain and avoid common non-page URLs
-                            if (parsed_url.netloc == base_parsed.netloc and 
-                                not any(ext in parsed_url.path.lower() for ext in ['.js', '.css', '.jpg', '.png', '.gif', '.pdf', '.zip']) and
-                                full_url not in visited and 
-                                full_url not in to_visit and
-                                len(to_visit) < max_pages * 2):  # Limit queue size
-                                
-                                links.append(full_url)
-                                to_visit.append(full_url)
-                        except Exception:
-                            continue  # Skip malformed URLs
-            else:
-                print(f"{Fore.YELLOW}[!] Skipped non-HTML content: {current_url} (Status: {response.status_code}){Style.RESET_ALL}")
-            
-            # Small delay to be respectful to the server
-            time.sleep(0.2)
-            
+            with self.session.get(current_url, timeout=self.timeout, allow_redirects=True, stream=True) as response:
+                content_type = response.headers.get('content-type', '').lower()
+                if response.status_code != 200 or 'text/html' not in content_type:
+                    if self.fingerprinter:
+                        # Error pages give the stack away too
+                        self.fingerprinter.observe_response(response)
+                    print(f"{Fore.YELLOW}[!] Skipped non-HTML content: {current_url} (Status: {response.status_code}){Style.RESET_ALL}")
+                    return [], [], response.url
+
+                encoding = response.encoding if 'charset' in content_type else None
+                hints = {}
+                hrefs, raw_forms = extract_page(response.iter_content(CHUNK_SIZE), encoding=encoding, hints=hints)
+                final_url = response.url
+                if self.fingerprinter:
+                    self.fingerprinter.observe_response(response, hints)
+            # Relative actions and hrefs resolve against the URL that was served
+            page_forms = [FormSpec.from_extracted(final_url, form) for form in raw_forms]
         except requests.exceptions.Timeout:
             print(f"{Fore.YELLOW}[!] Timeout crawling {current_url}{Style.RESET_ALL}")
+            return None
         except requests.exceptions.RequestException as e:
             print(f"{Fore.YELLOW}[!] Error crawling {current_url}: {str(e)[:100]}{Style.RESET_ALL}")
+            return None
         except Exception as e:
             print(f"{Fore.RED}[✗] Unexpected error crawling {current_url}: {str(e)[:100]}{Style.RESET_ALL}")
-    
-    print(f"{Fore.GREEN}[✓] Crawling complete: {len(forms)} forms found across {pages_crawled} pages{Style.RESET_ALL}")
-    return links, forms 
\ No newline at end of file
+            return None
+
+        print(f"{Fore.BLUE}[i] Crawled: {current_url} - Found {len(page_forms)} forms{Style.RESET_ALL}")
+        if self.form_callback:
+            for form in page_forms:
+                self.form_callback(current_url, form)
+        links = self._same_domain_links(final_url, hrefs)
+        if self.link_callback:
+            for link in links:
+                self.link_callback(current_url, link)
+        return page_forms, links, final_url
+
+    def _same_domain_links(self, base_url, hrefs):
+        """Resolve hrefs against base_url and keep the ones on the crawled host"""
+        links = []
+        for href in hrefs:
+            try:
+                full_url = urldefrag(urljoin(base_url, href))[0]
+                if urlparse(full_url).netloc == self.base_netloc:
+                    links.append(full_url)
+            except Exception:
+                continue  # Skip malformed URLs
+        return links
+
+    def _handle_page(self, current_url, depth, page_forms, links, final_url):
+        """Record a fetched page and enqueue its same-domain links (event loop thread)"""
+        self.pages_crawled += 1
+        if self.progress_callback:
+            self.progress_callback(1)
+
+        for form in page_forms:
+            self.forms.append((current_url, form))
+
+        # Redirect targets count as visited
+        if final_url and final_url != current_url:
+            self.frontier.mark_seen(final_url)
+
+        # Find all links for further crawling (only if we haven't reached max pages)
+        if self.dispatched >= self.max_pages:
+            return
+        for full_url in links:
+            # Avoid common non-page URLs; the frontier drops canonical
+            # duplicates and caps its size
+            if not any(ext in urlparse(full_url).path.lower() for ext in SKIP_EXTENSIONS):
+                queued = self.frontier.add(full_url, depth + 1)
+                if queued:
+                    self.links.append(queued)
@@ -0,0 +1,70 @@
+import threading
+from urllib.parse import urlparse
+
+class DBMSRegistry:
+    """
+    Thread-safe record of the database backend identified per endpoint and
+    per host, used to skip payloads written for other backends, and of the
+    requests that pruning saved.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.hosts = {}
+        self.saved = {}
+
+    def identify(self, action, dbms):
+        """Record that `action` runs on `dbms`; the host takes the first backend seen"""
+        if not dbms:
+            return
+        host = urlparse(action).netloc
+        with self.lock:
+            self.endpoints[action] = dbms
+            self.hosts.setdefault(host, dbms)
+
+    def lookup(self, action):
+        """Backend of an endpoint, else of its host, else None"""
+        with self.lock:
+            return self.endpoints.get(action) or self.hosts.get(urlparse(action).netloc)
+
+    def allows(self, action, dbms_tags):
+        """
+        Args:
+            action: Endpoint the payload would be sent to
+            dbms_tags: Backends the payload is written for, or None if generic
+        Returns:
+            False if the endpoint's backend is known and not among dbms_tags
+        """
+        if not dbms_tags:
+            return True
+        dbms = self.lookup(action)
+        return dbms is None or dbms in dbms_tags
+
+    def record_saved(self, action, count=1):
+        host = urlparse(action).netloc
+        with self.lock:
+            self.saved[host] = self.saved.get(host, 0) + count
+
+    def snapshot(self):
+        """
+        Returns:
+            {host: {'dbms', 'requests_saved'}}
+        """
+        with self.lock:
+            return {
+                host: {'dbms': dbms, 'requests_saved': self.saved.get(host, 0)}
+                for host, dbms in self.hosts.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+            self.hosts.clear()
+            self.saved.clear()
+
+DBMS_REGISTRY = DBMSRegistry()
+
+def dbms_stats():
+    """Identified backends and pruned requests per host, for the report"""
+    return DBMS_REGISTRY.snapshot()
@@ -0,0 +1,71 @@
+class FormIndex:
+    """
+    Collapses structurally identical forms (same action, method and field set)
+    found on different pages, so each endpoint is tested once while findings
+    can still list every page the form appears on.
+    """
+
+    def __init__(self, forms=()):
+        self.groups = {}
+        self.total = 0
+        for url, form in forms:
+            self.add(url, form)
+
+    def add(self, url, form):
+        """
+        Index one (page url, FormSpec) pair
+        Returns:
+            True if this is the first form with its signature
+        """
+        self.total += 1
+        signature = form.signature()
+        group = self.groups.get(signature)
+        if group is None:
+            self.groups[signature] = {'url': url, 'form': form, 'pages': [url], 'copies': 1}
+            return True
+        group['copies'] += 1
+        if url not in group['pages']:
+            group['pages'].append(url)
+        return False
+
+    def unique_forms(self):
+        """Return one representative (url, FormSpec) per signature, in discovery order"""
+        return [(group['url'], group['form']) for group in self.groups.values()]
+
+    def pages_for(self, form):
+        """Return every page a form with this signature was found on"""
+        group = self.groups.get(form.signature())
+        return list(group['pages']) if group else []
+
+    def tag_findings(self, form, findings):
+        """Attach the list of pages the tested form appears on to its findings"""
+        pages = self.pages_for(form)
+        for finding in findings:
+            finding['pages'] = pages
+        return findings
+
+    @property
+    def duplicates(self):
+        return self.total - len(self.groups)
+
+    def requests_saved(self, requests_per_field):
+        """
+        Estimate the probes avoided by testing each signature once
+        Args:
+            requests_per_field: Requests the testers send per form field
+        Returns:
+            Number of requests the duplicate copies would have cost
+        """
+        saved = 0
+        for group in self.groups.values():
+            saved += (group['copies'] - 1) * len(group['form'].fields) * requests_per_field
+        return saved
+
+    def stats(self, requests_per_field):
+        """Summary for the report"""
+        return {
+            'forms_found': self.total,
+            'unique_forms': len(self.groups),
+            'duplicate_forms': self.duplicates,
+            'requests_saved': self.requests_saved(requests_per_field),
+        }
@@ -0,0 +1,207 @@
+import hashlib
+import re
+import secrets
+import threading
+from collections import OrderedDict, Counter
+from functools import lru_cache
+from scanner.transport import submit
+from scanner.grouptest import bisect
+
+# Boolean-blind true/false pairs appended to a field's value. {a} is a random
+# digit; digits are stripped from fingerprints, so reflected pairs look alike.
+BOOLEAN_PAIRS = [
+    ("' AND '{a}'='{a}", "' AND '{a}'='{b}"),  # String context
+    (" AND {a}={a}", " AND {a}={b}"),          # Numeric context
+]
+
+# Largest simhash Hamming distance (of 64 bits) still considered the same page
+SIMHASH_DISTANCE = 3
+
+# Length difference still considered the same page: bytes, or a fraction of the length
+LENGTH_SLACK = 64
+LENGTH_TOLERANCE = 0.02
+
+# Endpoint baselines kept in memory (least recently used evicted first)
+BASELINE_CACHE_SIZE = 4096
+
+REQUEST_TIMEOUT = 15
+
+SCRIPT_OR_STYLE = re.compile(rb'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+TAG_NAME = re.compile(rb'<\s*(/?[a-zA-Z][a-zA-Z0-9]*)')
+TAG = re.compile(rb'<[^>]*>')
+TOKEN = re.compile(rb'[A-Za-z0-9_\-]+')
+
+# Tokens that change from one request to the next: anything with a digit
+# (ids, timestamps, dates, counters, CSRF tokens) or very long (hashes)
+DYNAMIC_TOKEN = re.compile(rb'.*\d|.{24}')
+
+@lru_cache(maxsize=65536)
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token, digest_size=8).digest(), 'big')
+
+def simhash(counts):
+    """64-bit simhash of {token: count}: near-identical texts get near-identical hashes"""
+    weights = [0] * 64
+    for token, count in counts.items():
+        value = _token_hash(token)
+        for bit in range(64):
+            if value >> bit & 1:
+                weights[bit] += count
+            else:
+                weights[bit] -= count
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+class ResponseFingerprint:
+    """
+    Compact summary of a response for equality tests between pages: status,
+    body length, a hash of the tag sequence and a simhash of the visible
+    text with dynamic tokens stripped. Immutable; a few ints per response,
+    so baselines for thousands of endpoints stay small.
+    """
+    __slots__ = ("status", "length", "structure", "text")
+
+    def __init__(self, status, length, structure, text):
+        object.__setattr__(self, "status", status)
+        object.__setattr__(self, "length", length)
+        object.__setattr__(self, "structure", structure)
+        object.__setattr__(self, "text", text)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @classmethod
+    def from_body(cls, status, body):
+        if isinstance(body, str):
+            body = body.encode('utf-8', 'replace')
+        body = body.lower()
+        tags = b' '.join(TAG_NAME.findall(body))
+        structure = int.from_bytes(hashlib.blake2b(tags, digest_size=8).digest(), 'big')
+        visible = TAG.sub(b' ', SCRIPT_OR_STYLE.sub(b' ', body))
+        counts = Counter(TOKEN.findall(visible))
+        for token in [token for token in counts if DYNAMIC_TOKEN.match(token)]:
+            del counts[token]
+        return cls(status, len(body), structure, simhash(counts))
+
+    @classmethod
+    def from_response(cls, response):
+        return cls.from_body(response.status_code, response.content)
+
+    def distance(self, other):
+        """Hamming distance between the text simhashes"""
+        return bin(self.text ^ other.text).count('1')
+
+    def matches(self, other):
+        """True if both responses are the same page, up to dynamic content"""
+        slack = max(LENGTH_SLACK, LENGTH_TOLERANCE * max(self.length, other.length))
+        return (self.status == other.status and self.structure == other.structure
+                and abs(self.length - other.length) <= slack
+                and self.distance(other) <= SIMHASH_DISTANCE)
+
+    def __repr__(self):
+        return f"ResponseFingerprint(status={self.status}, length={self.length}, text={self.text:016x})"
+
+class BaselineCache:
+    """Thread-safe LRU of one baseline fingerprint per endpoint"""
+
+    def __init__(self, max_size=BASELINE_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, action, method, inputs):
+        """Return the endpoint's baseline, fetching it with the default inputs on first use"""
+        key = (action, method, tuple(sorted(inputs.items())))
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        fingerprint = ResponseFingerprint.from_response(
+            submit(action, method, inputs, timeout=REQUEST_TIMEOUT))
+        with self.lock:
+            self.entries[key] = fingerprint
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return fingerprint
+
+    def __len__(self):
+        return len(self.entries)
+
+BASELINES = BaselineCache()
+
+def _digits():
+    """Two distinct random digits for a true/false pair"""
+    a, b = secrets.SystemRandom().sample("123456789", 2)
+    return a, b
+
+def compare_pair(action, method, inputs, field_names, pair):
+    """
+    Send the true and the false condition of a pair to a group of fields
+    Returns:
+        (true_fingerprint, false_fingerprint, payload)
+    """
+    a, b = _digits()
+    true_condition, false_condition = pair[0].format(a=a, b=b), pair[1].format(a=a, b=b)
+    fingerprints = []
+    for condition in (true_condition, false_condition):
+        test_inputs = inputs.copy()
+        for field_name in field_names:
+            test_inputs[field_name] = inputs[field_name] + condition
+        fingerprints.append(ResponseFingerprint.from_response(
+            submit(action, method, test_inputs, timeout=REQUEST_TIMEOUT)))
+    return fingerprints[0], fingerprints[1], f"{true_condition} / {false_condition}"
+
+def is_injectable(result, baseline):
+    """The true condition leaves the baseline page unchanged and the false one does not"""
+    true_print, false_print, _ = result
+    return true_print.matches(baseline) and not false_print.matches(true_print)
+
+def test_boolean(action, method, inputs, field_names, baselines=BASELINES, baseline=None):
+    """
+    Boolean-blind SQLi: a field is injectable when appending an always-true
+    condition leaves the page unchanged but an always-false one changes it.
+    Each pair is tried on all fields at once and bisected on a difference;
+    a candidate is confirmed with fresh constants before it is reported.
+    Args:
+        action, method: The form endpoint
+        inputs: Default field values
+        field_names: Fields to test
+        baselines: BaselineCache holding the endpoint's unmodified response
+        baseline: The unmodified response's fingerprint, if already known
+    Returns:
+        {field_name: ("Boolean-based blind SQLi", evidence, payload)}
+    """
+    if baseline is None:
+        baseline = baselines.get(action, method, inputs)
+    found = {}
+
+    for pair in BOOLEAN_PAIRS:
+        def probe(group):
+            result = compare_pair(action, method, inputs, group, pair)
+            return result if is_injectable(result, baseline) else None
+
+        def screen(group):
+            """Candidate fields in group, one bisection per positive signal"""
+            result = compare_pair(action, method, inputs, group, pair)
+            if is_injectable(result, baseline):
+                field_name, _, cleared = bisect(group, result, probe)
+                rest = [name for name in group if name != field_name and name not in cleared]
+                return [field_name] + (screen(rest) if rest else [])
+            if result[0].matches(baseline) or len(group) == 1:
+                return []
+            # Some field changes the page whatever the condition; test the halves apart
+            middle = len(group) // 2
+            return screen(group[:middle]) + screen(group[middle:])
+
+        remaining = [name for name in field_names if name not in found]
+        for field_name in (screen(remaining) if remaining else []):
+            # Confirm with new constants, ruling out a page that changed on its own
+            confirmed = probe([field_name])
+            if confirmed:
+                true_print, false_print, payload = confirmed
+                found[field_name] = (
+                    "Boolean-based blind SQLi",
+                    f"True/false responses differ (length {true_print.length} vs {false_print.length}, "
+                    f"simhash distance {true_print.distance(false_print)})",
+                    payload,
+                )
+    return found
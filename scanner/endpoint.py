@@ -0,0 +1,247 @@
+import re
+import secrets
+import threading
+import time
+from functools import partial
+from itertools import zip_longest
+import requests
+from colorama import Fore, Style
+from scanner.transport import submit
+from scanner.differential import ResponseFingerprint
+from scanner.parallel import TaskGroup, host_of
+
+# Attributes whose value is interpreted as a URL
+URL_ATTRIBUTE = re.compile(rb'(?:href|src|action|formaction|data|poster|background)\s*=\s*["\']?$', re.IGNORECASE)
+
+# Bytes inspected before a reflection to decide its context
+CONTEXT_LOOKBACK = 4096
+
+# Metacharacters appended to the canary to learn which ones survive unencoded
+PROBE_CHARS = "<>\"'"
+
+# Longest reflected probe segment inspected between the two canary markers
+MAX_PROBE_SEGMENT = 64
+
+REQUEST_TIMEOUT = 15
+
+def make_canary():
+    """Unique alphanumeric marker that no filter will alter"""
+    return "vsx" + secrets.token_hex(4)
+
+def canary_probe(canary):
+    """Field value for the pre-probe: the metacharacters between two markers"""
+    return canary + PROBE_CHARS + canary[::-1]
+
+def surviving_chars(segment):
+    """Return which PROBE_CHARS appear unencoded (and not backslash-escaped) in segment"""
+    survived = set()
+    for char in PROBE_CHARS:
+        pos = segment.find(char.encode())
+        while pos != -1:
+            if pos == 0 or segment[pos - 1:pos] != b"\\":
+                survived.add(char)
+                break
+            pos = segment.find(char.encode(), pos + 1)
+    return survived
+
+def reflection_contexts(body, canary):
+    """
+    Find every reflection of a canary probe in a response and classify its context
+    Args:
+        body: Response body (bytes)
+        canary: Marker that was submitted via canary_probe()
+    Returns:
+        {context: set_of_unencoded_probe_chars} where context is "html",
+        "attribute", "url" or "script"
+    """
+    contexts = {}
+    marker = canary.encode()
+    end_marker = canary[::-1].encode()
+    pos = body.find(marker)
+    while pos != -1:
+        before = body[max(0, pos - CONTEXT_LOOKBACK):pos].lower()
+        if before.rfind(b"<script") > before.rfind(b"</script"):
+            context = "script"
+        elif before.rfind(b"<") > before.rfind(b">"):
+            context = "url" if URL_ATTRIBUTE.search(before) else "attribute"
+        else:
+            context = "html"
+
+        start = pos + len(marker)
+        end = body.find(end_marker, start, start + MAX_PROBE_SEGMENT)
+        # Without the end marker the reflection was truncated; trust nothing after it
+        survived = surviving_chars(body[start:end]) if end != -1 else set()
+        contexts.setdefault(context, set()).update(survived)
+        pos = body.find(marker, start)
+    return contexts
+
+def canary_responses(action, method, inputs):
+    """
+    Submit the canary pre-probe with one batched request: every field gets
+    its own canary, so each reflection is attributed to its field. Falls
+    back to one request per field only if the batched submission is rejected.
+    Returns:
+        List of ({field_name: canary}, response), the canaries each response carries
+    """
+    canaries = {field_name: make_canary() for field_name in inputs}
+    probe = inputs.copy()
+    for field_name, canary in canaries.items():
+        probe[field_name] = canary_probe(canary)
+    try:
+        response = submit(action, method, probe)
+    except requests.exceptions.RequestException:
+        response = None
+
+    if response is not None and (response.status_code < 400 or len(inputs) == 1):
+        return [(canaries, response)]
+
+    # Rejected as a whole (e.g. server-side validation of another field)
+    responses = [(canaries, response)] if response is not None else []
+    for field_name, canary in canaries.items():
+        probe = inputs.copy()
+        probe[field_name] = canary_probe(canary)
+        try:
+            responses.append(({field_name: canary}, submit(action, method, probe)))
+        except requests.exceptions.RequestException:
+            continue
+    return responses
+
+def reflections_in(responses):
+    """{field_name: {context: surviving_chars}} for the fields reflected in canary_responses()"""
+    reflections = {}
+    for canaries, response in responses:
+        for field_name, canary in canaries.items():
+            for context, survived in reflection_contexts(response.content, canary).items():
+                reflections.setdefault(field_name, {}).setdefault(context, set()).update(survived)
+    return reflections
+
+class EndpointContext:
+    """
+    What has been learned about one form endpoint, shared by every detector
+    testing it: the inputs, the baseline response (fetched once) and the
+    canary pre-probe (submitted once). Detectors keep their own per-form
+    state in `state`, keyed by detector name, and may follow the host's
+    ScanPlan in `plan` (None: run everything in the default order).
+    """
+
+    def __init__(self, url, form, plan=None):
+        # Form fields and their default values are resolved once by the crawler
+        self.url = url
+        self.form = form
+        self.action = form.action
+        self.method = form.method
+        self.inputs = form.default_inputs()
+        self.host = host_of(self.action)
+        self.state = {}
+        self.plan = plan
+        self.lock = threading.Lock()
+        self._baseline = None
+        self._responses = None
+        self.reflections = {}
+
+    def baseline(self):
+        """
+        Fetch the endpoint with its default inputs on first use
+        Returns:
+            (ResponseFingerprint, response_time_seconds)
+        """
+        with self.lock:
+            if self._baseline is None:
+                start = time.perf_counter()
+                response = submit(self.action, self.method, self.inputs, timeout=REQUEST_TIMEOUT)
+                self._baseline = (ResponseFingerprint.from_response(response), time.perf_counter() - start)
+            return self._baseline
+
+    def discover(self):
+        """Run the canary pre-probe on first use; returns {field_name: {context: surviving_chars}}"""
+        with self.lock:
+            if self._responses is None:
+                self._responses = canary_responses(self.action, self.method, self.inputs)
+                self.reflections = reflections_in(self._responses)
+            return self.reflections
+
+    def probe_responses(self):
+        """The pre-probe's (canaries, response) pairs; empty until discover() has run"""
+        with self.lock:
+            return list(self._responses or ())
+
+def schedule_endpoint(scheduler, url, form, detectors, on_done=None, plan=None):
+    """
+    Queue one form for every detector on a WorkStealingScheduler, as one
+    stream of small tasks. A first task runs the shared canary pre-probe and
+    asks each detector for its probes; these are interleaved, so the
+    detectors advance side by side on the endpoint. Once all the probes of
+    a detector have finished, its follow-up probes (if any) are queued.
+    Tasks yield (form, finding) pairs.
+
+    A detector has a `name` and two methods, each returning a list of
+    callables that send their requests and return [(field_name, finding)]:
+        probes(context): First round, built after the pre-probe
+        follow_up(context): Run once the first round has finished
+    Args:
+        scheduler: WorkStealingScheduler to submit to
+        url: Page the form was found on
+        form: FormSpec to test
+        detectors: Detectors to run
+        on_done: Called with a detector's name once all its tasks for this form have finished
+        plan: Optional ScanPlan of the form's host, available to detectors as context.plan
+    """
+    context = EndpointContext(url, form, plan)
+    reported = set()
+    reported_lock = threading.Lock()
+
+    def finished(name):
+        """on_done, at most once per detector"""
+        with reported_lock:
+            if name in reported:
+                return
+            reported.add(name)
+        if on_done:
+            on_done(name)
+
+    if not context.inputs:
+        for detector in detectors:
+            finished(detector.name)
+        return
+
+    def run(probe):
+        return [(form, finding) for _, finding in probe()]
+
+    def queue_round(rounds):
+        """Submit [(probes, on_complete)] interleaved across detectors"""
+        tasks, groups = [], []
+        for probes, on_complete in rounds:
+            if not probes:
+                on_complete()
+                continue
+            group = TaskGroup(on_complete)
+            groups.append(group)
+            tasks.append([(probe, group) for probe in probes])
+        interleaved = [task for layer in zip_longest(*tasks) for task in layer if task is not None]
+        # Reversed, so this worker runs them in order while others steal the tail
+        for probe, group in reversed(interleaved):
+            scheduler.submit(run, probe, host=context.host, group=group)
+        for group in groups:
+            scheduler.seal(group)
+
+    def follow_up(detector):
+        try:
+            probes = detector.follow_up(context)
+        except Exception as e:
+            print(f"{Fore.YELLOW}[!] Error testing {detector.name} on {context.action}: {str(e)[:100]}{Style.RESET_ALL}")
+            probes = []
+        queue_round([(probes, partial(finished, detector.name))])
+
+    def prepare():
+        rounds = []
+        try:
+            context.discover()
+            for detector in detectors:
+                rounds.append((detector.probes(context), partial(follow_up, detector)))
+        except Exception as e:
+            print(f"{Fore.YELLOW}[!] Error testing {context.action}: {str(e)[:100]}{Style.RESET_ALL}")
+            for detector in detectors[len(rounds):]:
+                finished(detector.name)
+        queue_round(rounds)
+
+    scheduler.submit(prepare, host=context.host)
@@ -0,0 +1,134 @@
+from lxml import etree
+
+# Form controls that carry user input
+FORM_FIELD_TAGS = ('input', 'textarea', 'select')
+
+# Bytes fed to the parser per step when given a whole document
+CHUNK_SIZE = 64 * 1024
+
+class PageExtractor:
+    """
+    lxml parser target that collects links and form definitions in a single
+    pass. lxml calls start/end/data as it tokenizes, and no element tree is
+    ever built, so memory stays flat no matter how large the page is.
+    Technology hints (generator meta tags, script sources and icon links)
+    are collected in the same pass.
+    """
+
+    def __init__(self):
+        self.hrefs = []
+        self.forms = []
+        self.hints = {'generators': [], 'scripts': [], 'icons': []}
+        self.form = None
+        self.field = None
+        self.option_value = None
+        self.text = None
+
+    def start(self, tag, attrib):
+        tag = tag.lower() if isinstance(tag, str) else ''
+        if tag == 'a':
+            href = attrib.get('href')
+            if href:
+                self.hrefs.append(href)
+        elif tag == 'script':
+            if attrib.get('src'):
+                self.hints['scripts'].append(attrib['src'])
+        elif tag == 'meta':
+            if (attrib.get('name') or '').lower() == 'generator' and attrib.get('content'):
+                self.hints['generators'].append(attrib['content'])
+        elif tag == 'link':
+            if 'icon' in (attrib.get('rel') or '').lower().split() and attrib.get('href'):
+                self.hints['icons'].append(attrib['href'])
+        elif tag == 'form':
+            self.form = {
+                'action': attrib.get('action'),
+                'method': attrib.get('method', 'get'),
+                'fields': [],
+            }
+        elif self.form is None:
+            return
+        elif tag in FORM_FIELD_TAGS:
+            default_type = 'text' if tag == 'input' else tag
+            self.field = {
+                'tag': tag,
+                'name': attrib.get('name'),
+                'type': attrib.get('type', default_type),
+                'value': attrib.get('value'),
+            }
+            self.form['fields'].append(self.field)
+            if tag == 'textarea':
+                self.text = []
+            elif tag != 'select':
+                self.field = None
+        elif tag == 'option' and self.field is not None and self.field['tag'] == 'select':
+            # First option is the default unless another one is selected
+            value = attrib.get('value')
+            if 'selected' in attrib or self.field['value'] is None:
+                self.field['value'] = value
+            if value is None:
+                self.option_value = self.field
+                self.text = []
+
+    def data(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+    def end(self, tag):
+        tag = tag.lower() if isinstance(tag, str) else ''
+        if tag == 'form' and self.form is not None:
+            self.forms.append(self.form)
+            self.form = None
+            self.field = None
+        elif tag == 'textarea' and self.field is not None:
+            self.field['value'] = ''.join(self.text or [])
+            self.field = None
+            self.text = None
+        elif tag == 'option' and self.option_value is not None:
+            # <option> without a value attribute submits its text
+            if self.option_value['value'] is None:
+                self.option_value['value'] = ''.join(self.text or []).strip()
+            self.option_value = None
+            self.text = None
+        elif tag == 'select':
+            self.field = None
+
+    def close(self):
+        # Unclosed trailing <form> still counts
+        if self.form is not None:
+            self.forms.append(self.form)
+            self.form = None
+        return self.hrefs, self.forms
+
+def extract_page(source, encoding=None, hints=None):
+    """
+    Extract links and forms from HTML in one streaming pass
+    Args:
+        source: HTML as bytes/str, or an iterable of byte chunks
+            (e.g. response.iter_content()) that is consumed incrementally
+        encoding: Optional document encoding (detected by lxml if omitted)
+        hints: Optional dict, updated with the page's technology hints:
+            'generators' (meta generator contents), 'scripts' (script src
+            values) and 'icons' (icon link hrefs)
+    Returns:
+        (hrefs, forms) where forms is a list of dicts with 'action', 'method'
+        and 'fields' (dicts with 'tag', 'name', 'type' and 'value')
+    """
+    if isinstance(source, str):
+        source, encoding = source.encode('utf-8'), 'utf-8'
+    if isinstance(source, bytes):
+        document = source
+        source = (document[i:i + CHUNK_SIZE] for i in range(0, len(document), CHUNK_SIZE))
+
+    target = PageExtractor()
+    parser = etree.HTMLParser(target=target, encoding=encoding)
+    fed = False
+    for chunk in source:
+        if chunk:
+            parser.feed(chunk)
+            fed = True
+    if not fed:
+        return [], []
+    page = parser.close()
+    if hints is not None:
+        hints.update(target.hints)
+    return page
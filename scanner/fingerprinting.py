@@ -1,12 +1,265 @@
-import requests
-
-def fingerprint(url):
-    resp = requests.get(url)
-    headers = resp.headers
-    tech = []
-    if 'X-Powered-By' in headers:
-        tech.append(headers['X-Powered-By'])
-    if 'Server' in headers:
-        tech.append(headers['Server'])
-    # Add more heuristics as needed
-    return tech
\ No newline at end of file
+import re
+import threading
+from functools import lru_cache
+from scanner.matcher import SignatureMatcher
+from scanner.parallel import host_of
+from scanner.transport import get_session
+from scanner.extract import extract_page
+
+# Technology signatures. Each entry may match on:
+#   headers: {header_name: token}, token found in the header's value
+#       ("" matches the header's presence; a *-version header's value is the version)
+#   cookies: cookie name prefixes
+#   generator: token in <meta name="generator" content="...">
+#   scripts: tokens in script src (and icon link) paths
+# A version is read from the digits right after the matched token.
+# implies lists technologies the match entails.
+TECH_SIGNATURES = {
+    "nginx": {"category": "web-server", "headers": {"server": "nginx"}},
+    "Apache": {"category": "web-server", "headers": {"server": "Apache/"}},
+    "Microsoft IIS": {"category": "web-server", "headers": {"server": "Microsoft-IIS"}},
+    "LiteSpeed": {"category": "web-server", "headers": {"server": "LiteSpeed"}},
+    "Apache Tomcat": {"category": "web-server", "headers": {"server": "Apache-Coyote"}, "implies": ["Java"]},
+    "Werkzeug": {"category": "web-server", "headers": {"server": "Werkzeug"}, "implies": ["Python"]},
+    "Cloudflare": {"category": "cdn", "headers": {"server": "cloudflare", "cf-ray": ""},
+                   "cookies": ["__cf_bm", "__cflb", "__cfduid"]},
+    "PHP": {"category": "language", "headers": {"x-powered-by": "PHP"}, "cookies": ["PHPSESSID"]},
+    "ASP.NET": {"category": "framework",
+                "headers": {"x-powered-by": "ASP.NET", "x-aspnet-version": "", "x-aspnetmvc-version": ""},
+                "cookies": ["ASP.NET_SessionId", ".ASPXAUTH", "__RequestVerificationToken"],
+                "scripts": ["WebResource.axd", "ScriptResource.axd"]},
+    "Java": {"category": "language", "cookies": ["JSESSIONID"]},
+    "Express": {"category": "framework", "headers": {"x-powered-by": "Express"},
+                "cookies": ["connect.sid"], "implies": ["Node.js"]},
+    "Next.js": {"category": "framework", "headers": {"x-powered-by": "Next.js"},
+                "scripts": ["/_next/static/"], "implies": ["React", "Node.js"]},
+    "Node.js": {"category": "language"},
+    "Django": {"category": "framework", "cookies": ["csrftoken", "django_language"], "implies": ["Python"]},
+    "Python": {"category": "language"},
+    "Laravel": {"category": "framework", "cookies": ["laravel_session"], "implies": ["PHP"]},
+    "Ruby on Rails": {"category": "framework", "headers": {"x-powered-by": "Phusion Passenger"},
+                      "scripts": ["rails-ujs"], "implies": ["Ruby"]},
+    "Ruby": {"category": "language"},
+    "WordPress": {"category": "cms", "generator": "WordPress", "headers": {"link": "api.w.org"},
+                  "cookies": ["wordpress_", "wp-settings-"], "scripts": ["/wp-content/", "/wp-includes/"],
+                  "implies": ["PHP", "MySQL"]},
+    "Drupal": {"category": "cms", "generator": "Drupal",
+               "headers": {"x-generator": "Drupal", "x-drupal-cache": "", "x-drupal-dynamic-cache": ""},
+               "scripts": ["/sites/all/", "/core/misc/drupal.js", "/misc/drupal.js"], "implies": ["PHP"]},
+    "Joomla": {"category": "cms", "generator": "Joomla", "scripts": ["/media/jui/", "/media/system/js/"],
+               "implies": ["PHP", "MySQL"]},
+    "Magento": {"category": "cms", "scripts": ["/skin/frontend/", "/static/frontend/", "mage/cookies.js"],
+                "implies": ["PHP", "MySQL"]},
+    "MySQL": {"category": "database"},
+    "Hugo": {"category": "static-site-generator", "generator": "Hugo"},
+    "Jekyll": {"category": "static-site-generator", "generator": "Jekyll"},
+    "Gatsby": {"category": "static-site-generator", "generator": "Gatsby", "implies": ["React"]},
+    "jQuery": {"category": "js-library", "scripts": ["jquery-", "jquery.min.js", "jquery.js"]},
+    "React": {"category": "js-library", "scripts": ["react.production.min.js", "react-dom"]},
+    "Angular": {"category": "js-library", "scripts": ["angular.min.js", "angular.js"]},
+    "Vue.js": {"category": "js-library", "scripts": ["vue.min.js", "vue.runtime", "vue.global"]},
+    "Bootstrap": {"category": "js-library", "scripts": ["bootstrap.min.js", "bootstrap.bundle"]},
+}
+
+# Version right after a matched token: "nginx/1.24.0", "WordPress 6.4", "jquery-3.7.1.min.js"
+VERSION = re.compile(r"[\s/@_-]*v?(\d+(?:\.\d+)+|\d+)")
+
+# Evidence strings kept per detected technology
+EVIDENCE_PER_TECH = 3
+
+REQUEST_TIMEOUT = 10
+
+def _version_after(text, token):
+    """Version number following token in text, or '' """
+    pos = text.lower().find(token.lower())
+    found = VERSION.match(text, pos + len(token)) if pos != -1 else None
+    return found.group(1) if found else ""
+
+class SignatureIndex:
+    """
+    TECH_SIGNATURES compiled into lookups: a dict per header name and one
+    SignatureMatcher each for header values, cookie names, generator tags
+    and script paths, so every observation is matched in one pass however
+    many signatures there are.
+    """
+    __slots__ = ("signatures", "headers", "presence", "cookies", "generators", "scripts")
+
+    def __init__(self, signatures):
+        self.signatures = signatures
+        header_tokens, self.presence = {}, {}
+        cookies, generators, scripts = {}, {}, {}
+        for tech, signature in signatures.items():
+            for header, token in signature.get("headers", {}).items():
+                if token:
+                    header_tokens.setdefault(header.lower(), {}).setdefault(token.lower(), []).append(tech)
+                else:
+                    self.presence.setdefault(header.lower(), []).append(tech)
+            for prefix in signature.get("cookies", ()):
+                cookies.setdefault(prefix.lower(), []).append(tech)
+            if signature.get("generator"):
+                generators.setdefault(signature["generator"].lower(), []).append(tech)
+            for token in signature.get("scripts", ()):
+                scripts.setdefault(token.lower(), []).append(tech)
+
+        self.headers = {header: (SignatureMatcher(tokens), tokens) for header, tokens in header_tokens.items()}
+        self.cookies = (SignatureMatcher(cookies), cookies)
+        self.generators = (SignatureMatcher(generators), generators)
+        self.scripts = (SignatureMatcher(scripts), scripts)
+
+    @staticmethod
+    def _match(table, text):
+        """[(tech, token)] for every token of a (matcher, {token: techs}) table found in text"""
+        matcher, techs = table
+        return [(tech, token) for token in matcher.findall(text) for tech in techs[token.lower()]]
+
+    def match_header(self, name, value):
+        """[(tech, version)] for one response header"""
+        name = name.lower()
+        version = value.strip() if name.endswith("-version") else ""
+        matches = [(tech, version) for tech in self.presence.get(name, ())]
+        if name in self.headers:
+            matches += [(tech, _version_after(value, token)) for tech, token in self._match(self.headers[name], value)]
+        return matches
+
+    def match_cookie(self, name):
+        """Technologies whose cookie prefix starts name"""
+        return [tech for tech, prefix in self._match(self.cookies, name) if name.lower().startswith(prefix)]
+
+    def match_generator(self, content):
+        return [(tech, _version_after(content, token)) for tech, token in self._match(self.generators, content)]
+
+    def match_script(self, path):
+        return [(tech, _version_after(path, token)) for tech, token in self._match(self.scripts, path)]
+
+@lru_cache(maxsize=1)
+def signature_index():
+    """TECH_SIGNATURES compiled once, on first use"""
+    return SignatureIndex(TECH_SIGNATURES)
+
+class TechFingerprinter:
+    """
+    Passive technology fingerprinting. The crawler hands over every
+    response it fetches (headers, cookies and the hints extract_page()
+    collected), so the tech stack of each host is built without a single
+    extra request. Thread-safe: crawl fetch threads observe concurrently.
+
+    Usage:
+        fingerprinter = TechFingerprinter()
+        crawl_site(url, fingerprinter=fingerprinter)
+        fingerprinter.stack(host)
+    """
+
+    def __init__(self, signatures=None):
+        """
+        Args:
+            signatures: Signature dict shaped like TECH_SIGNATURES (default: TECH_SIGNATURES, compiled once)
+        """
+        self.index = signature_index() if signatures is None else SignatureIndex(signatures)
+        self.lock = threading.Lock()
+        self.hosts = {}
+        self.revisions = {}
+        self.responses = 0
+
+    def _add(self, found, tech, version, evidence):
+        """Record one match; returns True if it adds a technology or its version"""
+        changed = tech not in found
+        entry = found.setdefault(tech, {'version': "", 'evidence': []})
+        if version and not entry['version']:
+            entry['version'] = version
+            changed = True
+        if evidence not in entry['evidence'] and len(entry['evidence']) < EVIDENCE_PER_TECH:
+            entry['evidence'].append(evidence)
+        return changed
+
+    def observe(self, url, headers=None, cookies=(), generators=(), scripts=()):
+        """
+        Match one response against the signatures
+        Args:
+            url: URL the response came from
+            headers: Response headers (mapping)
+            cookies: Names of the cookies it set
+            generators, scripts: Meta generator contents and script/icon
+                paths, as collected by extract_page(hints=...)
+        """
+        matches = []
+        for name, value in (headers or {}).items():
+            matches += [(tech, version, f"header {name}: {value[:60]}")
+                        for tech, version in self.index.match_header(name, value)]
+        for name in cookies:
+            matches += [(tech, "", f"cookie {name}") for tech in self.index.match_cookie(name)]
+        for content in generators:
+            matches += [(tech, version, f"meta generator {content[:60]}")
+                        for tech, version in self.index.match_generator(content)]
+        for path in scripts:
+            matches += [(tech, version, f"script {path[:80]}") for tech, version in self.index.match_script(path)]
+
+        host = host_of(url)
+        with self.lock:
+            self.responses += 1
+            found = self.hosts.setdefault(host, {})
+            changed = [self._add(found, tech, version, evidence) for tech, version, evidence in matches]
+            if any(changed):
+                self.revisions[host] = self.revisions.get(host, 0) + 1
+
+    def revision(self, host):
+        """Counter that grows whenever a technology or version is added to the host's stack"""
+        with self.lock:
+            return self.revisions.get(host, 0)
+
+    def observe_response(self, response, hints=None):
+        """observe() a requests.Response, and the redirects before it, with optional extract_page() hints"""
+        hints = hints or {}
+        for earlier in response.history:
+            self.observe(earlier.url, earlier.headers, list(earlier.cookies.keys()))
+        self.observe(response.url, response.headers, list(response.cookies.keys()),
+                     hints.get('generators', ()), list(hints.get('scripts', ())) + list(hints.get('icons', ())))
+
+    def stack(self, host):
+        """
+        Technologies detected on a host, including the ones they imply
+        Returns:
+            {tech: {'category', 'version', 'evidence'}}; technologies only
+            implied by another also carry 'implied_by'
+        """
+        with self.lock:
+            found = {tech: {'version': entry['version'], 'evidence': list(entry['evidence'])}
+                     for tech, entry in self.hosts.get(host, {}).items()}
+        pending = list(found)
+        while pending:
+            tech = pending.pop()
+            for implied in self.index.signatures.get(tech, {}).get("implies", ()):
+                if implied not in found:
+                    found[implied] = {'version': "", 'evidence': [f"implied by {tech}"], 'implied_by': tech}
+                    pending.append(implied)
+        for tech, entry in found.items():
+            entry['category'] = self.index.signatures.get(tech, {}).get("category", "other")
+        return found
+
+    def hosts_seen(self):
+        with self.lock:
+            return list(self.hosts)
+
+    def stats(self):
+        """{host: "nginx 1.24.0, PHP 8.2.1, WordPress 6.4"} for the report"""
+        summary = {}
+        for host in self.hosts_seen():
+            stack = self.stack(host)
+            if stack:
+                summary[host] = ", ".join(f"{tech} {entry['version']}".strip()
+                                          for tech, entry in sorted(stack.items(), key=lambda item: (item[1]['category'], item[0])))
+        return summary
+
+def fingerprint(url, timeout=REQUEST_TIMEOUT):
+    """
+    Fingerprint a single page with one request (the crawler feeds a
+    TechFingerprinter directly, without extra requests)
+    Returns:
+        List of "technology version" strings
+    """
+    response = get_session().get(url, timeout=timeout)
+    hints = {}
+    if 'text/html' in response.headers.get('content-type', '').lower():
+        extract_page(response.content, hints=hints)
+    fingerprinter = TechFingerprinter()
+    fingerprinter.observe_response(response, hints)
+    return [f"{tech} {entry['version']}".strip() for tech, entry in fingerprinter.stack(host_of(response.url)).items()]
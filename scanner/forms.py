@@ -0,0 +1,111 @@
+from urllib.parse import urljoin
+from scanner.frontier import canonicalize_url
+
+# Input types that are never filled in or tested
+SKIP_FIELD_TYPES = ("submit", "button", "reset", "file", "image")
+
+# Probe values for typed inputs (anything else gets "test_value")
+TEST_VALUES = {
+    "email": "test@example.com",
+    "password": "password123",
+    "number": "123",
+}
+
+class FormField:
+    """
+    One named, testable form control. Immutable.
+    Attributes:
+        name: Field name as submitted
+        type: Lowercased input type ("text", "hidden", "textarea", "select", ...)
+        default: Value the page pre-fills, if any
+        value: Value submitted when the field is not the one being probed
+    """
+    __slots__ = ("name", "type", "default", "value")
+
+    def __init__(self, name, type="text", default=None, value=None):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "type", type)
+        object.__setattr__(self, "default", default)
+        object.__setattr__(self, "value", value if value is not None else TEST_VALUES.get(type, "test_value"))
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (FormField, (self.name, self.type, self.default, self.value))
+
+    def __eq__(self, other):
+        if not isinstance(other, FormField):
+            return NotImplemented
+        return (self.name, self.type, self.default, self.value) == (other.name, other.type, other.default, other.value)
+
+    def __hash__(self):
+        return hash((self.name, self.type, self.default, self.value))
+
+    def __repr__(self):
+        return f"FormField({self.name!r}, {self.type!r})"
+
+class FormSpec:
+    """
+    Pre-resolved form: absolute action URL, lowercase method and the ordered
+    testable fields. Extracted once by the crawler so no parsed DOM is kept
+    alive, and cheap to pickle across processes. Immutable.
+    """
+    __slots__ = ("action", "method", "fields")
+
+    def __init__(self, action, method="get", fields=()):
+        object.__setattr__(self, "action", action)
+        object.__setattr__(self, "method", (method or "get").lower())
+        object.__setattr__(self, "fields", tuple(fields))
+
+    @classmethod
+    def from_extracted(cls, page_url, form):
+        """
+        Build a FormSpec from an extract_page() form dict
+        Args:
+            page_url: URL of the page the form was found on
+            form: Dict with 'action', 'method' and 'fields'
+        Returns:
+            FormSpec with the action resolved against page_url
+        """
+        action = urljoin(page_url, form["action"]) if form.get("action") else page_url
+        fields = []
+        seen = set()
+        for field in form["fields"]:
+            name = field.get("name")
+            field_type = (field.get("type") or "text").lower()
+            if not name or name in seen or field_type in SKIP_FIELD_TYPES:
+                continue
+            seen.add(name)
+            fields.append(FormField(name, field_type, field.get("value")))
+        return cls(action, form.get("method"), fields)
+
+    def signature(self):
+        """
+        Structural identity of the endpoint: canonical action URL, method and
+        the sorted (name, type) field set. Copies of the same form on
+        different pages share one signature.
+        """
+        fields = tuple(sorted((field.name, field.type) for field in self.fields))
+        return (canonicalize_url(self.action), self.method, fields)
+
+    def default_inputs(self):
+        """Return a fresh {name: value} dict of the values to submit"""
+        return {field.name: field.value for field in self.fields}
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (FormSpec, (self.action, self.method, self.fields))
+
+    def __eq__(self, other):
+        if not isinstance(other, FormSpec):
+            return NotImplemented
+        return (self.action, self.method, self.fields) == (other.action, other.method, other.fields)
+
+    def __hash__(self):
+        return hash((self.action, self.method, self.fields))
+
+    def __repr__(self):
+        return f"FormSpec({self.method.upper()} {self.action}, fields={[f.name for f in self.fields]})"
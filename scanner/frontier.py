@@ -0,0 +1,162 @@
+import hashlib
+import heapq
+import math
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Default ports dropped during canonicalization
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Path words that usually lead to pages with forms worth testing
+FORM_HINTS = re.compile(
+    r'login|logon|signin|sign-in|signup|sign-up|register|search|contact|comment|feedback|'
+    r'account|profile|cart|checkout|subscribe|upload|admin|edit|reply|post|submit|query',
+    re.IGNORECASE
+)
+
+# Server-side script extensions (dynamic pages are more likely to take parameters)
+DYNAMIC_EXTENSIONS = ('.php', '.asp', '.aspx', '.jsp', '.cgi', '.do', '.action', '.pl')
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so that trivially different spellings dedupe together
+    Args:
+        url: Absolute URL
+    Returns:
+        Canonical URL: lowercase scheme/host, no default port, no fragment,
+        sorted query parameters and no trailing slash (except the root path)
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    netloc = host
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else '')
+        netloc = f"{userinfo}@{netloc}"
+
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+def score_url(url, depth=0):
+    """
+    Estimate how likely a URL is to yield forms or parameters
+    Args:
+        url: Canonical URL
+        depth: Link distance from the crawl root
+    Returns:
+        Priority score (higher is fetched first)
+    """
+    parts = urlsplit(url)
+    path = parts.path.lower()
+    score = 0
+    if parts.query:
+        score += 3
+    if FORM_HINTS.search(path):
+        score += 2
+    if path.endswith(DYNAMIC_EXTENSIONS):
+        score += 1
+    return score - depth
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. Uses a bytearray bit set and double
+    hashing of one blake2b digest, so memory stays flat for millions of URLs
+    at the cost of a small false-positive rate (a few URLs are never crawled).
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        """Add an item; returns True if it was not already present"""
+        added = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item):
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+class URLFrontier:
+    """
+    Crawl frontier: O(1) dedup over canonical URLs plus a priority queue that
+    hands out the most promising URLs first (ties are FIFO, i.e. breadth-first).
+    The canonical form is only the dedup key; URLs are queued and handed out
+    as given, since servers may treat '/docs' and '/docs/' differently.
+    """
+
+    def __init__(self, max_size=None, bloom_capacity=None, error_rate=0.001):
+        """
+        Args:
+            max_size: Maximum number of queued (not yet popped) URLs
+            bloom_capacity: If set, track seen URLs in a Bloom filter sized
+                for this many URLs instead of an exact set
+            error_rate: Bloom filter false-positive rate
+        """
+        self.max_size = max_size
+        self.seen = BloomFilter(bloom_capacity, error_rate) if bloom_capacity else set()
+        self.heap = []
+        self.counter = 0
+
+    def add(self, url, depth=0):
+        """
+        Queue a URL unless an equivalent one was already seen
+        Returns:
+            The URL if it was queued, otherwise None
+        """
+        canonical = canonicalize_url(url)
+        if canonical in self.seen:
+            return None
+        if self.max_size is not None and len(self.heap) >= self.max_size:
+            return None
+        self.seen.add(canonical)
+        heapq.heappush(self.heap, (-score_url(canonical, depth), self.counter, url, depth))
+        self.counter += 1
+        return url
+
+    def mark_seen(self, url):
+        """Record a URL (e.g. a redirect target) so it is never queued"""
+        self.seen.add(canonicalize_url(url))
+
+    def pop(self):
+        """Return (url, depth) of the highest-priority queued URL"""
+        _, _, url, depth = heapq.heappop(self.heap)
+        return url, depth
+
+    def __contains__(self, url):
+        return canonicalize_url(url) in self.seen
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __bool__(self):
+        return bool(self.heap)
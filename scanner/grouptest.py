@@ -0,0 +1,25 @@
+def bisect(field_names, signal, probe):
+    """
+    Adaptive group testing: given a group of fields known to trigger a
+    signal, find one field responsible. Only the left half is probed; if it
+    is clean, the right half must hold the trigger and is split without
+    being probed, so one field among N costs about log2(N) probes.
+    Args:
+        field_names: Fields that together produced `signal`
+        signal: The positive result observed for the whole group
+        probe: Callable taking a list of fields, returning a signal or None
+    Returns:
+        (field_name, signal, cleared) where cleared is the set of fields
+        shown clean on the way
+    """
+    group = list(field_names)
+    cleared = set()
+    while len(group) > 1:
+        middle = len(group) // 2
+        left_signal = probe(group[:middle])
+        if left_signal:
+            group, signal = group[:middle], left_signal
+        else:
+            cleared.update(group[:middle])
+            group = group[middle:]
+    return group[0], signal, cleared
@@ -0,0 +1,143 @@
+import re
+
+# Bodies up to this size are case-folded in one lowercased copy; larger ones
+# in overlapping windows of this size, which bounds the temporary copy
+WINDOW_SIZE = 256 * 1024
+
+def _trie_regex(keys):
+    """
+    Compile literal byte strings into one regex shaped like a trie, so at
+    each position the engine follows a single branch instead of trying
+    every alternative. Longer continuations are tried first.
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for byte in key:
+            node = node.setdefault(byte, {})
+        node[None] = True
+
+    def build(node):
+        terminal = None in node
+        branches = [re.escape(bytes([byte])) + build(child)
+                    for byte, child in sorted((b, c) for b, c in node.items() if b is not None)]
+        if not branches:
+            return b''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        return b'(?:' + b'|'.join(branches) + b')' + (b'?' if terminal else b'')
+
+    return build(trie)
+
+class SignatureMatcher:
+    """
+    Case-insensitive multi-pattern matcher, compiled once into a single
+    trie-shaped regex alternation. Bodies are scanned as raw bytes (no
+    decoding, no charset detection) in one pass, and the cost does not grow
+    with the number of patterns.
+
+    Case folding is done on a lowercased copy of the body (see _windows()),
+    not inside the automaton. The cost is flat per byte scanned, so a loop
+    that stops at the first signature in list order beats it on a short
+    table (see OrderedMatcher and benchmarks/bench_matcher.py).
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns: Iterable of literal strings to look for
+        """
+        self.patterns = []
+        self.lookup = {}
+        for pattern in patterns:
+            key = pattern.encode('utf-8').lower()
+            if key and key not in self.lookup:
+                self.lookup[key] = pattern
+                self.patterns.append(pattern)
+
+        keys = list(self.lookup)
+        self.max_length = max((len(key) for key in keys), default=1)
+        trie = _trie_regex(keys) if keys else b'(?!)'
+        self.regex = re.compile(trie)
+        self.overlapping = re.compile(b'(?=(' + trie + b'))')
+
+        # Patterns that are a prefix of a longer pattern always match with it
+        self.prefixes = {
+            key: [other for other in keys if other != key and key.startswith(other)]
+            for key in keys
+        }
+
+    def _windows(self, data):
+        """
+        Yield (offset, window) pairs of lowercased data. Folding inside the
+        automaton (IGNORECASE, or [aA] classes) is 4-5x slower per byte than
+        a literal trie over a lowercased copy, so bodies up to WINDOW_SIZE
+        are copied and lowercased whole; larger ones are folded in windows
+        that overlap by max_length - 1 to catch matches spanning a boundary.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8', 'replace')
+        if len(data) <= WINDOW_SIZE:
+            yield 0, data.lower()
+            return
+        overlap = self.max_length - 1
+        for start in range(0, len(data), WINDOW_SIZE):
+            yield start, data[start:start + WINDOW_SIZE + overlap].lower()
+
+    def locate(self, data):
+        """
+        Return (pattern, start, end) of the first pattern found in data, or None
+        """
+        for offset, window in self._windows(data):
+            match = self.regex.search(window)
+            if match is not None:
+                return self.lookup[match.group()], offset + match.start(), offset + match.end()
+        return None
+
+    def search(self, data):
+        """
+        Return the first pattern found in data (bytes or str), or None
+        """
+        located = self.locate(data)
+        return located[0] if located else None
+
+    def findall(self, data):
+        """
+        Return the set of all patterns present in data, including patterns
+        that overlap or are nested inside other matches
+        """
+        found = set()
+        for _, window in self._windows(data):
+            for match in self.overlapping.finditer(window):
+                key = match.group(1)
+                found.add(self.lookup[key])
+                for prefix in self.prefixes[key]:
+                    found.add(self.lookup[prefix])
+        return found
+
+    def __contains__(self, pattern):
+        return pattern.encode('utf-8').lower() in self.lookup
+
+class OrderedMatcher(SignatureMatcher):
+    """
+    SignatureMatcher whose locate() and search() lowercase the body once
+    and try the patterns one by one in list order, stopping at the first
+    one present, as a plain substring loop would. Each pattern costs a
+    fast substring scan, so for a short table whose likely entries come
+    first this beats the trie, which pays its per-byte cost whichever
+    pattern is present. findall() still uses the trie.
+    """
+
+    def locate(self, data):
+        """
+        Return (pattern, start, end) of the first pattern, in list order,
+        found in data, or None
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8', 'replace')
+        data = data.lower()
+        for key, pattern in self.lookup.items():
+            start = data.find(key)
+            if start != -1:
+                return pattern, start, start + len(key)
+        return None
@@ -0,0 +1,228 @@
+import ipaddress
+import os
+import shlex
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+# nmap executable (see config/production.env)
+NMAP_BINARY = os.environ.get('SCANNER_NMAP_BINARY', 'nmap')
+
+# Default nmap options; --stats-every makes nmap stream <taskprogress> elements
+NMAP_ARGUMENTS = "-sS -T4 --max-retries 1 --host-timeout 30s --stats-every 2s"
+
+# nmap processes run at the same time
+NMAP_SHARDS = 4
+
+# Hosts per nmap process, and the fewest ports worth a process of their own
+HOSTS_PER_SHARD = 16
+MIN_PORTS_PER_SHARD = 100
+
+# Largest CIDR range expanded into individual hosts
+MAX_TARGET_HOSTS = 65536
+
+# <taskprogress> tasks that probe ports (others are host discovery, DNS, ...)
+PORT_SCAN_TASKS = ("SYN Stealth Scan", "Connect Scan", "UDP Scan")
+
+READ_SIZE = 65536
+
+def expand_targets(targets):
+    """
+    Expand a host list into single hosts
+    Args:
+        targets: String ("10.0.0.0/28, db.internal example.com") or list of
+            hosts, IP addresses and CIDR ranges
+    Returns:
+        List of hosts, in order, without duplicates
+    """
+    if isinstance(targets, str):
+        targets = targets.replace(",", " ").split()
+    hosts = []
+    for target in targets:
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            hosts.append(target)  # Hostname
+            continue
+        if network.num_addresses > MAX_TARGET_HOSTS:
+            raise ValueError(f"{target} has more than {MAX_TARGET_HOSTS} addresses")
+        hosts.extend(str(address) for address in (network.hosts() if network.num_addresses > 2 else network))
+    return list(dict.fromkeys(hosts))
+
+def compress_ports(ports):
+    """Sorted port numbers back into an nmap port specification: [1, 2, 3, 80] -> "1-3,80" """
+    ranges = []
+    for port in ports:
+        if ranges and ranges[-1][1] == port - 1:
+            ranges[-1][1] = port
+        else:
+            ranges.append([port, port])
+    return ",".join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
+
+def plan_shards(hosts, ports, parallel=NMAP_SHARDS, hosts_per_shard=HOSTS_PER_SHARD):
+    """
+    Split a scan into host x port-range shards. Hosts are grouped first;
+    when there are fewer groups than parallel processes, the port range is
+    split too, so a single host still keeps every process busy.
+    Args:
+        hosts: List of hosts
+        ports: Sorted list of port numbers
+    Returns:
+        List of (hosts, port_spec, probes) where probes = hosts x ports
+        (empty when there are no hosts or no ports)
+    """
+    if not ports:
+        return []
+    groups = [hosts[i:i + hosts_per_shard] for i in range(0, len(hosts), hosts_per_shard)]
+    pieces = max(1, min(parallel // max(1, len(groups)), len(ports) // MIN_PORTS_PER_SHARD))
+    size = -(-len(ports) // pieces)
+    port_ranges = [ports[i:i + size] for i in range(0, len(ports), size)]
+    return [(group, compress_ports(part), len(group) * len(part)) for group in groups for part in port_ranges]
+
+def service_info(port):
+    """'name (product version)' from a <port> element"""
+    service = port.find("service")
+    if service is None:
+        return "unknown"
+    info = service.get("name", "unknown")
+    product, version = service.get("product", ""), service.get("version", "")
+    if product:
+        info += f" ({product}"
+        if version:
+            info += f" {version}"
+        info += ")"
+    return info
+
+class NmapXMLStream:
+    """
+    Incremental parser for nmap's XML output (-oX -). Feed it bytes as they
+    are read from the process; it returns the events completed so far:
+        ("port", host, {'port', 'protocol', 'service', 'state'}) per open port
+        ("progress", task, percent) per <taskprogress>
+        ("host", host, None) once a host is finished
+    Finished hosts are dropped from the tree, so memory stays flat however
+    many hosts a shard covers.
+    """
+
+    def __init__(self):
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.root = None
+        self.host = None
+
+    def feed(self, data):
+        self.parser.feed(data)
+        return self._events()
+
+    def close(self):
+        try:
+            self.parser.close()
+        except ET.ParseError:
+            pass  # Truncated output (nmap killed); everything complete was already returned
+        return self._events()
+
+    def _events(self):
+        events = []
+        for event, element in self.parser.read_events():
+            if event == "start":
+                if self.root is None:
+                    self.root = element
+                elif element.tag == "host":
+                    self.host = None
+                continue
+            if element.tag == "address" and self.host is None and element.get("addrtype") != "mac":
+                self.host = element.get("addr")
+            elif element.tag == "port":
+                state = element.find("state")
+                if state is not None and state.get("state") == "open":
+                    events.append(("port", self.host, {
+                        'port': int(element.get("portid")),
+                        'protocol': element.get("protocol"),
+                        'service': service_info(element),
+                        'state': 'open'
+                    }))
+            elif element.tag == "taskprogress":
+                events.append(("progress", element.get("task"), float(element.get("percent", 0))))
+            elif element.tag == "host":
+                events.append(("host", self.host, None))
+                self.root.clear()
+        return events
+
+def run_shard(hosts, port_spec, arguments=NMAP_ARGUMENTS, on_event=None, binary=None):
+    """
+    Run one nmap process and parse its XML output while it runs
+    Args:
+        hosts: Hosts for this shard
+        port_spec: nmap port specification
+        on_event: Optional callback(event), called for each NmapXMLStream event as it arrives
+    Returns:
+        List of (host, port_dict) for open ports
+    Raises:
+        RuntimeError: nmap is missing or exited with an error
+    """
+    command = [binary or NMAP_BINARY] + shlex.split(arguments) + ["-oX", "-", "-p", port_spec] + list(hosts)
+    stream = NmapXMLStream()
+    results = []
+    with tempfile.TemporaryFile() as errors:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+        except OSError as e:
+            raise RuntimeError(f"Cannot run nmap: {e}") from e
+        with process:
+            while True:
+                data = process.stdout.read1(READ_SIZE)
+                events = stream.feed(data) if data else stream.close()
+                for event in events:
+                    if event[0] == "port":
+                        results.append(event[1:])
+                    if on_event:
+                        on_event(event)
+                if not data:
+                    break
+        if process.returncode:
+            errors.seek(0)
+            message = errors.read().decode("utf-8", "replace").strip().splitlines()
+            raise RuntimeError(message[-1] if message else f"nmap exited with status {process.returncode}")
+    return results
+
+def run_shards(shards, arguments=NMAP_ARGUMENTS, port_callback=None, progress_callback=None,
+               parallel=NMAP_SHARDS, binary=None):
+    """
+    Run shards from plan_shards() in parallel nmap processes
+    Args:
+        port_callback: Optional callback(host, port_dict), called as each open port is reported
+        progress_callback: Optional callback(n), n = host x port probes completed since the last call
+    Returns:
+        (results, errors): results is a list of (host, port_dict), errors a
+        list of (hosts, port_spec, message) for failed shards
+    """
+    def run(shard):
+        hosts, port_spec, probes = shard
+        reported = [0]
+
+        def advance(done):
+            if progress_callback and done > reported[0]:
+                progress_callback(done - reported[0])
+                reported[0] = done
+
+        def on_event(event):
+            kind, subject, value = event
+            if kind == "port" and port_callback:
+                port_callback(subject, value)
+            elif kind == "progress" and subject in PORT_SCAN_TASKS:
+                advance(int(probes * value / 100))
+
+        try:
+            return run_shard(hosts, port_spec, arguments, on_event, binary), None
+        except RuntimeError as e:
+            return [], (hosts, port_spec, str(e))
+        finally:
+            advance(probes)
+
+    results, errors = [], []
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+        for shard_results, error in executor.map(run, shards):
+            results.extend(shard_results)
+            if error:
+                errors.append(error)
+    return results, errors
@@ -1,11 +1,242 @@
-from concurrent.futures import ThreadPoolExecutor
+import os
+import queue
+import threading
+from collections import deque
+from urllib.parse import urlparse
+from colorama import Fore, Style
+
+# Tasks running against one host at the same time (see config/production.env)
+PER_HOST_LIMIT = int(os.environ.get('SCANNER_PER_HOST_CONCURRENCY', 8))
+
+_DONE = object()
+
+class Task:
+    __slots__ = ("func", "args", "host", "group")
+
+    def __init__(self, func, args, host, group):
+        self.func = func
+        self.args = args
+        self.host = host
+        self.group = group
+
+class TaskGroup:
+    """
+    Tracks a set of tasks, including the tasks they spawn into the same
+    group, and calls on_done once all of them have finished. on_done may
+    submit further tasks.
+
+    A new group is held open by its creator, so tasks that finish while
+    the rest of the batch is still being submitted cannot complete it:
+    submit every task, then call WorkStealingScheduler.seal(group).
+    """
+
+    def __init__(self, on_done=None):
+        self.on_done = on_done
+        self.pending = 1  # The creator's hold, dropped by seal()
+
+class WorkStealingScheduler:
+    """
+    Thread pool for small scan tasks. Each worker keeps its own deque: tasks
+    it spawns go to its own deque and are run newest first, and an idle
+    worker steals the oldest task from another worker's deque, so one large
+    form keeps every thread busy instead of tying up one of them. A task
+    whose host is at its concurrency limit is skipped in favour of another.
+
+    Tasks return an iterable of results (or None); results are streamed by
+    results() as soon as each task finishes.
+
+    Usage:
+        scheduler = WorkStealingScheduler(threads=10)
+        group = TaskGroup(on_done)
+        scheduler.submit(func, arg, host=host, group=group)
+        scheduler.seal(group)
+        scheduler.close()
+        for result in scheduler.results():
+            ...
+    """
+
+    def __init__(self, threads=5, per_host=PER_HOST_LIMIT):
+        self.per_host = per_host
+        self.deques = [deque() for _ in range(threads)]
+        self.active_hosts = {}
+        self.outstanding = 0
+        self.next_deque = 0
+        self.closed = False
+        self.cancelled = False
+        self.condition = threading.Condition()
+        self.output = queue.Queue()
+        self.local = threading.local()
+        self.workers = [threading.Thread(target=self._work, args=(index,), daemon=True) for index in range(threads)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, func, *args, host=None, group=None):
+        """
+        Queue func(*args). Called from a task, the new task goes to the
+        calling worker's own deque.
+        Args:
+            host: Host the task sends requests to, for the per-host limit
+            group: Optional TaskGroup the task belongs to
+        """
+        task = Task(func, args, host, group)
+        with self.condition:
+            if self.cancelled:
+                return
+            index = getattr(self.local, 'index', None)
+            if index is None:
+                index = self.next_deque
+                self.next_deque = (self.next_deque + 1) % len(self.deques)
+            self.deques[index].append(task)
+            self.outstanding += 1
+            if group is not None:
+                group.pending += 1
+            self.condition.notify_all()
+
+    def seal(self, group):
+        """Drop the creator's hold on a group; on_done runs here if its tasks already finished"""
+        self._leave(group)
+
+    def _leave(self, group):
+        """One task (or the hold) of a group is done; the last one runs on_done"""
+        with self.condition:
+            group.pending -= 1
+            done = group.pending == 0
+        if done and group.on_done:
+            try:
+                group.on_done()
+            except Exception as e:
+                print(f"{Fore.YELLOW}[!] Scan task failed: {str(e)[:100]}{Style.RESET_ALL}")
+
+    def close(self):
+        """No more tasks will be submitted from outside; results() ends once all tasks finish"""
+        with self.condition:
+            self.closed = True
+            if self.outstanding == 0:
+                self.output.put(_DONE)
+            self.condition.notify_all()
+
+    def cancel(self):
+        """Drop every queued task; tasks already running finish, their results are discarded"""
+        with self.condition:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            for tasks in self.deques:
+                tasks.clear()
+            self.condition.notify_all()
+        self.output.put(_DONE)
+
+    def results(self):
+        """
+        Yield task results as they complete. Leaving the loop early
+        cancels the remaining work.
+        """
+        finished = False
+        try:
+            while True:
+                item = self.output.get()
+                if item is _DONE:
+                    finished = True
+                    return
+                if not self.cancelled:
+                    yield item
+        finally:
+            if not finished:
+                self.cancel()
+            self.shutdown()
+
+    def shutdown(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for worker in self.workers:
+            if worker is not threading.current_thread():
+                worker.join()
+
+    def _runnable(self, task):
+        return task.host is None or self.active_hosts.get(task.host, 0) < self.per_host
+
+    def _take(self, index):
+        """Newest runnable task from our own deque, else steal the oldest from another"""
+        own = self.deques[index]
+        for position in range(len(own) - 1, -1, -1):
+            if self._runnable(own[position]):
+                task = own[position]
+                del own[position]
+                return task
+        for offset in range(1, len(self.deques)):
+            victim = self.deques[(index + offset) % len(self.deques)]
+            for position, task in enumerate(victim):
+                if self._runnable(task):
+                    del victim[position]
+                    return task
+        return None
+
+    def _work(self, index):
+        self.local.index = index
+        while True:
+            with self.condition:
+                while True:
+                    if self.cancelled or (self.closed and self.outstanding == 0):
+                        return
+                    task = self._take(index)
+                    if task is not None:
+                        break
+                    self.condition.wait()
+                if task.host is not None:
+                    self.active_hosts[task.host] = self.active_hosts.get(task.host, 0) + 1
+
+            try:
+                for result in task.func(*task.args) or ():
+                    self.output.put(result)
+            except Exception as e:
+                print(f"{Fore.YELLOW}[!] Scan task failed: {str(e)[:100]}{Style.RESET_ALL}")
+
+            if task.host is not None:
+                with self.condition:
+                    self.active_hosts[task.host] -= 1
+            # on_done runs before this task is counted finished, so tasks it submits keep results() open
+            if task.group is not None:
+                self._leave(task.group)
+            with self.condition:
+                self.outstanding -= 1
+                if self.outstanding == 0 and self.closed and not self.cancelled:
+                    self.output.put(_DONE)
+                self.condition.notify_all()
+
+def host_of(url):
+    return urlparse(url).netloc
+
+def parallel_scan(scan_func, items, threads=5, host=None):
+    """
+    Run scan_func over items on a WorkStealingScheduler and collect the
+    results in item order. scan_func may return a list (extended into the
+    results) or a single truthy result. An exception from scan_func is
+    raised here, as for the first failing item in order.
+    Args:
+        host: Optional callable(item) giving the host an item sends requests
+            to, for the per-host limit (default: the item's host if it is a URL)
+    """
+    host = host or (lambda item: host_of(item) if isinstance(item, str) else None)
+
+    def run(index, item):
+        try:
+            return [(index, scan_func(item), None)]
+        except Exception as e:
+            return [(index, None, e)]
+
+    scheduler = WorkStealingScheduler(threads=threads)
+    for index, item in enumerate(items):
+        scheduler.submit(run, index, item, host=host(item))
+    scheduler.close()
+    outputs = sorted(scheduler.results(), key=lambda output: output[0])
 
-def parallel_scan(scan_func, items, threads=5):
     results = []
-    with ThreadPoolExecutor(max_workers=threads) as executor:
-        for out in executor.map(scan_func, items):
-            if isinstance(out, list):
-                results.extend(out)
-            elif out:
-                results.append(out)
-    return results
\ No newline at end of file
+    for _, out, error in outputs:
+        if error is not None:
+            raise error
+        if isinstance(out, list):
+            results.extend(out)
+        elif out:
+            results.append(out)
+    return results
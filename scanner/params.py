@@ -0,0 +1,121 @@
+import re
+import threading
+from urllib.parse import urlsplit, parse_qsl
+from scanner.forms import FormSpec, FormField
+from scanner.frontier import canonicalize_url
+
+# Path segments that vary between URLs of one endpoint, and their placeholder
+SEGMENT_PLACEHOLDERS = [
+    (re.compile(r'^\d+$'), '{int}'),
+    (re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE), '{uuid}'),
+    (re.compile(r'^[0-9a-f]{16,}$', re.IGNORECASE), '{hex}'),
+]
+
+def path_template(path):
+    """'/item/5012/reviews' -> '/item/{int}/reviews'"""
+    segments = []
+    for segment in path.split('/'):
+        for pattern, placeholder in SEGMENT_PLACEHOLDERS:
+            if pattern.match(segment):
+                segment = placeholder
+                break
+        segments.append(segment)
+    return '/'.join(segments)
+
+def url_pattern(url):
+    """
+    Pattern shared by URLs that hit the same endpoint with different values:
+    scheme, host, templated path and the set of parameter names
+    Returns:
+        (scheme://host/path_template, frozenset_of_parameter_names)
+    """
+    parts = urlsplit(canonicalize_url(url))
+    names = frozenset(name for name, _ in parse_qsl(parts.query, keep_blank_values=True))
+    return f"{parts.scheme}://{parts.netloc}{path_template(parts.path)}", names
+
+def link_endpoint(url):
+    """GET FormSpec for a link: its path as the action, its query parameters as fields"""
+    parts = urlsplit(url)
+    fields, seen = [], set()
+    for name, value in parse_qsl(parts.query, keep_blank_values=True):
+        if name not in seen:
+            seen.add(name)
+            fields.append(FormField(name, "text", value, value))
+    return FormSpec(parts._replace(query="", fragment="").geturl(), "get", fields)
+
+class ParameterInventory:
+    """
+    GET parameters found in crawled links, grouped by url_pattern(): the
+    5000 links /item?id=1 .. /item?id=5000 are one endpoint, tested once
+    through the first link seen. Thread-safe; the FormIndex of links.
+    """
+
+    def __init__(self, links=()):
+        self.lock = threading.Lock()
+        self.groups = {}
+        self.signatures = {}
+        self.total = 0
+        for link in links:
+            self.add(link, link)
+
+    def add(self, page_url, link_url):
+        """
+        Record one link found on page_url
+        Returns:
+            The pattern's representative FormSpec if the link starts a new
+            pattern, else None (also for links without parameters)
+        """
+        pattern = url_pattern(link_url)
+        if not pattern[1]:
+            return None
+        with self.lock:
+            group = self.groups.get(pattern)
+            if group is None:
+                form = link_endpoint(link_url)
+                self.groups[pattern] = {'url': link_url, 'form': form, 'pages': [page_url],
+                                        'links': {canonicalize_url(link_url)}}
+                self.signatures[form.signature()] = pattern
+                self.total += 1
+                return form
+            before = len(group['links'])
+            group['links'].add(canonicalize_url(link_url))
+            self.total += len(group['links']) - before
+            if page_url not in group['pages']:
+                group['pages'].append(page_url)
+            return None
+
+    def endpoints(self):
+        """One representative (link_url, FormSpec) per pattern, in discovery order"""
+        with self.lock:
+            return [(group['url'], group['form']) for group in self.groups.values()]
+
+    def owns(self, form):
+        with self.lock:
+            return form.signature() in self.signatures
+
+    def pages_for(self, form):
+        """Return every page that links to the form's pattern"""
+        with self.lock:
+            pattern = self.signatures.get(form.signature())
+            return list(self.groups[pattern]['pages']) if pattern else []
+
+    def tag_findings(self, form, findings):
+        """Attach the pages linking to the tested pattern to its findings"""
+        pages = self.pages_for(form)
+        for finding in findings:
+            finding['pages'] = pages
+        return findings
+
+    def requests_saved(self, requests_per_field):
+        """Probes avoided by testing each pattern through one link"""
+        with self.lock:
+            return sum((len(group['links']) - 1) * len(group['form'].fields) * requests_per_field
+                       for group in self.groups.values())
+
+    def stats(self, requests_per_field):
+        """Summary for the report"""
+        return {
+            'parameterized_links': self.total,
+            'link_patterns': len(self.groups),
+            'link_requests_saved': self.requests_saved(requests_per_field),
+        }
@@ -0,0 +1,223 @@
+import queue
+import threading
+from urllib.parse import urlsplit
+from scanner.crawler import crawl_site
+from scanner.dedup import FormIndex
+from scanner.frontier import canonicalize_url
+from scanner.parallel import WorkStealingScheduler, host_of
+from scanner.timing import TimingEngine
+from scanner.endpoint import schedule_endpoint
+from scanner.xss import XSSDetector
+from scanner.sqli import SQLiDetector
+from scanner.fingerprinting import TechFingerprinter
+from scanner.planner import ScanPlanner
+from scanner.params import ParameterInventory
+
+# Forms discovered but not yet deduplicated; a full queue stalls crawl fetches
+FORM_QUEUE_SIZE = 64
+
+# Unique forms whose tests are queued or running; a full window stalls the dispatcher
+MAX_FORMS_IN_FLIGHT = 32
+
+_END = object()
+
+class PipelineProgress:
+    """
+    One progress model for every stage. Counters only grow; each change is
+    reported to the callback as a snapshot dict:
+        pages: Pages crawled
+        forms_found: Forms extracted, duplicates included
+        unique_forms: Forms and link patterns handed to the testers
+        tests_total: Form tests queued (one per unique form and detector)
+        tests_done: Form tests finished
+        findings: Findings reported
+    """
+    FIELDS = ("pages", "forms_found", "unique_forms", "tests_total", "tests_done", "findings")
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+        self.lock = threading.Lock()
+
+    def update(self, stage, **increments):
+        """
+        Args:
+            stage: Stage reporting the change ("crawl", "dedup", "xss", "sqli", "finding")
+            **increments: Counter increments
+        """
+        with self.lock:
+            for key, value in increments.items():
+                self.counts[key] += value
+            snapshot = dict(self.counts)
+        if self.callback:
+            self.callback(stage, snapshot)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+class ScanPipeline:
+    """
+    Streaming crawl -> dedup -> test pipeline. The crawler hands each form
+    over the moment it is extracted; a dispatcher thread deduplicates it and
+    schedules it for every detector (XSS, SQLi) on a WorkStealingScheduler as
+    one interleaved stream sharing the endpoint's baseline and pre-probe
+    (see scanner.endpoint), so testing overlaps crawling. The crawl's
+    responses are fingerprinted on the way, and each host's ScanPlan picks
+    and orders the checks its forms get (see scanner.planner). Links that
+    carry query parameters are tested as GET endpoints too, once per URL
+    pattern (see scanner.params). Stages are
+    joined by bounded queues: when the testers fall behind, the dispatcher
+    waits for a free slot in the in-flight window, the form queue fills,
+    and crawl fetches block on it.
+
+    Usage:
+        pipeline = ScanPipeline(url, max_pages=50, threads=10)
+        for finding in pipeline.run():
+            ...
+        pipeline.form_index, pipeline.inventory, pipeline.links, pipeline.query_links,
+        pipeline.planner.stats()
+    """
+
+    def __init__(self, url, max_pages=10, timeout=5, threads=5, progress_callback=None,
+                 form_queue_size=FORM_QUEUE_SIZE, max_forms_in_flight=MAX_FORMS_IN_FLIGHT, plan=True):
+        """
+        Args:
+            plan: If False, skip stack-aware planning and run every check on every form
+        """
+        self.url = url
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.form_index = FormIndex()
+        self.links = []
+        self.query_links = {}
+        self.inventory = ParameterInventory()
+        self.fingerprinter = TechFingerprinter()
+        self.progress = PipelineProgress(progress_callback)
+        self.forms = queue.Queue(maxsize=form_queue_size)
+        self.in_flight = threading.BoundedSemaphore(max_forms_in_flight)
+        self.scheduler = WorkStealingScheduler(threads=threads)
+        self.timing_engine = TimingEngine()
+        self.detectors = [XSSDetector(), SQLiDetector(self.timing_engine)]
+        self.planner = ScanPlanner(self.fingerprinter, [detector.name for detector in self.detectors], enabled=plan)
+        self.stopped = threading.Event()
+
+    def _put(self, item):
+        """Block while the form queue is full, unless the pipeline was stopped"""
+        while not self.stopped.is_set():
+            try:
+                self.forms.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _enqueue(self, url, form):
+        """form_callback for the crawler"""
+        self.progress.update("crawl", forms_found=1)
+        self._put((url, form))
+
+    def _link(self, page_url, link_url):
+        """
+        link_callback for the crawler: keep every link that carries
+        parameters, crawled or not, and queue the first link of each URL
+        pattern for testing
+        """
+        if not urlsplit(link_url).query:
+            return
+        self.query_links.setdefault(canonicalize_url(link_url), page_url)
+        form = self.inventory.add(page_url, link_url)
+        if form is not None:
+            self._put((link_url, form, True))
+
+    def _crawl(self):
+        try:
+            self.links, _ = crawl_site(self.url, max_pages=self.max_pages, timeout=self.timeout,
+                                       progress_callback=lambda n: self.progress.update("crawl", pages=n),
+                                       form_callback=self._enqueue, fingerprinter=self.fingerprinter,
+                                       link_callback=self._link)
+        finally:
+            self._put(_END)
+
+    def _form_done(self, detectors):
+        """Countdown over the detectors of one form; frees its in-flight slot at zero"""
+        remaining = [detectors]
+        lock = threading.Lock()
+
+        def done(stage):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            self.progress.update(stage, tests_done=1)
+            if last:
+                self.in_flight.release()
+        return done
+
+    def _dispatch(self):
+        try:
+            while not self.stopped.is_set():
+                try:
+                    item = self.forms.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is _END:
+                    return
+                if len(item) == 3:
+                    # A link pattern, already deduplicated by the inventory;
+                    # skipped if a form with the same signature was tested
+                    url, form, _ = item
+                    if form.signature() in self.form_index.groups:
+                        continue
+                else:
+                    url, form = item
+                    if not self.form_index.add(url, form):
+                        continue
+                plan = self.planner.plan_for(host_of(form.action))
+                detectors = plan.detectors(self.detectors)
+                if not detectors:
+                    self.progress.update("dedup", unique_forms=1)
+                    continue
+                while not self.in_flight.acquire(timeout=0.5):
+                    if self.stopped.is_set():
+                        return
+                self.progress.update("dedup", unique_forms=1, tests_total=len(detectors))
+                schedule_endpoint(self.scheduler, url, form, detectors, on_done=self._form_done(len(detectors)), plan=plan)
+        finally:
+            self.scheduler.close()
+
+    def run(self):
+        """
+        Run every stage and yield findings as they are confirmed. Leaving
+        the loop early cancels the queued tests and stops feeding new forms
+        to the testers (the crawl itself finishes in the background). Once
+        the pipeline completes, each finding lists every page its form was
+        found on, including pages crawled after the finding.
+        """
+        crawler = threading.Thread(target=self._crawl, daemon=True)
+        dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        crawler.start()
+        dispatcher.start()
+
+        results = []
+        try:
+            for form, finding in self.scheduler.results():
+                self._tag(form, finding)
+                results.append((form, finding))
+                self.progress.update("finding", findings=1)
+                yield finding
+        finally:
+            # A no-op after a complete run; after an early exit the crawl is left to wind down
+            self.stopped.set()
+            self.scheduler.cancel()
+            dispatcher.join()
+            self.timing_engine.shutdown()
+
+        crawler.join()
+        for form, finding in results:
+            self._tag(form, finding)
+
+    def _tag(self, form, finding):
+        """List the pages a finding's form or link pattern was found on"""
+        if self.inventory.owns(form):
+            self.inventory.tag_findings(form, [finding])
+        else:
+            self.form_index.tag_findings(form, [finding])
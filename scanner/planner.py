@@ -0,0 +1,185 @@
+import threading
+
+# Database backend a detected technology points to: (dbms, certain). A
+# certain backend drops payloads written for other backends; a likely one
+# only runs its payloads first. A backend only implied by another
+# technology (e.g. MySQL by Joomla, which also runs on PostgreSQL and
+# MSSQL) is never certain.
+BACKEND_HINTS = {
+    "MySQL": ("mysql", True),
+    "PostgreSQL": ("postgresql", True),
+    "Microsoft SQL Server": ("mssql", True),
+    "ASP.NET": ("mssql", False),
+    "Microsoft IIS": ("mssql", False),
+    "PHP": ("mysql", False),
+}
+
+# Categories that show code running on the host (see TECH_SIGNATURES)
+SERVER_SIDE_CATEGORIES = ("language", "framework", "cms", "database")
+
+# Category of stacks that only serve prebuilt pages
+STATIC_SITE_CATEGORY = "static-site-generator"
+
+# Modules that need server-side code to have anything to find
+SERVER_SIDE_MODULES = ("sqli",)
+
+class ScanPlan:
+    """
+    Checks to run against one host, chosen from its detected tech stack:
+    the enabled modules in the order they should run, the modules skipped
+    (with the reason), and the database backend payload families are
+    ordered or pruned for. Counts the forms planned and the requests the
+    skipped checks would have sent.
+    """
+
+    def __init__(self, host, stack, modules, skipped, dbms=None, certain=False):
+        self.host = host
+        self.stack = stack
+        self.modules = modules
+        self.skipped = skipped
+        self.dbms = dbms
+        self.certain = certain
+        self.forms = 0
+        self.requests_saved = 0
+        self.revision = 0
+        self.lock = threading.Lock()
+
+    def refresh(self, other):
+        """Take over another plan's checks for the same host, keeping the counts"""
+        with self.lock:
+            self.stack = other.stack
+            self.modules = other.modules
+            self.skipped = other.skipped
+            self.dbms = other.dbms
+            self.certain = other.certain
+            self.revision = other.revision
+
+    def record_saved(self, count):
+        with self.lock:
+            self.requests_saved += count
+
+    def detectors(self, detectors):
+        """
+        The detectors to run on one form of this host, in plan order.
+        Skipped detectors count their `min_requests` (per form) as saved.
+        """
+        with self.lock:
+            self.forms += 1
+        enabled = [detector for detector in detectors if detector.name in self.modules]
+        self.record_saved(sum(getattr(detector, "min_requests", 0) for detector in detectors
+                              if detector.name not in self.modules))
+        return sorted(enabled, key=lambda detector: self.modules.index(detector.name))
+
+    def order_payloads(self, payloads, payload_dbms):
+        """
+        Order a payload list by expected yield: payloads for the expected
+        backend first, then generic ones, then other backends' (dropped, and
+        counted as saved, when the backend is certain)
+        Args:
+            payloads: Payloads in their default order
+            payload_dbms: {payload: backends it is written for}; untagged payloads are generic
+        """
+        if self.dbms is None:
+            return list(payloads)
+
+        def rank(payload):
+            tags = payload_dbms.get(payload)
+            if not tags:
+                return 1
+            return 0 if self.dbms in tags else 2
+
+        ordered = sorted(payloads, key=rank)
+        if self.certain:
+            kept = [payload for payload in ordered if rank(payload) < 2]
+            self.record_saved(len(ordered) - len(kept))
+            return kept
+        return ordered
+
+    def summary(self):
+        """Plan and savings for the report"""
+        with self.lock:
+            summary = {
+                'stack': ", ".join(self.stack) or "unknown",
+                'checks': " > ".join(self.modules),
+                'skipped': "; ".join(f"{name} ({reason})" for name, reason in self.skipped.items()) or "none",
+                'backend': f"{self.dbms} ({'certain' if self.certain else 'likely'})" if self.dbms else "unknown",
+                'forms': self.forms,
+                'requests_saved': self.requests_saved,
+            }
+        return summary
+
+def build_plan(host, stack, modules=("xss", "sqli")):
+    """
+    Build the check plan for a host
+    Args:
+        host: Host the plan is for
+        stack: {tech: {'category', 'version', ...}} from TechFingerprinter.stack()
+        modules: Module names in their default order
+    Returns:
+        ScanPlan
+    """
+    categories = {entry['category'] for entry in stack.values()}
+    skipped = {}
+    static = [tech for tech, entry in stack.items() if entry['category'] == STATIC_SITE_CATEGORY]
+    if static and not categories & set(SERVER_SIDE_CATEGORIES):
+        for name in SERVER_SIDE_MODULES:
+            skipped[name] = f"static site ({', '.join(sorted(static))}), no server-side code"
+
+    # A certain hint wins over a likely one
+    dbms, certain = None, False
+    for tech, entry in stack.items():
+        hint = BACKEND_HINTS.get(tech)
+        if hint and entry.get('implied_by'):
+            hint = (hint[0], False)
+        if hint and (dbms is None or hint[1] and not certain):
+            dbms, certain = hint
+
+    enabled = [name for name in modules if name not in skipped]
+    if dbms:
+        # A known backend makes SQL injection the likelier finding
+        enabled.sort(key=lambda name: name != "sqli")
+    labels = [f"{tech} {stack[tech]['version']}".strip() for tech in sorted(stack)]
+    return ScanPlan(host, labels, enabled, skipped, dbms, certain)
+
+class ScanPlanner:
+    """
+    One ScanPlan per host, built from a TechFingerprinter when the host's
+    first form is scheduled; the crawl has fetched that form's page by then,
+    so the stack reflects at least the headers, cookies and page it came from.
+    The plan is rebuilt in place whenever the host's stack has changed since
+    (see TechFingerprinter.revision()), so later forms follow what the crawl
+    learned later.
+    """
+
+    def __init__(self, fingerprinter, modules=("xss", "sqli"), enabled=True):
+        """
+        Args:
+            fingerprinter: TechFingerprinter fed by the crawl
+            modules: Module names in their default order
+            enabled: If False, every host gets the full default plan
+        """
+        self.fingerprinter = fingerprinter
+        self.modules = tuple(modules)
+        self.enabled = enabled
+        self.plans = {}
+        self.lock = threading.Lock()
+
+    def plan_for(self, host):
+        with self.lock:
+            plan = self.plans.get(host)
+            revision = self.fingerprinter.revision(host) if self.enabled else 0
+            if plan is None or plan.revision != revision:
+                stack = self.fingerprinter.stack(host) if self.enabled else {}
+                fresh = build_plan(host, stack, self.modules)
+                fresh.revision = revision
+                if plan is None:
+                    plan = self.plans[host] = fresh
+                else:
+                    plan.refresh(fresh)
+            return plan
+
+    def stats(self):
+        """{host: plan summary} for the report"""
+        with self.lock:
+            plans = list(self.plans.items())
+        return {host: plan.summary() for host, plan in plans}
@@ -0,0 +1,176 @@
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from colorama import Fore, Style
+from scanner.nmapscan import compress_ports, expand_targets
+from scanner.portscan import parse_ports, scan_targets
+
+# Port-state cache file (see config/production.env)
+PORT_CACHE_PATH = os.environ.get('SCANNER_PORT_CACHE', os.path.join(os.path.expanduser("~"), ".cache", "vulnscan", "ports.json"))
+
+# Seconds a full scan stays valid; after that the host is scanned in full again
+PORT_CACHE_TTL = 24 * 3600
+
+# Fraction of the not-known-open ports probed on an incremental rescan
+RESCAN_SAMPLE_RATE = 0.1
+
+class PortStateCache:
+    """
+    Persistent per-host record of open ports, kept as JSON:
+        {host: {"full_scan": timestamp, "checked": timestamp, "ports": port_spec,
+                "open": {port: port_dict}}}
+    A host's entry is fresh for `ttl` seconds after its last full scan;
+    incremental rescans update the open ports but do not extend it.
+    """
+
+    def __init__(self, path=PORT_CACHE_PATH, ttl=PORT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.hosts = {}
+        try:
+            with open(path) as f:
+                self.hosts = json.load(f)
+        except (OSError, ValueError):
+            pass  # No cache yet, or unreadable: start empty
+
+    def get(self, host, ports=None, now=None):
+        """
+        Returns:
+            The host's entry if its last full scan is within the TTL (and
+            covered `ports`, if given), else None
+        """
+        with self.lock:
+            entry = self.hosts.get(host)
+        if entry is None or (now or time.time()) - entry["full_scan"] > self.ttl:
+            return None
+        if ports is not None and not set(ports) <= set(parse_ports(entry["ports"])):
+            return None
+        return entry
+
+    def record(self, host, ports, open_ports, full, now=None):
+        """
+        Store a host's open ports after a scan
+        Args:
+            ports: Port numbers the scan covered (the full range for a full scan)
+            open_ports: {port: port_dict} now known open
+            full: True after a full scan, which restarts the TTL
+        """
+        now = now or time.time()
+        with self.lock:
+            entry = self.hosts.get(host, {})
+            if full or not entry:
+                entry = {"full_scan": now, "ports": compress_ports(sorted(ports))}
+            entry["checked"] = now
+            entry["open"] = {str(port): info for port, info in sorted(open_ports.items())}
+            self.hosts[host] = entry
+
+    def save(self):
+        """Write the cache atomically, so an interrupted scan never leaves it truncated"""
+        with self.lock:
+            data = json.dumps(self.hosts, indent=1, sort_keys=True)
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix=".ports-")
+        try:
+            with os.fdopen(handle, "w") as f:
+                f.write(data)
+            os.replace(temporary, self.path)
+        except OSError:
+            os.remove(temporary)
+            raise
+
+def _by_host(found, hosts):
+    """Key scan results by the requested host; nmap reports a hostname under its address"""
+    results = {host: found.get(host, []) for host in hosts}
+    for host in hosts:
+        if host not in found:
+            try:
+                results[host] = found.get(socket.gethostbyname(host), [])
+            except OSError:
+                pass
+    return results
+
+def incremental_scan(targets, ports="1-1000", cache=None, sample_rate=RESCAN_SAMPLE_RATE,
+                     progress_callback=None, port_callback=None, method="auto", scan=scan_targets):
+    """
+    Scan hosts, reusing the port-state cache. Hosts without a fresh entry are
+    scanned in full, all in one scan() call. Cached hosts are rescanned
+    together in one more call, over the ports known open on any of them plus
+    one random sample of the other ports. Re-verified ports are not reported;
+    only the differences from the cached state are.
+    Args:
+        targets: Hosts, IP addresses and CIDR ranges
+        ports: Port range (default: "1-1000")
+        cache: PortStateCache (saved before returning)
+        sample_rate: Fraction of the not-known-open ports probed on a rescan
+        progress_callback, port_callback, method: As for scan_targets();
+            port_callback only sees full scans and newly opened ports
+        scan: Scan function with scan_targets()'s signature
+    Returns:
+        (results, changes): results is {host: list of open port dictionaries}
+        for every host; changes is a list of {'host', 'change', 'port_info'}
+        where change is "opened" or "closed" (full scans of uncached hosts
+        report every open port as "opened")
+    """
+    cache = cache or PortStateCache()
+    port_list = parse_ports(ports)
+    in_range = set(port_list)
+    results, changes = {}, []
+
+    full, cached = [], {}
+    for host in expand_targets(targets):
+        entry = cache.get(host, port_list)
+        if entry is None:
+            full.append(host)
+        else:
+            cached[host] = entry
+
+    if full:
+        found = _by_host(scan(full, ports, progress_callback, port_callback, method), full)
+        for host in full:
+            results[host] = found[host]
+            changes += [{'host': host, 'change': "opened", 'port_info': info} for info in found[host]]
+            cache.record(host, port_list, {info['port']: info for info in found[host]}, full=True)
+
+    if cached:
+        known = {host: {int(port): info for port, info in entry["open"].items() if int(port) in in_range}
+                 for host, entry in cached.items()}
+        verify = set().union(*known.values())
+        rest = [port for port in port_list if port not in verify]
+        sample = random.sample(rest, int(round(len(rest) * sample_rate))) if rest else []
+        oldest = min(entry['full_scan'] for entry in cached.values())
+        print(f"{Fore.BLUE}[i] {len(cached)} cached host(s), oldest full scan {time.ctime(oldest)}; "
+              f"re-verifying {len(verify)} known-open ports and sampling {len(sample)} of {len(rest)} others{Style.RESET_ALL}")
+
+        probe = sorted(verify.union(sample))
+        if probe:
+            found = _by_host(scan(list(cached), compress_ports(probe), progress_callback, None, method, quiet=True),
+                             list(cached))
+        else:
+            # Nothing known open and an empty sample: the cached (closed) state stands
+            found = {host: [] for host in cached}
+        for host, entry in cached.items():
+            now_open = {info['port']: info for info in found[host]}
+            for port, info in known[host].items():
+                if port not in now_open:
+                    changes.append({'host': host, 'change': "closed", 'port_info': info})
+                    print(f"{Fore.YELLOW}[-] Port closed: {host} {port}/{info['protocol']} ({info['service']}){Style.RESET_ALL}")
+            for port, info in sorted(now_open.items()):
+                if port not in known[host]:
+                    changes.append({'host': host, 'change': "opened", 'port_info': info})
+                    print(f"{Fore.GREEN}[+] New open port: {host} {port}/{info['protocol']} ({info['service']}){Style.RESET_ALL}")
+                    if port_callback:
+                        port_callback(host, info)
+
+            # Every known-open port was re-verified, and ports outside the sample keep their cached (closed) state
+            results[host] = [now_open[port] for port in sorted(now_open)]
+            outside = {int(port): info for port, info in entry["open"].items() if int(port) not in in_range}
+            cache.record(host, port_list, {**outside, **now_open}, full=False)
+
+    cache.save()
+    return results, changes
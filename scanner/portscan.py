@@ -1,63 +1,338 @@
-import nmap
-import time
+import asyncio
+import errno
+import os
+import shutil
+import socket
+import struct
 from colorama import Fore, Style
+from scanner.nmapscan import NMAP_BINARY, expand_targets, plan_shards, run_shards
 
-def scan_ports(target, ports="1-1000", progress_callback=None):
+# Connect attempts in flight at once (capped by the open file limit)
+CONNECT_CONCURRENCY = 1000
+
+# Connect timeout before any round trip has been measured, and its bounds
+INITIAL_TIMEOUT = 1.0
+MIN_TIMEOUT = 0.1
+MAX_TIMEOUT = 3.0
+
+# Extra attempts for ports that timed out (nmap's --max-retries)
+CONNECT_RETRIES = 1
+
+# File descriptors left free for everything else when capping the concurrency
+RESERVED_FDS = 64
+
+# connect() results meaning the handshake is under way on a non-blocking socket
+IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, 10035)  # 10035: WSAEWOULDBLOCK
+
+def parse_ports(ports):
     """
-    Scan ports on target host using nmap
+    Expand an nmap-style port specification
+    Args:
+        ports: e.g. "22,80,8000-8100"
+    Returns:
+        Sorted list of port numbers
+    """
+    result = set()
+    for part in str(ports).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-", 1)
+            result.update(range(int(low or 1), int(high or 65535) + 1))
+        else:
+            result.add(int(part))
+    if any(port < 1 or port > 65535 for port in result):
+        raise ValueError(f"Port out of range in {ports!r}")
+    return sorted(result)
+
+def service_name(port):
+    try:
+        return socket.getservbyport(port, "tcp")
+    except OSError:
+        return "unknown"
+
+def _fd_limit():
+    """Soft limit on open file descriptors, or None if unlimited or unknown"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    return None if soft == resource.RLIM_INFINITY else soft
+
+class ConnectScanner:
+    """
+    Asyncio TCP connect scan: needs no privileges, unlike nmap -sS. Many
+    non-blocking connects are kept in flight by a pool of worker
+    coroutines. The connect timeout adapts to the target: it starts at
+    INITIAL_TIMEOUT and follows the measured round-trip times (smoothed
+    RTT plus four deviations, as TCP does), so a nearby host is scanned
+    with a short timeout. Ports that time out are retried once the timeout
+    has settled.
+    """
+
+    def __init__(self, concurrency=CONNECT_CONCURRENCY, timeout=INITIAL_TIMEOUT, retries=CONNECT_RETRIES):
+        limit = _fd_limit()
+        if limit:
+            concurrency = min(concurrency, max(1, limit - RESERVED_FDS))
+        self.concurrency = max(1, concurrency)
+        self.initial_timeout = timeout
+        self.retries = retries
+        self.srtt = None
+        self.rttvar = None
+
+    def timeout(self):
+        """Current connect timeout in seconds"""
+        if self.srtt is None:
+            return self.initial_timeout
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, self.srtt + 4 * self.rttvar))
+
+    def observe(self, rtt):
+        """Fold a measured connect round trip into the timeout estimate"""
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    async def probe(self, family, address, port):
+        """
+        Returns:
+            "open", "closed" (connection refused) or "filtered" (no answer)
+        """
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.setblocking(False)
+            # Reset instead of a FIN handshake on close, leaving no TIME_WAIT behind
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            start = loop.time()
+            error = sock.connect_ex((address, port))
+            if error in IN_PROGRESS:
+                # Wait for writability (connected or failed) or the timeout, without a task per port
+                answered = loop.create_future()
+                settle = lambda result: answered.done() or answered.set_result(result)
+                fd = sock.fileno()
+                loop.add_writer(fd, settle, True)
+                timer = loop.call_later(self.timeout(), settle, False)
+                try:
+                    if not await answered:
+                        return "filtered"
+                finally:
+                    loop.remove_writer(fd)
+                    timer.cancel()
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        finally:
+            sock.close()
+
+        if error == 0:
+            self.observe(loop.time() - start)
+            return "open"
+        if error == errno.ECONNREFUSED:
+            self.observe(loop.time() - start)
+            return "closed"
+        return "filtered"
+
+    async def scan(self, target, ports, progress_callback=None):
+        """
+        Args:
+            target: IP address or hostname
+            ports: List of port numbers
+            progress_callback: Optional callback(n), called as ports are settled
+        Returns:
+            {port: state}
+        """
+        family, address = await resolve(target)
+        states = await probe_all([(target, self, family, address)], ports, self.concurrency, self.retries,
+                                 progress_callback)
+        return states[target]
+
+    async def scan_hosts(self, targets, ports, progress_callback=None, port_callback=None):
+        """
+        Scan several hosts in one event loop, sharing this scanner's
+        concurrency cap. Each host keeps its own round-trip estimate, so a
+        slow host does not stretch the timeout of a fast one.
+        Args:
+            targets: IP addresses or hostnames
+            ports: List of port numbers
+            progress_callback: Optional callback(n), called as ports are settled
+            port_callback: Optional callback(target, port), called as each open port is found
+        Returns:
+            {target: {port: state}} for the targets that resolved
+        """
+        resolved = await asyncio.gather(*(resolve(target) for target in targets), return_exceptions=True)
+        hosts = []
+        for target, address in zip(targets, resolved):
+            if isinstance(address, Exception):
+                print(f"{Fore.RED}[✗] Error scanning {target}: {address}{Style.RESET_ALL}")
+                continue
+            hosts.append((target, ConnectScanner(self.concurrency, self.initial_timeout, self.retries)) + address)
+        return await probe_all(hosts, ports, self.concurrency, self.retries, progress_callback, port_callback)
+
+async def resolve(target):
+    """(family, address) to connect to for a hostname or IP address"""
+    loop = asyncio.get_running_loop()
+    family, _, _, _, sockaddr = (await loop.getaddrinfo(target, None, type=socket.SOCK_STREAM))[0]
+    return family, sockaddr[0]
+
+async def probe_all(hosts, ports, concurrency, retries, progress_callback=None, port_callback=None):
+    """
+    Probe every port of every host with one pool of `concurrency` workers.
+    Ports are interleaved across hosts so no single host takes the whole
+    pool; ports that time out are retried after the first pass.
+    Args:
+        hosts: List of (target, ConnectScanner, family, address); each
+            scanner keeps that host's round-trip estimate
+        ports: List of port numbers
+    Returns:
+        {target: {port: state}}
+    """
+    states = {target: {} for target, _, _, _ in hosts}
+    pending = [(port, host) for port in ports for host in hosts]
+
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        remaining = iter(pending)
+        retry = []
+
+        async def worker():
+            for port, host in remaining:
+                target, scanner, family, address = host
+                state = await scanner.probe(family, address, port)
+                if state == "filtered" and not last:
+                    retry.append((port, host))
+                    continue
+                states[target][port] = state
+                if state == "open" and port_callback:
+                    port_callback(target, port)
+                if progress_callback:
+                    progress_callback(1)
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(pending)))))
+        if not retry:
+            break
+        pending = sorted(retry, key=lambda job: job[0])
+    return states
+
+def port_entry(port):
+    """Open port dictionary, as returned by scan_ports()"""
+    return {
+        'port': port,
+        'protocol': 'tcp',
+        'service': service_name(port),
+        'state': 'open'
+    }
+
+def connect_scan(target, ports="1-1000", progress_callback=None, concurrency=CONNECT_CONCURRENCY, quiet=False):
+    """
+    Scan ports on target host with the built-in asyncio connect scanner
     Args:
         target: IP address or hostname
-        ports: Port range (default: "1-1000")
-        progress_callback: Optional callback for progress updates
+        ports: Port range (default: "1-1000"), or a list of port numbers
+        progress_callback: Optional callback, called with 1 as each port is settled
+        concurrency: Connect attempts in flight at once
+        quiet: Leave reporting open ports to the caller
     Returns:
-        List of open port dictionaries
+        List of open port dictionaries, as returned by scan_ports()
     """
     try:
-        nm = nmap.PortScanner()
-        
-        # Use faster scan options for speed
-        scan_args = "-sS -T4 --max-retries 1 --host-timeout 30s"
-        
-        print(f"Scanning {target} ports {ports}...")
-        nm.scan(target, ports, arguments=scan_args)
-        
-        if progress_callback:
-            progress_callback(1)
-            
-    except nmap.PortScannerError as e:
-        print(f"{Fore.RED}[✗] Nmap error: {e}{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}[!] Make sure nmap is installed: sudo apt install nmap{Style.RESET_ALL}")
-        return []
+        port_list = ports if isinstance(ports, list) else parse_ports(ports)
+        if not quiet:
+            print(f"Scanning {target} ports {ports} (TCP connect)...")
+        states = asyncio.run(ConnectScanner(concurrency).scan(target, port_list, progress_callback))
     except Exception as e:
         print(f"{Fore.RED}[✗] Error scanning ports: {e}{Style.RESET_ALL}")
         return []
-    
+
     results = []
-    if target in nm.all_hosts():
-        host_info = nm[target]
-        for proto in host_info.all_protocols():
-            ports_dict = host_info[proto]
-            for port in ports_dict:
-                if ports_dict[port]['state'] == 'open':
-                    service = ports_dict[port]['name']
-                    version = ports_dict[port].get('version', '')
-                    product = ports_dict[port].get('product', '')
-                    
-                    service_info = service
-                    if product:
-                        service_info += f" ({product}"
-                        if version:
-                            service_info += f" {version}"
-                        service_info += ")"
-                    
-                    results.append({
-                        'port': port, 
-                        'protocol': proto, 
-                        'service': service_info,
-                        'state': ports_dict[port]['state']
-                    })
-                    
-                    # Real-time feedback
-                    print(f"{Fore.GREEN}[+] Found open port: {port}/{proto} ({service_info}){Style.RESET_ALL}")
-    
-    return results
\ No newline at end of file
+    for port in sorted(states):
+        if states[port] != "open":
+            continue
+        results.append(port_entry(port))
+
+        if not quiet:
+            # Real-time feedback
+            print(f"{Fore.GREEN}[+] Found open port: {port}/tcp ({results[-1]['service']}){Style.RESET_ALL}")
+    return results
+
+def can_syn_scan():
+    """nmap -sS needs the nmap binary and raw sockets (root)"""
+    return shutil.which(NMAP_BINARY) is not None and hasattr(os, "geteuid") and os.geteuid() == 0
+
+def scan_targets(targets, ports="1-1000", progress_callback=None, port_callback=None, method="auto", quiet=False):
+    """
+    Scan ports on several hosts. With nmap, the scan is split into host x
+    port-range shards run as parallel nmap processes, and each process's
+    XML output is parsed while it runs, so open ports are reported as soon
+    as nmap finds them.
+    Args:
+        targets: Hosts, IP addresses and CIDR ranges (list, or a comma/space separated string)
+        ports: Port range (default: "1-1000")
+        progress_callback: Optional callback(n), n = host x port probes completed
+        port_callback: Optional callback(host, port_dict), called as each open port is found
+        method: "syn", "connect" or "auto", as for scan_ports()
+        quiet: Leave reporting the scan and its open ports to the caller
+    Returns:
+        {host: list of open port dictionaries}
+    """
+    try:
+        hosts = expand_targets(targets)
+        port_list = parse_ports(ports)
+    except ValueError as e:
+        print(f"{Fore.RED}[✗] Error scanning ports: {e}{Style.RESET_ALL}")
+        return {}
+
+    results = {}
+
+    def found(host, port_info):
+        results.setdefault(host, []).append(port_info)
+        if not quiet:
+            # Real-time feedback
+            print(f"{Fore.GREEN}[+] Found open port: {host} {port_info['port']}/{port_info['protocol']} "
+                  f"({port_info['service']}){Style.RESET_ALL}")
+        if port_callback:
+            port_callback(host, port_info)
+
+    if method == "connect" or (method == "auto" and not can_syn_scan()):
+        # Every host in one event loop, under one concurrency cap
+        if not quiet:
+            print(f"Scanning {len(hosts)} host(s), ports {ports} (TCP connect)...")
+        try:
+            asyncio.run(ConnectScanner().scan_hosts(hosts, port_list, progress_callback,
+                                                    lambda host, port: found(host, port_entry(port))))
+        except Exception as e:
+            print(f"{Fore.RED}[✗] Error scanning ports: {e}{Style.RESET_ALL}")
+        for host_ports in results.values():
+            host_ports.sort(key=lambda port_info: port_info['port'])
+        return results
+
+    shards = plan_shards(hosts, port_list)
+    if not quiet:
+        print(f"Scanning {len(hosts)} host(s), ports {ports}, in {len(shards)} nmap shard(s)...")
+    _, errors = run_shards(shards, port_callback=found, progress_callback=progress_callback)
+    for shard_hosts, port_spec, message in errors:
+        print(f"{Fore.RED}[✗] Nmap error on {', '.join(shard_hosts[:3])}{'...' if len(shard_hosts) > 3 else ''} "
+              f"ports {port_spec}: {message}{Style.RESET_ALL}")
+    if errors and len(errors) == len(shards):
+        print(f"{Fore.YELLOW}[!] Make sure nmap is installed: sudo apt install nmap{Style.RESET_ALL}")
+    for host_ports in results.values():
+        host_ports.sort(key=lambda port_info: (port_info['protocol'], port_info['port']))
+    return results
+
+def scan_ports(target, ports="1-1000", progress_callback=None, method="auto"):
+    """
+    Scan ports on target host using nmap
+    Args:
+        target: IP address or hostname
+        ports: Port range (default: "1-1000")
+        progress_callback: Optional callback for progress updates
+        method: "syn" (nmap -sS, needs root), "connect" (built-in, unprivileged)
+            or "auto" (syn when possible, else connect)
+    Returns:
+        List of open port dictionaries
+    """
+    if method == "connect" or (method == "auto" and not can_syn_scan()):
+        return connect_scan(target, ports, progress_callback)
+    results = scan_targets([target], ports, progress_callback, method="syn")
+    return [port_info for host_ports in results.values() for port_info in host_ports]
@@ -3,7 +3,22 @@ import csv
 import datetime
 from colorama import Fore, Style
 
-def generate_report(findings, output="cli", scan_time=0, target=""):
+# Display labels for scan statistics (other keys are shown title-cased)
+STAT_LABELS = {
+    'forms_found': "Forms found",
+    'unique_forms': "Unique forms tested",
+    'duplicate_forms': "Duplicate forms skipped",
+    'requests_saved': "Requests saved (dedup)",
+    'parameterized_links': "Links with parameters",
+    'link_patterns': "Link patterns tested",
+    'link_requests_saved': "Requests saved (link patterns)",
+    'connection_reuse': "Connection reuse per host",
+    'dbms_pruning': "Database backend per host (other payloads skipped)",
+    'tech_stack': "Technology stack per host (passive)",
+    'scan_plan': "Check plan per host (from the tech stack)",
+}
+
+def generate_report(findings, output="cli", scan_time=0, target="", stats=None):
     """
     Generate vulnerability report in various formats
     Args:
@@ -11,6 +26,7 @@ def generate_report(findings, output="cli", scan_time=0, target=""):
         output: Output format ("cli", "json", "csv")
         scan_time: Total scan time in seconds  
         target: Target URL that was scanned
+        stats: Optional dict of scan statistics (e.g. requests saved)
     """
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
@@ -25,6 +41,9 @@ def generate_report(findings, output="cli", scan_time=0, target=""):
         print(f"  Duration:   {scan_time:.2f} seconds")
         print(f"  Findings:   {len(findings)} total")
         
+        if stats:
+            print_scan_optimizations(stats)
+        
         if not findings:
             print(f"\n{Fore.GREEN}✓ No vulnerabilities found.{Style.RESET_ALL}")
             print(f"{Fore.BLUE}[i] This is a preliminary scan. Consider manual testing for comprehensive security assessment.{Style.RESET_ALL}")
@@ -76,12 +95,24 @@ def generate_report(findings, output="cli", scan_time=0, target=""):
                 print(f"    Error:      {finding['error_signature']}")
             if 'subtype' in finding:
                 print(f"    Subtype:    {finding['subtype']}")
+            if finding.get('banner'):
+                print(f"    Banner:     {finding['banner']}")
+            if finding.get('location'):
+                print(f"    Location:   {finding['location']}")
+            if len(finding.get('pages', [])) > 1:
+                print(f"    Found on:   {len(finding['pages'])} pages")
+                for page in finding['pages'][:5]:
+                    print(f"                {page}")
+                if len(finding['pages']) > 5:
+                    print(f"                ... and {len(finding['pages']) - 5} more")
             
             # Remediation advice
             if finding['type'] == "XSS":
                 print(f"    {Fore.GREEN}Remediation: Use proper output encoding and input sanitization. Implement CSP headers.{Style.RESET_ALL}")
             elif finding['type'] == "SQL Injection":
                 print(f"    {Fore.GREEN}Remediation: Use parameterized queries/prepared statements. Validate input data.{Style.RESET_ALL}")
+            elif finding['type'] == "Open Redirect":
+                print(f"    {Fore.GREEN}Remediation: Redirect only to relative paths or an allowlist of hosts; never to a raw URL parameter.{Style.RESET_ALL}")
             elif finding['type'] == "Open Port":
                 print(f"    {Fore.GREEN}Remediation: Restrict access with firewall rules or close unnecessary services.{Style.RESET_ALL}")
             
@@ -98,6 +129,7 @@ def generate_report(findings, output="cli", scan_time=0, target=""):
                 "duration_seconds": scan_time,
                 "total_findings": len(findings)
             },
+            "statistics": stats or {},
             "findings": findings,
             "summary": {
                 "critical": len([f for f in findings if f.get('severity') == 'critical']),
@@ -143,6 +175,22 @@ def generate_report(findings, output="cli", scan_time=0, target=""):
         else:
             print(f"{Fore.YELLOW}No vulnerabilities found - CSV report not generated{Style.RESET_ALL}")
 
+def print_scan_optimizations(stats):
+    """Print scan statistics such as deduplicated forms and requests saved"""
+    print(f"\n{Fore.BLUE}Scan Optimizations:{Style.RESET_ALL}")
+    for key, value in stats.items():
+        label = STAT_LABELS.get(key, key.replace('_', ' ').capitalize())
+        if isinstance(value, dict):
+            print(f"  {label}:")
+            for name, detail in value.items():
+                if isinstance(detail, dict):
+                    detail = ", ".join(f"{k.replace('_', ' ')} {v}" for k, v in detail.items())
+                print(f"    {name}: {detail}")
+        elif isinstance(value, list):
+            print(f"  {label + ':':<32}{', '.join(str(v) for v in value)}")
+        else:
+            print(f"  {label + ':':<32}{value}")
+
 def print_scan_statistics(findings):
     """Print quick scan statistics"""
     if not findings:
@@ -0,0 +1,214 @@
+import asyncio
+import re
+from functools import lru_cache
+from colorama import Fore, Style
+
+# Service probes (order of trial: see probes_for()). The NULL probe sends
+# nothing and reads the banner a service volunteers on connect. Each match
+# is (service, regex over the response, product, version); product and
+# version may refer to regex groups as $1, $2, ...
+SERVICE_PROBES = [
+    {
+        "name": "NULL",
+        "payload": b"",
+        "ports": (),
+        "matches": [
+            ("ssh", rb"^SSH-([\d.]+)-OpenSSH[_-]([\w.]+)", "OpenSSH", "$2"),
+            ("ssh", rb"^SSH-([\d.]+)-dropbear_([\w.]+)", "Dropbear sshd", "$2"),
+            ("ssh", rb"^SSH-([\d.]+)-", "", ""),
+            ("ftp", rb"^220[ -].*?vsFTPd ([\w.]+)", "vsftpd", "$1"),
+            ("ftp", rb"^220[ -].*?ProFTPD ([\w.]+)", "ProFTPD", "$1"),
+            ("ftp", rb"^220[ -].*?FileZilla Server(?: version)? ([\w.]+)", "FileZilla ftpd", "$1"),
+            ("smtp", rb"^220[ -].*?ESMTP Postfix", "Postfix smtpd", ""),
+            ("smtp", rb"^220[ -].*?ESMTP Exim ([\w.]+)", "Exim smtpd", "$1"),
+            ("smtp", rb"^220[ -][^\r\n]*E?SMTP", "", ""),
+            ("ftp", rb"^220[ -]", "", ""),
+            ("pop3", rb"^\+OK.*?Dovecot", "Dovecot pop3d", ""),
+            ("pop3", rb"^\+OK ", "", ""),
+            ("imap", rb"^\* OK.*?Dovecot", "Dovecot imapd", ""),
+            ("imap", rb"^\* OK ", "", ""),
+            ("mysql", rb"^.\x00\x00\x00\x0a([\d.]+-MariaDB)", "MariaDB", "$1"),
+            ("mysql", rb"^.\x00\x00\x00\x0a(\d[\w.-]*)\x00", "MySQL", "$1"),
+            ("vnc", rb"^RFB (\d{3}\.\d{3})\n", "VNC", "protocol $1"),
+            ("telnet", rb"^\xff[\xfb-\xfe]", "", ""),
+        ],
+    },
+    {
+        "name": "GetRequest",
+        "payload": b"GET / HTTP/1.0\r\n\r\n",
+        "ports": (80, 81, 443, 8000, 8008, 8080, 8081, 8443, 8888, 9000),
+        "matches": [
+            ("http", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: nginx/([\w.]+)", "nginx", "$1"),
+            ("http", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: Apache/([\w.]+)", "Apache httpd", "$1"),
+            ("http", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: Microsoft-IIS/([\w.]+)", "Microsoft IIS httpd", "$1"),
+            ("http", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: ([^\r\n/]+)/?([\w.]*)", "$1", "$2"),
+            ("http", rb"^HTTP/1\.[01] \d{3}", "", ""),
+        ],
+    },
+    {
+        "name": "RedisPing",
+        "payload": b"*1\r\n$4\r\nPING\r\n",
+        "ports": (6379,),
+        "matches": [
+            ("redis", rb"^\+PONG\r\n", "Redis key-value store", ""),
+            ("redis", rb"^-NOAUTH ", "Redis key-value store", ""),
+        ],
+    },
+    {
+        "name": "MemcachedVersion",
+        "payload": b"version\r\n",
+        "ports": (11211,),
+        "matches": [
+            ("memcached", rb"^VERSION ([\w.]+)\r\n", "Memcached", "$1"),
+        ],
+    },
+]
+
+# Seconds to wait for a volunteered banner, and for a reply to a probe
+BANNER_WAIT = 2.0
+PROBE_WAIT = 3.0
+CONNECT_TIMEOUT = 3.0
+
+# Bytes of response kept and matched per probe
+MAX_RESPONSE = 16384
+
+# Banner excerpt reported for services no signature matches
+BANNER_EXCERPT = 80
+
+# Service identification connections open at once
+SERVICE_CONCURRENCY = 64
+
+class ServiceProbe:
+    """A probe with its matches compiled"""
+    __slots__ = ("name", "payload", "ports", "matches")
+
+    def __init__(self, name, payload, ports, matches):
+        self.name = name
+        self.payload = payload
+        self.ports = frozenset(ports)
+        self.matches = [(service, re.compile(pattern, re.DOTALL | re.IGNORECASE), product, version)
+                        for service, pattern, product, version in matches]
+
+    def match(self, response):
+        """First matching signature as (service, product, version), or None"""
+        for service, regex, product, version in self.matches:
+            found = regex.search(response)
+            if found:
+                return service, _expand(product, found), _expand(version, found)
+        return None
+
+def _expand(template, found):
+    """Replace $1, $2, ... by the match's groups"""
+    def group(ref):
+        index = int(ref.group(1))
+        value = found.group(index) if index <= found.re.groups else None
+        return (value or b"").decode("utf-8", "replace")
+    return re.sub(r"\$(\d)", group, template).strip()
+
+@lru_cache(maxsize=1)
+def signature_db():
+    """SERVICE_PROBES compiled once, on first use"""
+    return [ServiceProbe(**probe) for probe in SERVICE_PROBES]
+
+def probes_for(port):
+    """
+    Probes registered for this port first (an HTTP port answers the first
+    request instead of a banner wait), then the NULL probe, then the others
+    """
+    null, *others = signature_db()
+    return [probe for probe in others if port in probe.ports] + [null] + \
+        [probe for probe in others if port not in probe.ports]
+
+def describe(service, product, version):
+    """'service (product version)', the format of scan_ports() results"""
+    if not product:
+        return service
+    return f"{service} ({product}{' ' + version if version else ''})"
+
+async def _exchange(host, port, payload, wait):
+    """Connect, send payload (if any) and read what comes back within `wait` seconds"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), CONNECT_TIMEOUT)
+    response = b""
+    try:
+        if payload:
+            writer.write(payload)
+            await writer.drain()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while len(response) < MAX_RESPONSE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(reader.read(MAX_RESPONSE - len(response)), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            response += chunk
+            # Volunteered banners arrive in one piece; stop at the first line
+            if not payload and b"\n" in response:
+                break
+    finally:
+        writer.close()
+    return response
+
+async def identify(host, port):
+    """
+    Identify the service on an open TCP port
+    Returns:
+        {'service', 'product', 'version', 'banner'} or None if nothing answered
+    """
+    banner = b""
+    for probe in probes_for(port):
+        try:
+            response = await _exchange(host, port, probe.payload, PROBE_WAIT if probe.payload else BANNER_WAIT)
+        except (OSError, asyncio.TimeoutError):
+            continue
+        banner = banner or response
+        matched = probe.match(response) if response else None
+        if matched:
+            service, product, version = matched
+            return {'service': service, 'product': product, 'version': version,
+                    'banner': response[:BANNER_EXCERPT].decode("latin-1").strip()}
+        if response and not probe.payload:
+            break  # An unmatched banner: the service talks first, so it is not one the other probes target
+    if not banner:
+        return None
+    return {'service': 'unknown', 'product': '', 'version': '', 'banner': banner[:BANNER_EXCERPT].decode("latin-1").strip()}
+
+async def _identify_all(open_ports, progress_callback, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(host, port_info):
+        async with slots:
+            try:
+                identified = await identify(host, port_info['port'])
+            except Exception as e:
+                print(f"{Fore.YELLOW}[!] Service detection failed on {host}:{port_info['port']}: {str(e)[:100]}{Style.RESET_ALL}")
+                identified = None
+        if identified:
+            port_info['banner'] = identified['banner']
+            if identified['service'] != 'unknown':
+                port_info['service'] = describe(identified['service'], identified['product'], identified['version'])
+        if progress_callback:
+            progress_callback(1)
+
+    await asyncio.gather(*(one(host, port_info) for host, port_info in open_ports
+                           if port_info.get('protocol', 'tcp') == 'tcp'))
+
+def identify_services(open_ports, progress_callback=None, concurrency=SERVICE_CONCURRENCY):
+    """
+    Probe open ports concurrently and enrich their port dictionaries in
+    place: 'service' becomes "name (product version)" when a signature
+    matches, and 'banner' holds the start of what the service sent.
+    Args:
+        open_ports: List of (host, port_dict) as found by the port scan
+        progress_callback: Optional callback, called with 1 per port identified
+        concurrency: Connections open at once
+    Returns:
+        open_ports
+    """
+    if open_ports:
+        asyncio.run(_identify_all(open_ports, progress_callback, max(1, concurrency)))
+    return open_ports
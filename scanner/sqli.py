@@ -1,8 +1,16 @@
 import requests
-from urllib.parse import urljoin
+import secrets
+import threading
+from functools import partial
 from colorama import Fore, Style
-import re
-import queue
+from scanner.transport import submit
+from scanner.matcher import OrderedMatcher
+from scanner.grouptest import bisect
+from scanner.timing import TimingEngine
+from scanner.differential import test_boolean
+from scanner.dbms import DBMS_REGISTRY
+from scanner.endpoint import EndpointContext, canary_probe
+from scanner.params import ParameterInventory
 
 # SQL injection payloads for different databases
 SQLI_PAYLOADS = [
@@ -21,197 +29,377 @@ SQLI_PAYLOADS = [
     "' UNION SELECT 1,2,3--",
     "' UNION ALL SELECT NULL,NULL,NULL--",
     
-    # Time-based blind tests
-    "'; WAITFOR DELAY '00:00:05'--",
-    "' OR SLEEP(5)--",
-    "'; SELECT pg_sleep(5)--",
-    
-    # Boolean-based blind tests
-    "' AND 1=1--",
-    "' AND 1=2--",
-    "' OR 'a'='a",
-    "' OR 'a'='b",
-    
+    # Time-based blind tests are run separately by scanner/timing.py
+
+    # Boolean-based blind tests are run separately by scanner/differential.py
+
     # Error-based tests
     "' AND (SELECT COUNT(*) FROM information_schema.tables)>0--",
     "' AND EXTRACTVALUE(1, CONCAT(0x7e, (SELECT version()), 0x7e))--",
 ]
 
-# SQL error signatures for different databases
-SQL_ERRORS = [
-    # MySQL
-    "mysql_fetch_array", "mysql_num_rows", "mysql_fetch_assoc",
-    "mysql_fetch_row", "mysql_connect", "mysql_result",
-    "You have an error in your SQL syntax",
-    "mysql server version for the right syntax",
-    
-    # PostgreSQL
-    "pg_query", "pg_fetch_array", "pg_num_rows", "pg_connect",
-    "PostgreSQL query failed", "supplied argument is not a valid PostgreSQL result",
-    "syntax error at or near",
-    
-    # MSSQL
-    "mssql_query", "mssql_fetch_array", "mssql_num_rows",
-    "Microsoft OLE DB Provider", "ODBC Microsoft Access Driver",
-    "Unclosed quotation mark", "Incorrect syntax near",
-    
-    # Oracle
-    "ociexecute", "ocifetchstatement", "ora_fetch_into",
-    "ORA-00933", "ORA-00921", "ORA-00936",
-    
-    # SQLite
-    "sqlite_query", "sqlite_fetch_array", "sqlite_num_rows",
-    "SQLite/JDBCDriver", "System.Data.SQLite.SQLiteException",
-    
-    # Generic SQL errors
-    "SQL syntax", "database error", "warning: mysql",
-    "valid MySQL result", "MySqlClient", "ORA-01756"
-]
+# Payloads that only parse on some backends; untagged payloads are generic
+PAYLOAD_DBMS = {
+    "' OR 1=1#": ("mysql",),
+    "admin'#": ("mysql",),
+    "' AND (SELECT COUNT(*) FROM information_schema.tables)>0--": ("mysql", "postgresql", "mssql"),
+    "' AND EXTRACTVALUE(1, CONCAT(0x7e, (SELECT version()), 0x7e))--": ("mysql",),
+}
+
+# SQL error signatures for different databases, keyed by backend
+SQL_ERRORS_BY_DBMS = {
+    "mysql": [
+        "mysql_fetch_array", "mysql_num_rows", "mysql_fetch_assoc",
+        "mysql_fetch_row", "mysql_connect", "mysql_result",
+        "You have an error in your SQL syntax",
+        "mysql server version for the right syntax",
+        "warning: mysql", "valid MySQL result", "MySqlClient",
+    ],
+    "postgresql": [
+        "pg_query", "pg_fetch_array", "pg_num_rows", "pg_connect",
+        "PostgreSQL query failed", "supplied argument is not a valid PostgreSQL result",
+        "syntax error at or near",
+    ],
+    "mssql": [
+        "mssql_query", "mssql_fetch_array", "mssql_num_rows",
+        "Microsoft OLE DB Provider", "ODBC Microsoft Access Driver",
+        "Unclosed quotation mark", "Incorrect syntax near",
+    ],
+    "oracle": [
+        "ociexecute", "ocifetchstatement", "ora_fetch_into",
+        "ORA-00933", "ORA-00921", "ORA-00936", "ORA-01756",
+    ],
+    "sqlite": [
+        "sqlite_query", "sqlite_fetch_array", "sqlite_num_rows",
+        "SQLite/JDBCDriver", "System.Data.SQLite.SQLiteException",
+    ],
+    # Generic SQL errors; they do not identify the backend
+    None: [
+        "SQL syntax", "database error",
+    ],
+}
+
+SQL_ERRORS = [error for errors in SQL_ERRORS_BY_DBMS.values() for error in errors]
+
+# Backend identified by each error signature
+ERROR_DBMS = {error: dbms for dbms, errors in SQL_ERRORS_BY_DBMS.items() for error in errors}
+
+# Case-insensitive, checked in list order with an early exit; a short table
+# of substrings beats the trie here (see benchmarks/bench_matcher.py)
+SQL_ERROR_MATCHER = OrderedMatcher(SQL_ERRORS)
+
+REQUEST_TIMEOUT = 15
+
+# Bytes around an SQL error searched for the marker of the field that caused it
+MARKER_WINDOW = 512
+
+# Trailing comment tokens; a marker after them must be separated by a space
+COMMENT_TOKENS = ("--", "#", "/*")
+
+def make_marker():
+    """Unique alphanumeric marker that survives quoting and escaping"""
+    return "vsq" + secrets.token_hex(4)
+
+def traceable(payload, marker):
+    """
+    Append a per-field marker to a payload. Databases quote the query text
+    from the point of failure onwards, so a trailing marker is what shows
+    up in the error message. After a trailing comment the marker goes
+    inside the comment, leaving the payload's SQL unchanged.
+    """
+    if payload.endswith(COMMENT_TOKENS):
+        return payload + " " + marker
+    return payload + marker
+
+def detect(response):
+    """
+    Check a response for an SQL error signature
+    Returns:
+        ("Error-based SQLi", error_signature, (start, end)) or None
+    """
+    located = SQL_ERROR_MATCHER.locate(response.content)
+    if located:
+        return "Error-based SQLi", located[0], located[1:]
+    return None
+
+def attribute_error(body, markers, span):
+    """Return the fields whose marker appears within MARKER_WINDOW bytes of the error"""
+    nearby = body[max(0, span[0] - MARKER_WINDOW):span[1] + MARKER_WINDOW]
+    return [field_name for field_name, marker in markers.items() if marker.encode() in nearby]
+
+def probe_group(action, method, inputs, payload, field_names):
+    """
+    Send a payload to a group of fields, the other fields keeping their defaults
+    Returns:
+        (subtype, error_signature) or None
+    """
+    test_inputs = inputs.copy()
+    for field_name in field_names:
+        test_inputs[field_name] = payload
+    response = submit(action, method, test_inputs, timeout=REQUEST_TIMEOUT)
+    signal = detect(response)
+    return signal[:2] if signal else None
+
+def localize(action, method, inputs, payload, field_names, signal):
+    """
+    Narrow a combined signal down to the field(s) responsible by group
+    testing (see grouptest.bisect). Fields not cleared on the way are then
+    re-probed together, as another may also be vulnerable.
+    Returns:
+        {field_name: (subtype, error_signature, value_sent)}
+    """
+    probe = lambda group: probe_group(action, method, inputs, payload, group)
+    field_name, signal, cleared = bisect(field_names, signal, probe)
+    rest = [name for name in field_names if name != field_name and name not in cleared]
+    found = probe_payload(action, method, inputs, payload, rest) if rest else {}
+    found[field_name] = signal + (payload,)
+    return found
+
+def probe_payload(action, method, inputs, payload, field_names):
+    """
+    Send one payload to several fields in a single request, each copy tagged
+    with its own marker. A clean response clears every field at once; an SQL
+    error is attributed through the marker the database quotes back. When
+    the error quotes no marker, the fields are bisected with localize().
+    Returns:
+        {field_name: (subtype, error_signature, value_sent)}
+    """
+    if len(field_names) == 1:
+        signal = probe_group(action, method, inputs, payload, field_names)
+        return {field_names[0]: signal + (payload,)} if signal else {}
+
+    markers = {field_name: make_marker() for field_name in field_names}
+    sent = {field_name: traceable(payload, marker) for field_name, marker in markers.items()}
+    test_inputs = inputs.copy()
+    test_inputs.update(sent)
+    response = submit(action, method, test_inputs, timeout=REQUEST_TIMEOUT)
+    signal = detect(response)
+    if signal is None:
+        return {}
+
+    subtype, error_signature, span = signal
+    owners = attribute_error(response.content, markers, span)
+    if len(owners) == 1:
+        # An error masks any other vulnerable field; re-probe the rest
+        field_name = owners[0]
+        rest = [name for name in field_names if name != field_name]
+        found = probe_payload(action, method, inputs, payload, rest)
+        found[field_name] = (subtype, error_signature, sent[field_name])
+        return found
+
+    # Ambiguous: narrow the combined signal down by group testing
+    return localize(action, method, inputs, payload, field_names, (subtype, error_signature))
+
+class SQLiFormTest:
+    """
+    One form under SQLi test: the fields still untested and the requests
+    skipped by backend pruning. Error-based payloads can be tried in any
+    order or from several threads; the baseline and the canary pre-probe
+    are shared with other detectors through the EndpointContext. See
+    test_sqli() and SQLiDetector.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.url = context.url
+        self.action = context.action
+        self.method = context.method
+        self.inputs = context.inputs
+        self.field_names = list(self.inputs)
+        self.saved = 0
+        self.lock = threading.Lock()
+
+    def finding(self, field_name, vuln_type, error_signature, value):
+        return {
+            "type": "SQL Injection",
+            "subtype": vuln_type,
+            "url": self.url,
+            "details": f"Possible {vuln_type} in field '{field_name}' at {self.action}",
+            "payload": value,
+            "method": self.method.upper(),
+            "error_signature": error_signature,
+            "severity": "critical"
+        }
+
+    def _claim(self, found):
+        """Drop newly found fields from the untested ones and build their findings"""
+        findings = []
+        with self.lock:
+            for field_name, (vuln_type, evidence, value) in found.items():
+                if field_name not in self.field_names:
+                    continue  # Already reported by another payload
+                self.field_names.remove(field_name)
+                findings.append((field_name, self.finding(field_name, vuln_type, evidence, value)))
+        return findings
+
+    def test_pre_probe(self):
+        """
+        Check the responses of the shared canary pre-probe for SQL errors: its
+        quotes break an injectable query, and the canary quoted back in the
+        error names the field. Sends no request of its own.
+        Returns:
+            List of (field_name, finding)
+        """
+        found = {}
+        for canaries, response in self.context.probe_responses():
+            signal = detect(response)
+            if signal is None:
+                continue
+            subtype, error_signature, span = signal
+            # The query text is quoted from the failing quote on, so the reversed canary shows up
+            owners = list(canaries) if len(canaries) == 1 else \
+                attribute_error(response.content, {name: canary[::-1] for name, canary in canaries.items()}, span)
+            if len(owners) == 1:
+                found[owners[0]] = (subtype, error_signature, canary_probe(canaries[owners[0]]))
+        for vuln_type, error_signature, value in found.values():
+            DBMS_REGISTRY.identify(self.action, ERROR_DBMS.get(error_signature))
+        return self._claim(found)
+
+    def test_payload(self, payload, quiet=False):
+        """
+        Send one error-based payload to every untested field
+        Returns:
+            List of (field_name, finding)
+        """
+        with self.lock:
+            field_names = list(self.field_names)
+        if not field_names:
+            return []
+        # Skip payloads written for another backend than the one identified
+        if not DBMS_REGISTRY.allows(self.action, PAYLOAD_DBMS.get(payload)):
+            DBMS_REGISTRY.record_saved(self.action)
+            with self.lock:
+                self.saved += 1
+            return []
+
+        try:
+            found = probe_payload(self.action, self.method, self.inputs, payload, field_names)
+        except requests.exceptions.Timeout:
+            if not quiet:
+                print(f"{Fore.YELLOW}[!] Timeout testing SQLi on {self.action}{Style.RESET_ALL}")
+            return []
+        except requests.exceptions.RequestException:
+            return []  # Continue with next test
+
+        for vuln_type, error_signature, value in found.values():
+            DBMS_REGISTRY.identify(self.action, ERROR_DBMS.get(error_signature))
+        return self._claim(found)
+
+    def test_boolean(self):
+        """Compare true/false pairs on the untested fields; returns a list of (field_name, finding)"""
+        with self.lock:
+            field_names = list(self.field_names)
+        if not field_names:
+            return []
+        try:
+            found = test_boolean(self.action, self.method, self.inputs, field_names,
+                                 baseline=self.context.baseline()[0])
+        except requests.exceptions.RequestException:
+            return []
+        return self._claim(found)
+
+    def test_timing(self, engine):
+        """Run the timing engine on the untested fields in this thread; returns a list of (field_name, finding)"""
+        with self.lock:
+            field_names = list(self.field_names)
+        if not field_names:
+            return []
+        try:
+            samples = [self.context.baseline()[1]]
+        except requests.exceptions.RequestException:
+            samples = []
+        return self._claim(engine.test_endpoint(self.action, self.method, self.inputs, field_names, samples))
 
 def test_sqli(links, forms, progress_callback=None, finding_callback=None):
     """
-    Test forms for SQL injection vulnerabilities
+    Test forms for SQL injection vulnerabilities. Each payload is sent once
+    per form to all untested fields, with per-field markers to attribute
+    errors; see probe_payload(). Once an error identifies the backend,
+    payloads for other backends are skipped on the endpoint and its host
+    (see DBMS_REGISTRY). Fields without an error-based finding get
+    true/false pairs compared against the endpoint's baseline, then are
+    handed to the TimingEngine, which runs concurrently with the remaining
+    forms.
     Args:
-        links: List of URLs (unused but kept for compatibility)
-        forms: List of (url, form_element) tuples
+        links: List of URLs; links with query parameters are tested as GET
+            endpoints, once per URL pattern (see scanner.params)
+        forms: List of (url, FormSpec) tuples as returned by crawl_site
         progress_callback: Optional callback for progress updates
         finding_callback: Optional callback for reporting findings in real-time
     Returns:
         List of vulnerability findings
     """
     findings = []
-    
+    timing = TimingEngine()
+    pending = []
+    saved = 0
+
+    def record(url, results):
+        for field_name, finding in results:
+            # Avoid duplicate findings
+            if not any(f['url'] == finding['url'] and f['details'] == finding['details'] for f in findings):
+                findings.append(finding)
+                if finding_callback:
+                    finding_callback(finding)
+                else:
+                    print(f"{Fore.RED}[!] SQLi Found: {url} - Field: {field_name} - Type: {finding['subtype']}{Style.RESET_ALL}")
+
+    forms = list(forms) + ParameterInventory(links).endpoints()
     for url, form in forms:
         try:
-            # Get form action and method
-            action = form.get("action")
-            if action:
-                action = urljoin(url, action)
-            else:
-                action = url
-                
-            method = form.get("method", "get").lower()
-            
-            # Get all input fields
-            inputs = {}
-            for input_field in form.find_all(["input", "textarea", "select"]):
-                name = input_field.get("name")
-                if name:
-                    field_type = input_field.get("type", "text")
-                    
-                    # Skip certain input types
-                    if field_type.lower() in ["submit", "button", "reset", "file", "image"]:
-                        continue
-                        
-                    # Use appropriate default values
-                    if field_type.lower() == "email":
-                        inputs[name] = "test@example.com"
-                    elif field_type.lower() == "password":
-                        inputs[name] = "password123"
-                    elif field_type.lower() == "number":
-                        inputs[name] = "123"
-                    else:
-                        inputs[name] = "test_value"
-            
-            if not inputs:
+            test = SQLiFormTest(EndpointContext(url, form))
+            if not test.inputs:
                 continue
 
-            # Test each payload
             for payload in SQLI_PAYLOADS:
-                test_inputs = inputs.copy()
-                
-                # Inject payload into each field
-                for field_name in test_inputs:
-                    test_inputs[field_name] = payload
-                    
-                    try:
-                        session = requests.Session()
-                        session.headers.update({
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                        })
-                        
-                        if method == "post":
-                            response = session.post(action, data=test_inputs, timeout=15, allow_redirects=True)
-                        else:
-                            response = session.get(action, params=test_inputs, timeout=15, allow_redirects=True)
-                        
-                        response_text = response.text.lower()
-                        
-                        # Check for SQL error signatures
-                        sql_error_found = False
-                        detected_error = ""
-                        
-                        for error_sig in SQL_ERRORS:
-                            if error_sig.lower() in response_text:
-                                sql_error_found = True
-                                detected_error = error_sig
-                                break
-                        
-                        # Also check for time-based SQLi (basic detection)
-                        time_based_indicators = ["sleep", "waitfor", "pg_sleep"]
-                        is_time_based = any(indicator in payload.lower() for indicator in time_based_indicators)
-                        
-                        if sql_error_found or (is_time_based and response.elapsed.total_seconds() > 4):
-                            vuln_type = "Time-based SQLi" if is_time_based else "Error-based SQLi"
-                            
-                            finding = {
-                                "type": "SQL Injection",
-                                "subtype": vuln_type,
-                                "url": url,
-                                "details": f"Possible {vuln_type} in field '{field_name}' at {action}",
-                                "payload": payload,
-                                "method": method.upper(),
-                                "error_signature": detected_error if detected_error else "Time delay detected",
-                                "severity": "critical"
-                            }
-                            
-                            # Avoid duplicate findings
-                            if not any(f['url'] == finding['url'] and f['details'] == finding['details'] for f in findings):
-                                findings.append(finding)
-                                if finding_callback:
-                                    finding_callback(finding)
-                                else:
-                                    print(f"{Fore.RED}[!] SQLi Found: {url} - Field: {field_name} - Type: {vuln_type}{Style.RESET_ALL}")
-                            break  # Found SQLi in this field, try next field
-                            
-                    except requests.exceptions.Timeout:
-                        # Timeout might indicate time-based SQLi
-                        if any(indicator in payload.lower() for indicator in ["sleep", "waitfor", "pg_sleep"]):
-                            finding = {
-                                "type": "SQL Injection",
-                                "subtype": "Time-based SQLi (Timeout)",
-                                "url": url,
-                                "details": f"Possible time-based SQLi in field '{field_name}' at {action} (timeout)",
-                                "payload": payload,
-                                "method": method.upper(),
-                                "error_signature": "Request timeout",
-                                "severity": "critical"
-                            }
-                            
-                            if not any(f['url'] == finding['url'] and f['details'] == finding['details'] for f in findings):
-                                findings.append(finding)
-                                if finding_callback:
-                                    finding_callback(finding)
-                                else:
-                                    print(f"{Fore.RED}[!] SQLi Found (Timeout): {url} - Field: {field_name}{Style.RESET_ALL}")
-                        
-                        if not finding_callback:
-                            print(f"{Fore.YELLOW}[!] Timeout testing SQLi on {action}{Style.RESET_ALL}")
-                    except requests.exceptions.RequestException:
-                        pass  # Continue with next test
-                    except queue.Empty:
-                        pass  # Continue with next test
-                    except Exception as e:
-                        logger.warning(f"SQLi test failed: {e}")
-                        return []
-                    
-                    # Reset for next field test  
-                    test_inputs[field_name] = inputs[field_name]
-                    
+                record(url, test.test_payload(payload, quiet=bool(finding_callback)))
+            record(url, test.test_boolean())
+            saved += test.saved
+
+            if test.field_names:
+                samples = [test.context.baseline()[1]]
+                pending.append((url, test, timing.submit(test.action, test.method, test.inputs, list(test.field_names), samples)))
+
         except Exception as e:
             print(f"{Fore.YELLOW}[!] Error testing SQLi on {url}: {str(e)[:100]}{Style.RESET_ALL}")
-            
+
         if progress_callback:
             progress_callback()
-    
-    return findings
\ No newline at end of file
+
+    for url, test, future in pending:
+        try:
+            record(url, test._claim(future.result()))
+        except Exception as e:
+            print(f"{Fore.YELLOW}[!] Error testing time-based SQLi on {url}: {str(e)[:100]}{Style.RESET_ALL}")
+    timing.shutdown()
+
+    saved += timing.saved
+    if saved and not finding_callback:
+        print(f"{Fore.BLUE}[i] Skipped {saved} SQLi requests for other database backends{Style.RESET_ALL}")
+
+    return findings
+
+class SQLiDetector:
+    """
+    SQLi as a detector for scanner.endpoint.schedule_endpoint(): the pre-probe
+    check and one probe per error-based payload, then the boolean-blind and
+    time-based passes on the fields still untested. Follows the host's
+    ScanPlan for the order (and pruning) of the payload families.
+    """
+    name = "sqli"
+
+    # Fewest requests per form: one per error-based payload and a boolean true/false pair
+    min_requests = len(SQLI_PAYLOADS) + 2
+
+    def __init__(self, engine):
+        # TimingEngine shared by all forms (for its latency baselines)
+        self.engine = engine
+
+    def probes(self, context):
+        test = context.state[self.name] = SQLiFormTest(context)
+        payloads = context.plan.order_payloads(SQLI_PAYLOADS, PAYLOAD_DBMS) if context.plan else SQLI_PAYLOADS
+        return [test.test_pre_probe] + [partial(test.test_payload, payload, True) for payload in payloads]
+
+    def follow_up(self, context):
+        test = context.state[self.name]
+        return [lambda: test.test_boolean() + test.test_timing(self.engine)]
@@ -0,0 +1,187 @@
+import math
+import statistics
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from scanner.transport import submit
+from scanner.grouptest import bisect
+from scanner.dbms import DBMS_REGISTRY
+
+# Time-based blind payloads per DBMS; {delay} is filled in per endpoint
+TIME_PAYLOAD_TEMPLATES = {
+    "mssql": "'; WAITFOR DELAY '0:0:{delay}'--",
+    "mysql": "' OR SLEEP({delay})--",
+    "postgresql": "'; SELECT pg_sleep({delay})--",
+}
+
+# Requests with default inputs used to learn an endpoint's normal latency
+BASELINE_SAMPLES = 5
+
+# Injected delay bounds in seconds; the delay is scaled to the baseline jitter
+MIN_DELAY = 1
+MAX_DELAY = 2
+NOISE_FACTOR = 6
+
+# A response counts as delayed when it is this fraction of the delay slower than normal
+DELAY_FRACTION = 0.8
+
+# Delayed/zero-delay probe pairs sent to confirm a candidate field
+CONFIRM_ROUNDS = 3
+
+# Minimum Welch t statistic between delayed and zero-delay probes
+T_CRITICAL = 5.0
+
+# Endpoints probed at the same time; probes on one endpoint stay sequential
+TIMING_CONCURRENCY = 8
+
+def render(template, delay):
+    return template.format(delay=f"{delay:g}")
+
+def welch_t(sample, other):
+    """Welch's t statistic for mean(sample) > mean(other)"""
+    variance = statistics.variance(sample) / len(sample) + statistics.variance(other) / len(other)
+    difference = statistics.mean(sample) - statistics.mean(other)
+    if variance == 0:
+        return math.inf if difference > 0 else 0.0
+    return difference / math.sqrt(variance)
+
+class Baseline:
+    """Latency distribution of an endpoint answering its default inputs"""
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.mean = statistics.mean(samples)
+        self.stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+        self.maximum = max(samples)
+
+    def delay(self):
+        """Shortest whole-second delay that stands well clear of the jitter"""
+        return min(MAX_DELAY, max(MIN_DELAY, math.ceil(NOISE_FACTOR * self.stdev)))
+
+    def timeout(self, delay):
+        """Request timeout for a probe; generous enough for several fields sleeping at once"""
+        return self.maximum + 3 * delay + 1
+
+class TimingEngine:
+    """
+    Time-based blind SQLi detection. Each endpoint gets a measured latency
+    baseline and a short delay scaled to its jitter. A payload is sent to
+    all fields at once, a delayed response is bisected down to one field,
+    and the field is only reported after repeated delayed and zero-delay
+    probes differ significantly. Endpoints are probed concurrently, so
+    the wall time is not the sum of the sleeps.
+    """
+
+    def __init__(self, concurrency=TIMING_CONCURRENCY):
+        self.baselines = {}
+        self.lock = threading.Lock()
+        self.concurrency = concurrency
+        self.executor = None
+        self.saved = 0
+
+    def timed(self, action, method, inputs, timeout=None):
+        """Submit inputs and return the response time in seconds (the timeout if reached)"""
+        start = time.perf_counter()
+        try:
+            submit(action, method, inputs, timeout=timeout)
+        except requests.exceptions.Timeout:
+            return timeout
+        return time.perf_counter() - start
+
+    def baseline(self, action, method, inputs, samples=()):
+        """
+        Measure an endpoint's latency once and cache it
+        Args:
+            samples: Response times already measured with the default inputs
+        """
+        key = (action, method)
+        with self.lock:
+            if key in self.baselines:
+                return self.baselines[key]
+        samples = list(samples)[:BASELINE_SAMPLES]
+        samples += [self.timed(action, method, inputs) for _ in range(BASELINE_SAMPLES - len(samples))]
+        baseline = Baseline(samples)
+        with self.lock:
+            return self.baselines.setdefault(key, baseline)
+
+    def test_endpoint(self, action, method, inputs, field_names, samples=()):
+        """
+        Args:
+            action, method: The form endpoint
+            inputs: Default field values
+            field_names: Fields to test
+            samples: Baseline response times already measured (see baseline())
+        Returns:
+            {field_name: ("Time-based SQLi", evidence, payload)}
+        """
+        baseline = self.baseline(action, method, inputs, samples)
+        delay = baseline.delay()
+        timeout = baseline.timeout(delay)
+        found = {}
+
+        def elapsed(group, payload):
+            test_inputs = inputs.copy()
+            for field_name in group:
+                test_inputs[field_name] = payload
+            return self.timed(action, method, test_inputs, timeout)
+
+        # Fields slow on any quote, whatever the delay, cannot be timed
+        noisy = set()
+
+        for dbms, template in TIME_PAYLOAD_TEMPLATES.items():
+            # Templates for another backend than the identified one cannot fire
+            if not DBMS_REGISTRY.allows(action, (dbms,)):
+                DBMS_REGISTRY.record_saved(action)
+                with self.lock:
+                    self.saved += 1
+                continue
+            payload = render(template, delay)
+            control = render(template, 0)
+
+            def slow(seconds):
+                return seconds - baseline.mean >= DELAY_FRACTION * delay
+
+            def probe(group):
+                seconds = elapsed(group, payload)
+                return seconds if slow(seconds) else None
+
+            remaining = [name for name in field_names if name not in found and name not in noisy]
+            while remaining:
+                signal = probe(remaining)
+                if signal is None:
+                    break
+                field_name, _, cleared = bisect(remaining, signal, probe)
+                remaining = [name for name in remaining if name != field_name and name not in cleared]
+
+                # Zero-delay control first, so a field that is simply slow is dropped after one request
+                delayed, controls = [], []
+                for _ in range(CONFIRM_ROUNDS):
+                    controls.append(elapsed([field_name], control))
+                    if slow(controls[-1]):
+                        noisy.add(field_name)
+                        break
+                    delayed.append(elapsed([field_name], payload))
+                    if not slow(delayed[-1]):
+                        break
+                else:
+                    t = welch_t(delayed, controls)
+                    if statistics.mean(delayed) - statistics.mean(controls) >= DELAY_FRACTION * delay and t >= T_CRITICAL:
+                        DBMS_REGISTRY.identify(action, dbms)
+                        found[field_name] = (
+                            "Time-based SQLi",
+                            f"{dbms} delay of {delay:g}s confirmed over {CONFIRM_ROUNDS} probes (t={t:.1f})",
+                            payload,
+                        )
+        return found
+
+    def submit(self, action, method, inputs, field_names, samples=()):
+        """Queue test_endpoint() on the worker pool and return its Future"""
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        return self.executor.submit(self.test_endpoint, action, method, inputs, field_names, samples)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
@@ -0,0 +1,148 @@
+import os
+import threading
+import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Settings come from the environment (see config/production.env)
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+USER_AGENT = os.environ.get('SCANNER_USER_AGENT', DEFAULT_USER_AGENT)
+POOL_SIZE = int(os.environ.get('SCANNER_CONNECTION_POOL_SIZE', 20))
+REQUEST_TIMEOUT = float(os.environ.get('SCANNER_REQUEST_TIMEOUT', 10))
+
+class ConnectionStats:
+    """Thread-safe per-host counters of requests sent and TCP connections opened"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def _host(self, host):
+        return self.hosts.setdefault(host, {'requests': 0, 'connections': 0})
+
+    def record_request(self, host):
+        with self.lock:
+            self._host(host)['requests'] += 1
+
+    def record_connection(self, host):
+        with self.lock:
+            self._host(host)['connections'] += 1
+
+    def snapshot(self):
+        """
+        Returns:
+            {host: {'requests', 'new_connections', 'reused_connections', 'reuse_rate'}}
+        """
+        with self.lock:
+            report = {}
+            for host, counts in self.hosts.items():
+                reused = max(0, counts['requests'] - counts['connections'])
+                report[host] = {
+                    'requests': counts['requests'],
+                    'new_connections': counts['connections'],
+                    'reused_connections': reused,
+                    'reuse_rate': f"{reused / counts['requests'] * 100:.1f}%" if counts['requests'] else "0.0%",
+                }
+            return report
+
+    def reset(self):
+        with self.lock:
+            self.hosts.clear()
+
+CONNECTION_STATS = ConnectionStats()
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        CONNECTION_STATS.record_connection(f"{self.host}:{self.port}")
+        return super()._new_conn()
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        CONNECTION_STATS.record_connection(f"{self.host}:{self.port}")
+        return super()._new_conn()
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with keep-alive pools sized from SCANNER_CONNECTION_POOL_SIZE,
+    a default timeout for calls that do not pass one, and connection
+    accounting for the reuse statistics.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, timeout=REQUEST_TIMEOUT):
+        self.default_timeout = timeout
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        parsed = urlparse(request.url)
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        CONNECTION_STATS.record_request(f"{parsed.hostname}:{port}")
+        return super().send(request, timeout=timeout if timeout is not None else self.default_timeout, **kwargs)
+
+_session = None
+_session_lock = threading.Lock()
+
+def create_session(pool_size=POOL_SIZE, timeout=REQUEST_TIMEOUT, user_agent=USER_AGENT, adapter=None, cookies=True):
+    """
+    Build a requests.Session mounted on a PooledAdapter
+    Args:
+        adapter: PooledAdapter to share with another session (default: a new one)
+        cookies: If False, Set-Cookie headers are ignored and no request carries cookies
+    """
+    session = requests.Session()
+    session.headers.update({'User-Agent': user_agent})
+    if not cookies:
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = adapter or PooledAdapter(pool_size=pool_size, timeout=timeout)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_session():
+    """
+    Return the process-wide shared session. All scanner modules send their
+    traffic through it so connections are kept alive (HTTP keep-alive) and
+    reused across the crawler and every testing module. It keeps no cookies:
+    each probe goes out as a fresh, cookie-less request.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session(cookies=False)
+    return _session
+
+def crawl_session():
+    """
+    A new session with its own cookie jar for one crawl, sharing the
+    shared session's connection pools
+    """
+    return create_session(adapter=get_session().get_adapter('http://'))
+
+def submit(action, method, data, **kwargs):
+    """
+    Submit form data through the shared session
+    Args:
+        action: Form action URL
+        method: "get" or "post"
+        data: Dict of field values (query string for GET, body for POST)
+        **kwargs: Passed to requests (timeout, allow_redirects, ...)
+    Returns:
+        requests.Response
+    """
+    kwargs.setdefault('allow_redirects', True)
+    if method == "post":
+        return get_session().post(action, data=data, **kwargs)
+    return get_session().get(action, params=data, **kwargs)
+
+def connection_stats():
+    """Per-host connection reuse statistics for the report"""
+    return CONNECTION_STATS.snapshot()
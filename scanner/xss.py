@@ -1,6 +1,11 @@
+import threading
 import requests
-from urllib.parse import urljoin
+from functools import partial
 from colorama import Fore, Style
+from scanner.transport import submit
+from scanner.matcher import SignatureMatcher
+from scanner.endpoint import EndpointContext, PROBE_CHARS, make_canary
+from scanner.params import ParameterInventory
 
 # Multiple XSS payloads for better detection
 XSS_PAYLOADS = [
@@ -16,107 +21,188 @@ XSS_PAYLOADS = [
     "<div onmouseover=\"alert('xss')\">test</div>"
 ]
 
+# Payload reflection detection, compiled once
+XSS_MATCHER = SignatureMatcher(XSS_PAYLOADS)
+
+# Reflection contexts in which each payload can execute
+PAYLOAD_CONTEXTS = {
+    "<script>alert('xss')</script>": ("html",),
+    "<img src=x onerror=alert('xss')>": ("html",),
+    "<svg onload=alert('xss')>": ("html",),
+    "javascript:alert('xss')": ("url",),
+    "<iframe src=javascript:alert('xss')>": ("html",),
+    "';alert('xss');//": ("script",),
+    "\"><script>alert('xss')</script>": ("html", "attribute", "url"),
+    "<script>alert(String.fromCharCode(88,83,83))</script>": ("html",),
+    "<img src=\"javascript:alert('xss')\">": ("html",),
+    "<div onmouseover=\"alert('xss')\">test</div>": ("html",),
+}
+
+def payloads_for(contexts):
+    """
+    Return the payloads that fit a field's reflections, in XSS_PAYLOADS order:
+    the payload must target one of the contexts, and every metacharacter it
+    uses must survive unencoded there
+    """
+    selected = []
+    for payload in XSS_PAYLOADS:
+        required = {char for char in PROBE_CHARS if char in payload}
+        if any(required <= contexts[context] for context in PAYLOAD_CONTEXTS[payload] if context in contexts):
+            selected.append(payload)
+    return selected
+
+def traceable(payload, marker):
+    """Tag a payload with a per-field marker without changing how it executes"""
+    if payload.startswith("javascript:"):
+        return payload + "//" + marker
+    return payload + marker
+
+def probe_payload(action, method, inputs, payload, field_names):
+    """
+    Send one payload to several fields in a single request, each copy tagged
+    with its own marker, and attribute reflections back to fields. Fields
+    that cannot be told apart (markers stripped, or the batch rejected) are
+    re-probed one at a time.
+    Returns:
+        {field_name: value_sent} for fields whose payload is reflected
+    """
+    markers = {field_name: make_canary() for field_name in field_names}
+    sent = {field_name: traceable(payload, marker) for field_name, marker in markers.items()}
+    test_inputs = inputs.copy()
+    test_inputs.update(sent)
+    response = submit(action, method, test_inputs)
+
+    found = SignatureMatcher(list(sent.values()) + [payload]).findall(response.content)
+    reflected = {field_name: value for field_name, value in sent.items() if value in found}
+    if reflected:
+        return reflected
+    if len(field_names) == 1:
+        return {field_names[0]: payload} if payload in found else {}
+    if payload not in found and response.status_code < 400:
+        return {}
+
+    # Ambiguous: fall back to per-field probing for this payload
+    reflected = {}
+    for field_name in field_names:
+        test_inputs = inputs.copy()
+        test_inputs[field_name] = payload
+        response = submit(action, method, test_inputs)
+        if payload in XSS_MATCHER.findall(response.content):
+            reflected[field_name] = payload
+    return reflected
+
+class XSSFormTest:
+    """
+    One form under XSS test. Holds which fields are still untested, so
+    payloads can be tried in any order or from several threads; the canary
+    pre-probe is shared with other detectors through the EndpointContext.
+    See test_xss() and XSSDetector.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.url = context.url
+        self.action = context.action
+        self.method = context.method
+        self.inputs = context.inputs
+        self.reflections = {}
+        self.candidates = {}
+        self.lock = threading.Lock()
+
+    def discover(self):
+        """Run (or reuse) the canary pre-probe and pick the payloads that fit each reflecting field"""
+        self.reflections = self.context.discover()
+        self.candidates = {field_name: payloads_for(contexts) for field_name, contexts in self.reflections.items()}
+
+    def payloads(self):
+        """Payloads that fit at least one reflecting field, in XSS_PAYLOADS order"""
+        return [payload for payload in XSS_PAYLOADS if any(payload in payloads for payloads in self.candidates.values())]
+
+    def test_payload(self, payload):
+        """
+        Send one payload to every untested field it fits
+        Returns:
+            List of (field_name, finding); a field is dropped once found vulnerable
+        """
+        with self.lock:
+            field_names = [name for name, payloads in self.candidates.items() if payload in payloads]
+        if not field_names:
+            return []
+
+        try:
+            reflected = probe_payload(self.action, self.method, self.inputs, payload, field_names)
+        except requests.exceptions.Timeout:
+            print(f"{Fore.YELLOW}[!] Timeout testing XSS on {self.action}{Style.RESET_ALL}")
+            return []
+        except requests.exceptions.RequestException:
+            return []  # Continue with next test
+
+        findings = []
+        with self.lock:
+            for field_name, value in reflected.items():
+                if self.candidates.pop(field_name, None) is None:
+                    continue  # Already reported by another payload
+                findings.append((field_name, {
+                    "type": "XSS",
+                    "url": self.url,
+                    "details": f"Possible XSS in field '{field_name}' at {self.action}",
+                    "payload": value,
+                    "method": self.method.upper(),
+                    "context": ", ".join(sorted(self.reflections[field_name])),
+                    "severity": "high"
+                }))
+        return findings
+
 def test_xss(links, forms, progress_callback=None, finding_callback=None):
     """
-    Test forms for XSS vulnerabilities
+    Test forms for XSS vulnerabilities. A batched canary pre-probe finds which
+    fields reflect input and in which context; each payload is then sent once
+    per form to every field it fits, with per-field markers to attribute hits.
     Args:
-        links: List of URLs (unused but kept for compatibility)
-        forms: List of (url, form_element) tuples
+        links: List of URLs; links with query parameters are tested as GET
+            endpoints, once per URL pattern (see scanner.params)
+        forms: List of (url, FormSpec) tuples as returned by crawl_site
         progress_callback: Optional callback for progress updates
         finding_callback: Optional callback for reporting findings in real-time
     Returns:
         List of vulnerability findings
     """
     findings = []
-    
+
+    forms = list(forms) + ParameterInventory(links).endpoints()
     for url, form in forms:
         try:
-            # Get form action and method
-            action = form.get("action")
-            if action:
-                action = urljoin(url, action)
-            else:
-                action = url
-                
-            method = form.get("method", "get").lower()
-            
-            # Get all input fields
-            inputs = {}
-            for input_field in form.find_all(["input", "textarea", "select"]):
-                name = input_field.get("name")
-                if name:
-                    field_type = input_field.get("type", "text")
-                    
-                    # Skip certain input types
-                    if field_type.lower() in ["submit", "button", "reset", "file", "image"]:
-                        continue
-                        
-                    # Use appropriate default values
-                    if field_type.lower() == "email":
-                        inputs[name] = "test@example.com"
-                    elif field_type.lower() == "password":
-                        inputs[name] = "password123"
-                    elif field_type.lower() == "number":
-                        inputs[name] = "123"
-                    else:
-                        inputs[name] = "test_value"
-            
-            if not inputs:
+            test = XSSFormTest(EndpointContext(url, form))
+            if not test.inputs:
                 continue
-                
-            # Test each payload
+
+            test.discover()
             for payload in XSS_PAYLOADS:
-                test_inputs = inputs.copy()
-                
-                # Inject payload into each field
-                for field_name in test_inputs:
-                    test_inputs[field_name] = payload
-                    
-                    try:
-                        session = requests.Session()
-                        session.headers.update({
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                        })
-                        
-                        if method == "post":
-                            response = session.post(action, data=test_inputs, timeout=10, allow_redirects=True)
+                for field_name, finding in test.test_payload(payload):
+                    # Avoid duplicate findings
+                    if not any(f['url'] == finding['url'] and f['details'] == finding['details'] for f in findings):
+                        findings.append(finding)
+                        if finding_callback:
+                            finding_callback(finding)
                         else:
-                            response = session.get(action, params=test_inputs, timeout=10, allow_redirects=True)
-                        
-                        # Check if payload is reflected in response
-                        if payload in response.text or payload.lower() in response.text.lower():
-                            finding = {
-                                "type": "XSS",
-                                "url": url,
-                                "details": f"Possible XSS in field '{field_name}' at {action}",
-                                "payload": payload,
-                                "method": method.upper(),
-                                "severity": "high"
-                            }
-                            
-                            # Avoid duplicate findings
-                            if not any(f['url'] == finding['url'] and f['details'] == finding['details'] for f in findings):
-                                findings.append(finding)
-                                if finding_callback:
-                                    finding_callback(finding)
-                                else:
-                                    print(f"{Fore.RED}[!] XSS Found: {url} - Field: {field_name}{Style.RESET_ALL}")
-                            break  # Found XSS in this field, try next field
-                            
-                    except requests.exceptions.Timeout:
-                        print(f"{Fore.YELLOW}[!] Timeout testing XSS on {action}{Style.RESET_ALL}")
-                    except requests.exceptions.RequestException:
-                        pass  # Continue with next test
-                    except Exception:
-                        pass  # Continue with next test
-                    
-                    # Reset for next field test
-                    test_inputs[field_name] = inputs[field_name]
-                    
+                            print(f"{Fore.RED}[!] XSS Found: {url} - Field: {field_name}{Style.RESET_ALL}")
+
         except Exception as e:
             print(f"{Fore.YELLOW}[!] Error testing XSS on {url}: {str(e)[:100]}{Style.RESET_ALL}")
-            
+
         if progress_callback:
             progress_callback()
-    
-    return findings
\ No newline at end of file
+
+    return findings
+
+class XSSDetector:
+    """XSS as a detector for scanner.endpoint.schedule_endpoint(): one probe per fitting payload"""
+    name = "xss"
+
+    def probes(self, context):
+        test = context.state[self.name] = XSSFormTest(context)
+        test.discover()
+        return [partial(test.test_payload, payload) for payload in test.payloads()]
+
+    def follow_up(self, context):
+        return []
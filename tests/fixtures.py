@@ -0,0 +1,154 @@
+"""
+Local HTTP fixture server shared by the tests
+"""
+import json
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+class LocalServer:
+    """
+    Threaded HTTP/1.1 server on 127.0.0.1 driven by an app callable:
+    app(method, path, params, headers) -> (status, body[, extra_headers])
+    where params merges the query string and a urlencoded or JSON POST body.
+    """
+
+    def __init__(self, app):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _handle(self, method):
+                parts = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    body = self.rfile.read(length).decode("utf-8", "replace")
+                    if self.headers.get("Content-Type", "").startswith("application/json"):
+                        params.update(json.loads(body))
+                    else:
+                        params.update({k: v[0] for k, v in parse_qs(body, keep_blank_values=True).items()})
+                server.requests.append((method, parts.path, params))
+                result = server.app(method, parts.path, params, self.headers)
+                status, body = result[0], result[1]
+                extra_headers = result[2] if len(result) > 2 else {}
+                body = body.encode("utf-8") if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header("Content-Type", extra_headers.pop("Content-Type", "text/html; charset=utf-8"))
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in extra_headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self.app = app
+        self.requests = []
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class LocalServerTestCase(unittest.TestCase):
+    """Runs `app` on a LocalServer for the duration of the test class"""
+
+    @staticmethod
+    def app(method, path, params, headers):
+        return 404, ""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer(cls.app).start()
+        cls.base_url = cls.server.url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.requests.clear()
+
+
+class FakeSqlmapAPI:
+    """
+    Stand-in for `sqlmapapi -s`, as a LocalServer app. A task "runs" for
+    `run_time` seconds after its start; targets whose URL contains "slow"
+    never finish, and "vuln" targets report one injectable parameter.
+    Records the most tasks started and not yet deleted at once, and every
+    status poll.
+    """
+
+    def __init__(self, run_time=0.2):
+        self.run_time = run_time
+        self.tasks = {}
+        self.deleted = []
+        self.stopped = []
+        self.polls = []
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def finished(self, task, now):
+        return task["stopped"] or ("slow" not in task["options"]["url"] and now - task["started"] >= self.run_time)
+
+    def __call__(self, method, path, params, headers):
+        parts = path.strip("/").split("/")
+        now = time.monotonic()
+        with self.lock:
+            if path == "/version":
+                return 200, json.dumps({"success": True, "version": "fake"}), {"Content-Type": "application/json"}
+            if parts == ["task", "new"]:
+                taskid = f"{len(self.tasks) + len(self.deleted) + 1:016x}"
+                self.tasks[taskid] = {"options": None, "started": None, "stopped": False}
+                return self.reply(taskid=taskid)
+            task = self.tasks.get(parts[1]) if len(parts) == 3 else None
+            if task is None:
+                return self.reply(success=False, message="Invalid task ID")
+            if parts[0] == "task" and parts[2] == "delete":
+                del self.tasks[parts[1]]
+                self.deleted.append(parts[1])
+                return self.reply()
+            if parts[2] == "start":
+                task["options"], task["started"] = params, now
+                self.max_running = max(self.max_running, sum(1 for other in self.tasks.values() if other["started"]))
+                return self.reply(engineid=len(self.tasks))
+            if parts[2] == "status":
+                self.polls.append((parts[1], now))
+                return self.reply(status="terminated" if self.finished(task, now) else "running", returncode=0)
+            if parts[2] == "stop":
+                task["stopped"] = True
+                self.stopped.append(parts[1])
+                return self.reply()
+            if parts[2] == "data":
+                data = []
+                if "vuln" in task["options"]["url"] and not task["stopped"]:
+                    data.append({"status": 1, "type": 1, "value": [{
+                        "place": "GET", "parameter": "id", "dbms": "MySQL",
+                        "data": {"1": {"title": "AND boolean-based blind - WHERE or HAVING clause",
+                                       "payload": "id=1 AND 4372=4372"}}}]})
+                return self.reply(data=data, error=[])
+        return 404, ""
+
+    @staticmethod
+    def reply(success=True, **fields):
+        return 200, json.dumps(dict(success=success, **fields)), {"Content-Type": "application/json"}
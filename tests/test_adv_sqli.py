@@ -0,0 +1,103 @@
+"""
+Tests for the sqlmap API orchestrator, against a fake sqlmapapi server
+"""
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.adv_sqli import SqlmapOrchestrator, form_targets, run_sqlmap_scans
+from scanner.forms import FormSpec, FormField
+from tests.fixtures import LocalServer, FakeSqlmapAPI
+
+
+class TestSqlmapOrchestrator(unittest.TestCase):
+    """Test concurrency, polling, deadlines and cleanup"""
+
+    def setUp(self):
+        self.api = FakeSqlmapAPI(run_time=0.2)
+        self.server = LocalServer(self.api).start()
+        self.api_url = self.server.url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_concurrency_and_cleanup(self):
+        """Test that tasks run at most `concurrency` at once and all are deleted"""
+        targets = [(n, {"url": f"http://app.test/item?id={n}"}) for n in range(6)]
+        done = []
+        orchestrator = SqlmapOrchestrator(self.api_url, concurrency=2, deadline=5, poll_initial=0.05, poll_max=0.2)
+        tasks = orchestrator.run(targets, done.append)
+
+        self.assertEqual([task.state for task in tasks], ["done"] * 6)
+        self.assertEqual(len(done), 6)
+        self.assertEqual(self.api.max_running, 2)
+        self.assertEqual(self.api.tasks, {})
+        self.assertEqual(len(self.api.deleted), 6)
+        for task in tasks:
+            self.assertLessEqual(task.polls, 4)
+
+        # Polls of one task back off
+        taskid = tasks[0].taskid
+        times = [when for polled, when in self.api.polls if polled == taskid]
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        self.assertEqual(gaps, sorted(gaps))
+
+    def test_deadline(self):
+        """Test that a task past its deadline is stopped and deleted while others finish"""
+        targets = [("slow", {"url": "http://app.test/slow?id=1"}), ("fast", {"url": "http://app.test/vuln?id=1"})]
+        orchestrator = SqlmapOrchestrator(self.api_url, concurrency=2, deadline=0.5, poll_initial=0.05, poll_max=0.2)
+        slow, fast = orchestrator.run(targets)
+        self.assertEqual(slow.state, "timeout")
+        self.assertEqual(fast.state, "done")
+        self.assertEqual(len(fast.data), 1)
+        self.assertEqual(self.api.stopped, [slow.taskid])
+        self.assertEqual(self.api.tasks, {})
+
+    def test_interrupted_sleep_cleans_up(self):
+        """Test that an interrupt while waiting for the next poll still deletes every task"""
+        targets = [(n, {"url": f"http://app.test/slow?id={n}"}) for n in range(3)]
+        orchestrator = SqlmapOrchestrator(self.api_url, concurrency=3, deadline=5, poll_initial=0.05, poll_max=0.2)
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            orchestrator.run(targets, sleep=sleep)
+        self.assertEqual(len(self.api.deleted), 3)
+        self.assertEqual(sorted(self.api.stopped), sorted(self.api.deleted))
+        self.assertEqual(self.api.tasks, {})
+
+    def test_form_findings(self):
+        """Test that forms become sqlmap targets and reported injections become findings"""
+        forms = [
+            ("http://app.test/", FormSpec("http://app.test/vuln?page=2", "get", [FormField("id", value="1")])),
+            ("http://app.test/", FormSpec("http://app.test/login", "post", [FormField("user", value="a")])),
+            ("http://app.test/", FormSpec("http://app.test/empty", "get", [])),
+        ]
+        targets = form_targets(forms)
+        self.assertEqual([options for _, options in targets], [
+            {"url": "http://app.test/vuln?page=2&id=1"},
+            {"url": "http://app.test/login", "data": "user=a", "method": "POST"},
+        ])
+
+        findings = run_sqlmap_scans(forms, concurrency=2, api_url=self.api_url)
+        self.assertEqual(len(findings), 1)
+        self.assertEqual(findings[0]["details"], "sqlmap confirmed SQLi in parameter 'id' (GET) at http://app.test/vuln?page=2")
+        self.assertEqual(findings[0]["dbms"], "MySQL")
+
+    def test_unreachable(self):
+        """Test that a missing API server is reported before any task"""
+        self.server.stop()
+        with self.assertRaises(RuntimeError):
+            run_sqlmap_scans([], api_url=self.api_url)
+        self.server = LocalServer(self.api).start()
+
+
+if __name__ == '__main__':
+    unittest.main()
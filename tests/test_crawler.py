@@ -0,0 +1,222 @@
+"""
+Tests for the crawl engine against a local fixture site
+"""
+import unittest
+import sys
+import os
+import pickle
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.crawler import crawl_site
+from scanner.frontier import URLFrontier, BloomFilter, canonicalize_url
+from scanner.extract import extract_page
+from scanner.forms import FormSpec, FormField
+from scanner.dedup import FormIndex
+from tests.fixtures import LocalServerTestCase
+
+PAGES = {
+    "/": '<a href="/a">A</a><a href="/b">B</a><a href="/style.css">css</a><a href="http://elsewhere.test/">x</a>',
+    "/a": '<form action="/login" method="post"><input name="user"><input type="password" name="pass"></form><a href="/c">C</a>',
+    "/b": '<form action="/search"><input name="q"></form><a href="/a">A</a>',
+    "/c": '<p>No forms here</p>',
+}
+
+
+class TestCrawlSite(LocalServerTestCase):
+    """Test the asyncio crawl engine"""
+
+    @staticmethod
+    def app(method, path, params, headers):
+        if path not in PAGES:
+            return 404, ""
+        return 200, f"<html><body>{PAGES[path]}</body></html>"
+
+    def test_finds_all_forms_and_links(self):
+        """Test that every same-domain page is crawled once"""
+        progress = []
+        links, forms = crawl_site(self.base_url, max_pages=10, progress_callback=progress.append)
+        self.assertEqual(len(forms), 2)
+        self.assertEqual(sorted(url.rsplit("/", 1)[-1] for url, _ in forms), ["a", "b"])
+        self.assertEqual(len(progress), 4)
+        self.assertEqual(len(links), len(set(links)))
+        self.assertFalse(any("elsewhere.test" in link or link.endswith(".css") for link in links))
+        login = next(form for _, form in forms if form.method == "post")
+        self.assertEqual(login.action, self.base_url + "login")
+        self.assertEqual(login.default_inputs(), {"user": "test_value", "pass": "password123"})
+
+    def test_respects_max_pages(self):
+        """Test that concurrent workers never exceed the page budget"""
+        progress = []
+        found = []
+        crawl_site(self.base_url, max_pages=2, progress_callback=progress.append, concurrency=8,
+                   link_callback=lambda page, link: found.append(link))
+        self.assertEqual(len(progress), 2)
+        # Links are reported even once the budget is spent, off-site ones never
+        self.assertIn(self.base_url + "style.css", found)
+        self.assertFalse(any("elsewhere.test" in link for link in found))
+
+
+
+DIRECTORY_PAGES = {
+    "/": '<a href="/docs/">Docs</a><a href="/list?flag">Flagged</a>',
+    "/docs/": '<a href="intro.html">Intro</a>',
+    "/docs/intro.html": '<form action="subscribe"><input name="email"></form>',
+    "/list": '<p>List</p>',
+}
+
+
+class TestCrawlURLs(LocalServerTestCase):
+    """Test that pages are fetched, resolved and reported as linked"""
+
+    @staticmethod
+    def app(method, path, params, headers):
+        if path not in DIRECTORY_PAGES:
+            return 404, ""
+        return 200, f"<html><body>{DIRECTORY_PAGES[path]}</body></html>"
+
+    def test_original_urls_kept(self):
+        """Test that the trailing slash and bare query flags survive canonical dedup"""
+        links, forms = crawl_site(self.base_url, max_pages=10)
+        self.assertIn(self.base_url + "docs/", links)
+        self.assertIn(self.base_url + "list?flag", links)
+        self.assertIn(self.base_url + "docs/intro.html", links)
+        self.assertEqual([form.action for _, form in forms], [self.base_url + "docs/subscribe"])
+        self.assertNotIn("/docs", [path for _, path, _ in self.server.requests])
+
+
+class TestURLFrontier(unittest.TestCase):
+    """Test URL canonicalization and frontier scheduling"""
+
+    def test_canonicalize_url(self):
+        """Test that trivially different spellings share one canonical form"""
+        variants = [
+            "HTTP://Example.com:80/shop/?b=2&a=1#top",
+            "http://example.com/shop?a=1&b=2",
+            "http://example.com/shop/?a=1&b=2",
+        ]
+        self.assertEqual({canonicalize_url(u) for u in variants}, {"http://example.com/shop?a=1&b=2"})
+        self.assertEqual(canonicalize_url("https://example.com"), "https://example.com/")
+        self.assertEqual(canonicalize_url("https://example.com:8443/x"), "https://example.com:8443/x")
+
+    def test_dedup_and_priority(self):
+        """Test that duplicates are dropped and form-like URLs come first"""
+        frontier = URLFrontier()
+        self.assertIsNotNone(frontier.add("http://example.com/about", 1))
+        self.assertIsNone(frontier.add("http://example.com/about/#team", 1))
+        frontier.add("http://example.com/login", 1)
+        frontier.add("http://example.com/item.php?id=1", 1)
+        order = [frontier.pop()[0] for _ in range(len(frontier))]
+        self.assertEqual(order, [
+            "http://example.com/item.php?id=1",
+            "http://example.com/login",
+            "http://example.com/about",
+        ])
+
+    def test_max_size(self):
+        """Test that a full frontier rejects new URLs without marking them seen"""
+        frontier = URLFrontier(max_size=1)
+        frontier.add("http://example.com/a")
+        self.assertIsNone(frontier.add("http://example.com/b"))
+        frontier.pop()
+        self.assertIsNotNone(frontier.add("http://example.com/b"))
+
+    def test_bloom_mode(self):
+        """Test the Bloom filter seen-set"""
+        bloom = BloomFilter(10000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"http://example.com/{i}")
+        self.assertTrue(all(f"http://example.com/{i}" in bloom for i in range(5000)))
+        false_positives = sum(f"http://example.org/{i}" in bloom for i in range(5000))
+        self.assertLess(false_positives, 100)
+
+        frontier = URLFrontier(bloom_capacity=1000)
+        self.assertIsNotNone(frontier.add("http://example.com/a?x=1"))
+        self.assertIsNone(frontier.add("http://example.com/a/?x=1"))
+
+
+class TestExtractPage(unittest.TestCase):
+    """Test the streaming lxml link/form extractor"""
+
+    HTML = (
+        '<html><body><a href="/x">x</a><A HREF="/y">y</A><a>no href</a>'
+        '<form action="/p" method="POST"><input name="a"><input type="hidden" name="t" value="tok">'
+        '<textarea name="c">hi there</textarea>'
+        '<select name="s"><option>one</option><option value="2" selected>two</option></select>'
+        '<select name="s2"><option>alpha</option><option>beta</option></select>'
+        '<input type="submit"></form><form><input name="q" value="caf\u00e9"></form>'
+    )
+
+    def test_links_and_forms(self):
+        """Test that links, form attributes and field defaults are extracted"""
+        hrefs, forms = extract_page(self.HTML)
+        self.assertEqual(hrefs, ["/x", "/y"])
+        self.assertEqual(len(forms), 2)
+        login, search = forms
+        self.assertEqual((login["action"], login["method"]), ("/p", "POST"))
+        fields = {f["name"]: (f["type"], f["value"]) for f in login["fields"]}
+        self.assertEqual(fields["a"], ("text", None))
+        self.assertEqual(fields["t"], ("hidden", "tok"))
+        self.assertEqual(fields["c"], ("textarea", "hi there"))
+        self.assertEqual(fields["s"], ("select", "2"))
+        self.assertEqual(fields["s2"], ("select", "alpha"))
+        self.assertEqual((search["action"], search["method"]), (None, "get"))
+        self.assertEqual(search["fields"][0]["value"], "caf\u00e9")
+
+    def test_chunked_input(self):
+        """Test that feeding tiny chunks gives the same result as one document"""
+        data = self.HTML.encode("utf-8")
+        chunks = (data[i:i + 7] for i in range(0, len(data), 7))
+        self.assertEqual(extract_page(chunks, encoding="utf-8"), extract_page(self.HTML))
+        self.assertEqual(extract_page(b""), ([], []))
+
+
+class TestFormSpec(unittest.TestCase):
+    """Test the compact FormSpec representation"""
+
+    def setUp(self):
+        _, forms = extract_page(TestExtractPage.HTML)
+        self.form = FormSpec.from_extracted("http://example.com/dir/page", forms[0])
+
+    def test_from_extracted(self):
+        """Test action resolution, field filtering and default values"""
+        self.assertEqual(self.form.action, "http://example.com/p")
+        self.assertEqual(self.form.method, "post")
+        self.assertEqual([f.name for f in self.form.fields], ["a", "t", "c", "s", "s2"])
+        self.assertEqual(self.form.fields[1].default, "tok")
+        self.assertEqual(self.form.default_inputs()["a"], "test_value")
+
+    def test_immutable_and_picklable(self):
+        """Test that FormSpec cannot be modified and survives pickling"""
+        with self.assertRaises(AttributeError):
+            self.form.action = "http://evil.test/"
+        with self.assertRaises(AttributeError):
+            self.form.fields[0].value = "x"
+        self.assertFalse(hasattr(self.form, "__dict__"))
+        self.assertEqual(pickle.loads(pickle.dumps(self.form)), self.form)
+        self.assertEqual(FormField("mail", "email").value, "test@example.com")
+
+
+class TestFormIndex(unittest.TestCase):
+    """Test structural deduplication of forms across pages"""
+
+    def test_collapses_header_forms(self):
+        """Test that one header form found on many pages is tested once"""
+        search = {"action": "/search", "method": "get", "fields": [{"name": "q", "type": "text"}]}
+        login = {"action": "/login", "method": "post", "fields": [{"name": "u", "type": "text"}]}
+        forms = [(f"http://example.com/p{i}", FormSpec.from_extracted(f"http://example.com/p{i}", search))
+                 for i in range(10)]
+        forms.append(("http://example.com/p0", FormSpec.from_extracted("http://example.com/p0", login)))
+
+        index = FormIndex(forms)
+        self.assertEqual(len(index.unique_forms()), 2)
+        self.assertEqual(index.duplicates, 9)
+        self.assertEqual(index.requests_saved(30), 9 * 1 * 30)
+
+        findings = index.tag_findings(forms[0][1], [{"type": "XSS"}])
+        self.assertEqual(len(findings[0]["pages"]), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,311 @@
+"""
+Tests for the vulnerability detection engines
+"""
+import unittest
+import sys
+import os
+import re
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import matcher
+from scanner.matcher import OrderedMatcher, SignatureMatcher
+from scanner import sqli
+from scanner.sqli import SQL_ERROR_MATCHER, SQLI_PAYLOADS
+from scanner import timing
+from scanner import differential
+from scanner.differential import ResponseFingerprint, BaselineCache
+from scanner.dbms import DBMS_REGISTRY, dbms_stats
+from scanner import xss
+from scanner.xss import XSS_MATCHER, XSS_PAYLOADS, payloads_for
+from scanner.endpoint import reflection_contexts
+from scanner.forms import FormSpec, FormField
+from tests.fixtures import LocalServerTestCase
+
+
+class TestSignatureMatcher(unittest.TestCase):
+    """Test the compiled multi-pattern matcher"""
+
+    def test_case_insensitive_search(self):
+        """Test that signatures match regardless of case, on bytes and str"""
+        body = b"<html>Warning: YOU HAVE AN ERROR IN YOUR sql SYNTAX near ''</html>"
+        self.assertEqual(SQL_ERROR_MATCHER.search(body), "You have an error in your SQL syntax")
+        self.assertEqual(SQL_ERROR_MATCHER.search(body.decode()), "You have an error in your SQL syntax")
+        self.assertIsNone(SQL_ERROR_MATCHER.search(b"<html>All good</html>"))
+
+    def test_ordered_search(self):
+        """Test that the ordered matcher returns the first pattern in list order, with its span"""
+        ordered = OrderedMatcher(["ORA-", "mysql_fetch"])
+        body = b"Warning: MYSQL_FETCH_array() ... ora-01756"
+        start = body.index(b"ora-")
+        self.assertEqual(ordered.locate(body), ("ORA-", start, start + 4))
+        self.assertEqual(SignatureMatcher(["ORA-", "mysql_fetch"]).search(body), "mysql_fetch")
+        self.assertEqual(ordered.findall(body), {"ORA-", "mysql_fetch"})
+        self.assertIsNone(ordered.search("nothing here"))
+
+    def test_findall_nested_patterns(self):
+        """Test that overlapping and nested payloads are all reported"""
+        body = b"<p>\"><SCRIPT>alert('xss')</script></p>"
+        found = XSS_MATCHER.findall(body)
+        self.assertIn("\"><script>alert('xss')</script>", found)
+        self.assertIn("<script>alert('xss')</script>", found)
+
+        prefixes = SignatureMatcher(["abc", "abcdef", "cde"])
+        self.assertEqual(prefixes.findall("xxABCDEFxx"), {"abc", "abcdef", "cde"})
+
+    def test_window_boundaries(self):
+        """Test that a match spanning two scan windows is found"""
+        original = matcher.WINDOW_SIZE
+        matcher.WINDOW_SIZE = 16
+        try:
+            body = b"x" * 10 + b"ORA-00933" + b"y" * 40
+            self.assertEqual(SQL_ERROR_MATCHER.search(body), "ORA-00933")
+            self.assertIn("ORA-00933", SQL_ERROR_MATCHER.findall(body))
+        finally:
+            matcher.WINDOW_SIZE = original
+
+
+def xss_app(method, path, params, headers):
+    """Search page: 'q' and 'r' reflect raw in text, 'name' in an attribute, 'safe' escaped, 'token' never"""
+    safe = params.get("safe", "").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    return 200, (
+        f"<html><body><p>Results for {params.get('q', '')}</p><p>{params.get('r', '')}</p>"
+        f"<input value=\"{params.get('name', '').replace(chr(34), '')}\">"
+        f"<span>{safe}</span></body></html>"
+    )
+
+
+class TestXSS(LocalServerTestCase):
+    """Test XSS detection against a local reflecting endpoint"""
+
+    app = staticmethod(xss_app)
+
+    def form(self):
+        fields = [FormField("q"), FormField("name"), FormField("r"), FormField("safe"), FormField("token", "hidden")]
+        return FormSpec(self.base_url + "search", "get", fields)
+
+    def test_reflection_contexts(self):
+        """Test canary context classification"""
+        body = (b'<p>vsx1&lt;&gt;&quot;\'1xsv</p><a href="vsx1<>1xsv">x</a><input value="vsx1<>\'1xsv">'
+                b'<script>var a = "vsx1<>\\"\'1xsv";</script><p>vsx1<>"</p>')
+        contexts = reflection_contexts(body, "vsx1")
+        self.assertEqual(contexts, {"html": {"'"}, "url": {"<", ">"}, "attribute": {"<", ">", "'"},
+                                    "script": {"<", ">", "'"}})
+        self.assertEqual(reflection_contexts(b"<p>nothing</p>", "vsx1"), {})
+
+    def test_payload_selection(self):
+        """Test that payloads needing encoded metacharacters are pruned"""
+        self.assertEqual(payloads_for({"html": set()}), [])
+        self.assertEqual(payloads_for({"script": {"'"}}), ["';alert('xss');//"])
+        self.assertEqual(len(payloads_for({"html": set("<>\"'")})), 8)
+
+    def test_only_reflecting_fields_are_probed(self):
+        """Test that payloads go only to reflecting fields, batched into one request per payload"""
+        findings = xss.test_xss([], [(self.base_url, self.form())], finding_callback=lambda f: None)
+        self.assertEqual(sorted(f["details"].split("'")[1] for f in findings), ["q", "r"])
+        self.assertTrue(all(f["payload"].startswith(XSS_PAYLOADS[0]) for f in findings))
+        # One batched canary request plus one batched payload request
+        self.assertEqual(len(self.server.requests), 2)
+        payload_request = self.server.requests[1][2]
+        self.assertEqual((payload_request["name"], payload_request["safe"], payload_request["token"]),
+                         ("test_value", "test_value", "test_value"))
+
+    def test_ambiguous_batch_falls_back(self):
+        """Test per-field fallback when markers are stripped from reflections"""
+        payload = XSS_PAYLOADS[0]
+
+        def submit(action, method, data, **kwargs):
+            # Reflects only the payload part of 'b' (markers stripped), nothing from 'a'
+            class Response:
+                status_code = 200
+                content = payload.encode() if data["b"].startswith(payload) else b""
+            return Response()
+
+        original = xss.submit
+        xss.submit = submit
+        try:
+            reflected = xss.probe_payload("http://x/", "get", {"a": "1", "b": "2"}, payload, ["a", "b"])
+        finally:
+            xss.submit = original
+        self.assertEqual(reflected, {"b": payload})
+
+
+def sqli_app(method, path, params, headers):
+    """Product page: 'id' is concatenated into a MySQL (PostgreSQL under /pg/) query, 'sort' breaks it without quoting it back"""
+    value = params.get("id", "")
+    if path.startswith("/pg/") and value.count("'") % 2:
+        return 500, "<p>ERROR: syntax error at or near \"'\"</p>"
+    if value.count("'") % 2:
+        near = value[value.index("'"):][:80]
+        return 500, f"<p>You have an error in your SQL syntax; check the manual near '{near}' at line 1</p>"
+    if "'" in params.get("sort", ""):
+        return 500, "<p>database error</p>"
+    return 200, "<p>3 products</p>"
+
+
+class TestSQLi(LocalServerTestCase):
+    """Test batched SQLi probing against a local erroring endpoint"""
+
+    app = staticmethod(sqli_app)
+
+    def setUp(self):
+        super().setUp()
+        DBMS_REGISTRY.reset()
+
+    def form(self, *names):
+        return FormSpec(self.base_url + "products", "get", [FormField(name) for name in names])
+
+    def test_error_attributed_by_marker(self):
+        """Test that a batched error is attributed to its field through the quoted marker"""
+        form = self.form("q", "id", "page", "lang", "ref", "cat")
+        findings = sqli.test_sqli([], [(self.base_url, form)], finding_callback=lambda f: None)
+        self.assertEqual([f["details"].split("'")[1] for f in findings], ["id"])
+        self.assertEqual(findings[0]["subtype"], "Error-based SQLi")
+        # One request per payload, plus one re-probe of the other fields after the hit, then the
+        # boolean baseline and pairs, the rest of the timing baseline (the boolean baseline is
+        # its first sample) and the MySQL delay probe only
+        self.assertEqual(len(self.server.requests), len(SQLI_PAYLOADS) + 1 + 1 + 2 * len(differential.BOOLEAN_PAIRS)
+                         + timing.BASELINE_SAMPLES - 1 + 1)
+        self.assertEqual(DBMS_REGISTRY.lookup(form.action), "mysql")
+
+    def test_other_backend_payloads_pruned(self):
+        """Test that a PostgreSQL error prunes MySQL/MSSQL payloads on the whole host"""
+        for path in ("pg/a", "pg/b"):
+            form = FormSpec(self.base_url + path, "get", [FormField("id"), FormField("q")])
+            sqli.test_sqli([], [(self.base_url, form)], finding_callback=lambda f: None)
+        sent = [value for _, _, params in self.server.requests for value in params.values()]
+        mysql_only = [payload for payload, tags in sqli.PAYLOAD_DBMS.items() if "postgresql" not in tags]
+        self.assertFalse(any(value.startswith(payload) for value in sent for payload in mysql_only))
+        self.assertFalse(any("SLEEP" in value or "WAITFOR" in value for value in sent))
+        # Both endpoints skip the MySQL-only payloads and the MySQL and MSSQL delay templates
+        self.assertEqual(dbms_stats(), {self.server.url.split("/")[2]: {
+            "dbms": "postgresql", "requests_saved": 2 * (len(mysql_only) + 2)}})
+
+    def test_unattributed_error_is_bisected(self):
+        """Test that an error quoting no marker is localized by group testing"""
+        found = sqli.probe_payload(self.base_url + "products", "get", {"q": "a", "sort": "b"}, "'", ["q", "sort"])
+        self.assertEqual(list(found), ["sort"])
+        self.assertEqual(found["sort"][1], "database error")
+        # Batch, then the clean left half; the right half is inferred
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_group_testing_wide_form(self):
+        """Test O(log N) localization on a wide form, including two vulnerable fields"""
+        names = [f"f{i}" for i in range(12)] + ["sort"] + [f"g{i}" for i in range(11)]
+        inputs = {name: "x" for name in names}
+        found = sqli.probe_payload(self.base_url + "products", "get", inputs, "'", names)
+        self.assertEqual(list(found), ["sort"])
+        # Batch, at most five halvings of 24 fields, one re-probe of the fields not cleared
+        self.assertLessEqual(len(self.server.requests), 1 + 5 + 1)
+
+        self.server.requests.clear()
+        inputs["id"] = "1"
+        found = sqli.localize(self.base_url + "products", "get", inputs, "'", names + ["id"],
+                              ("Error-based SQLi", "database error"))
+        self.assertEqual(sorted(found), ["id", "sort"])
+        self.assertLess(len(self.server.requests), len(names))
+
+
+def boolean_app(method, path, params, headers):
+    """'cat' is pasted into a quoted WHERE clause; 'q' is echoed back; every page has a timestamp and token"""
+    rows = ["Dune", "Emma", "Ulysses"]
+    condition = re.search(r"' AND '(\d)'='(\d)$", params.get("cat", ""))
+    if condition and condition.group(1) != condition.group(2):
+        rows = []
+    items = "".join(f"<li>{row}</li>" for row in rows)
+    return 200, (
+        f"<html><body><p>Generated {time.time()} csrf={os.urandom(8).hex()}</p>"
+        f"<p>Search: {params.get('q', '').replace(chr(39), '&#39;')}</p><ul>{items}</ul></body></html>"
+    )
+
+
+class TestBooleanBlind(LocalServerTestCase):
+    """Test the boolean-blind differential engine"""
+
+    app = staticmethod(boolean_app)
+
+    def test_fingerprint_ignores_dynamic_tokens(self):
+        """Test that timestamps and tokens do not change a fingerprint, but missing rows do"""
+        page = "<html><body><p>Generated {} csrf={}</p><ul>{}</ul></body></html>"
+        rows = "".join(f"<li>Item {name}</li>" for name in ("alpha", "beta", "gamma", "delta"))
+        first = ResponseFingerprint.from_body(200, page.format(1700000000.1, "a1b2c3d4", rows))
+        second = ResponseFingerprint.from_body(200, page.format(1700000042.7, "9f8e7d6c", rows))
+        empty = ResponseFingerprint.from_body(200, page.format(1700000042.7, "9f8e7d6c", ""))
+        self.assertTrue(first.matches(second))
+        self.assertEqual(first.distance(second), 0)
+        self.assertFalse(first.matches(empty))
+
+    def test_true_false_pair_localized(self):
+        """Test that only the field whose false condition changes the page is reported"""
+        baselines = BaselineCache()
+        names = ["q", "page", "cat", "lang"]
+        inputs = {name: "x" for name in names}
+        found = differential.test_boolean(self.base_url + "books", "get", inputs, names, baselines)
+        self.assertEqual(list(found), ["cat"])
+        self.assertEqual(found["cat"][0], "Boolean-based blind SQLi")
+        self.assertEqual(len(baselines), 1)
+
+    def test_baseline_cache_is_bounded(self):
+        """Test that the least recently used baselines are evicted"""
+        baselines = BaselineCache(max_size=2)
+        for n in range(3):
+            baselines.get(self.base_url + f"books/{n}", "get", {"q": "x"})
+        baselines.get(self.base_url + "books/1", "get", {"q": "x"})
+        self.assertEqual(len(baselines), 2)
+        self.assertEqual(len(self.server.requests), 3)
+
+
+def timing_app(method, path, params, headers):
+    """'id' runs injected SLEEP() calls; 'sort' is slow whenever it holds a quote, whatever the delay"""
+    match = re.search(r"SLEEP\(([\d.]+)\)", params.get("id", ""))
+    if match:
+        time.sleep(float(match.group(1)))
+    if "'" in params.get("sort", ""):
+        time.sleep(0.3)
+    return 200, "<p>ok</p>"
+
+
+class TestTimeBased(LocalServerTestCase):
+    """Test the timing engine against a local sleeping endpoint"""
+
+    app = staticmethod(timing_app)
+
+    def setUp(self):
+        super().setUp()
+        self.original = timing.MIN_DELAY, timing.MAX_DELAY
+        timing.MIN_DELAY = timing.MAX_DELAY = 0.25
+
+    def tearDown(self):
+        timing.MIN_DELAY, timing.MAX_DELAY = self.original
+
+    def test_delay_confirmed_and_localized(self):
+        """Test that only the sleeping field is reported, not the uniformly slow one"""
+        engine = timing.TimingEngine()
+        names = ["q", "sort", "page", "id", "lang"]
+        try:
+            found = engine.test_endpoint(self.base_url + "items", "get", {name: "1" for name in names}, names)
+        finally:
+            engine.shutdown()
+        self.assertEqual(list(found), ["id"])
+        self.assertEqual(found["id"][2], "' OR SLEEP(0.25)--")
+        self.assertIn("mysql", found["id"][1])
+
+    def test_endpoints_probed_concurrently(self):
+        """Test that delay probes on different endpoints overlap"""
+        engine = timing.TimingEngine()
+        start = time.perf_counter()
+        try:
+            futures = [engine.submit(self.base_url + f"items/{n}", "get", {"id": "1"}, ["id"]) for n in range(4)]
+            results = [future.result() for future in futures]
+        finally:
+            engine.shutdown()
+        elapsed = time.perf_counter() - start
+        self.assertTrue(all(list(found) == ["id"] for found in results))
+        # Each endpoint sleeps at least 4 x 0.25s; serially that would exceed 4s
+        self.assertLess(elapsed, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests for passive technology fingerprinting
+"""
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.crawler import crawl_site
+from scanner.extract import extract_page
+from scanner.fingerprinting import TechFingerprinter
+from tests.fixtures import LocalServerTestCase
+
+PAGE = (
+    '<html><head><meta name="generator" content="WordPress 6.4.2">'
+    '<link rel="shortcut icon" href="/wp-content/uploads/icon.png">'
+    '<script src="/wp-includes/js/jquery/jquery-3.7.1.min.js"></script></head>'
+    '<body><a href="/about">About</a><a href="/favicon.ico">icon</a>'
+    '<form action="/search"><input name="s"></form></body></html>'
+)
+
+
+def wordpress_app(method, path, params, headers):
+    if path == "/favicon.ico":
+        return 200, b"\x00\x00\x01\x00", {"Content-Type": "image/x-icon", "Server": "nginx/1.24.0"}
+    if path not in ("/", "/about"):
+        return 404, "Not found"
+    return 200, PAGE, {"Server": "nginx/1.24.0", "X-Powered-By": "PHP/8.2.1",
+                       "Set-Cookie": "wordpress_test_cookie=WP+Cookie+check; path=/"}
+
+
+class TestPassiveFingerprinting(LocalServerTestCase):
+    """Test that the crawl's own responses are fingerprinted"""
+
+    app = staticmethod(wordpress_app)
+
+    def test_crawl_feeds_fingerprinter(self):
+        """Test that the stack is built from crawled responses without extra requests"""
+        fingerprinter = TechFingerprinter()
+        crawl_site(self.base_url, max_pages=10, fingerprinter=fingerprinter)
+
+        paths = [path for _, path, _ in self.server.requests]
+        self.assertEqual(sorted(paths), ["/", "/about", "/favicon.ico"])
+        self.assertEqual(fingerprinter.responses, 3)
+
+        host = self.base_url.split("/")[2]
+        stack = fingerprinter.stack(host)
+        versions = {tech: entry['version'] for tech, entry in stack.items()}
+        self.assertEqual(versions, {"nginx": "1.24.0", "PHP": "8.2.1", "WordPress": "6.4.2",
+                                    "jQuery": "3.7.1", "MySQL": ""})
+        self.assertEqual(stack["MySQL"]["evidence"], ["implied by WordPress"])
+        self.assertEqual(stack["WordPress"]["category"], "cms")
+        self.assertIn("cookie wordpress_test_cookie", stack["WordPress"]["evidence"])
+        self.assertIn("nginx 1.24.0", fingerprinter.stats()[host])
+
+
+class TestSignatureIndex(unittest.TestCase):
+    """Test signature matching on single observations"""
+
+    def observe(self, url="http://app.test/", **kwargs):
+        fingerprinter = TechFingerprinter()
+        fingerprinter.observe(url, **kwargs)
+        return fingerprinter.stack("app.test")
+
+    def test_headers_and_cookies(self):
+        """Test header tokens, presence-only headers and cookie prefixes"""
+        stack = self.observe(headers={"Server": "Microsoft-IIS/10.0", "X-AspNet-Version": "4.0.30319",
+                                      "CF-RAY": "8a1b2c3d4e5f-AMS"},
+                             cookies=["ASP.NET_SessionId", "sessionid"])
+        self.assertEqual(stack["Microsoft IIS"]["version"], "10.0")
+        self.assertEqual(stack["ASP.NET"]["version"], "4.0.30319")
+        self.assertEqual(stack["Cloudflare"]["version"], "")
+        self.assertEqual(set(stack), {"Microsoft IIS", "ASP.NET", "Cloudflare"})
+
+    def test_page_hints(self):
+        """Test generator tags and script paths collected by extract_page"""
+        hints = {}
+        extract_page('<meta name="Generator" content="Hugo 0.121.1"><script src="/js/vue.global.prod.js"></script>',
+                     hints=hints)
+        self.assertEqual(hints["generators"], ["Hugo 0.121.1"])
+        stack = self.observe(generators=hints["generators"], scripts=hints["scripts"])
+        self.assertEqual(stack["Hugo"], {'version': "0.121.1", 'evidence': ["meta generator Hugo 0.121.1"],
+                                         'category': "static-site-generator"})
+        self.assertIn("Vue.js", stack)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Tests for nmap sharding and streaming XML parsing
+"""
+import unittest
+import sys
+import os
+import stat
+import tempfile
+import time
+import contextlib
+import io
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import nmapscan
+from scanner.nmapscan import NmapXMLStream, expand_targets, plan_shards, compress_ports, run_shard
+from scanner.portscan import scan_targets
+
+SAMPLE_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<nmaprun scanner="nmap" args="nmap -sS -oX - 10.0.0.1-2">
+<scaninfo type="syn" protocol="tcp" numservices="1000" services="1-1000"/>
+<taskprogress task="SYN Stealth Scan" time="1700000000" percent="50.00" remaining="3"/>
+<host starttime="1700000000" endtime="1700000001"><status state="up" reason="arp-response"/>
+<address addr="10.0.0.1" addrtype="ipv4"/><address addr="00:11:22:33:44:55" addrtype="mac"/>
+<ports><extraports state="closed" count="998"/>
+<port protocol="tcp" portid="22"><state state="open" reason="syn-ack"/><service name="ssh" product="OpenSSH" version="8.9p1"/></port>
+<port protocol="tcp" portid="25"><state state="filtered" reason="no-response"/><service name="smtp"/></port>
+<port protocol="tcp" portid="80"><state state="open" reason="syn-ack"/><service name="http"/></port>
+</ports></host>
+<host starttime="1700000000" endtime="1700000002"><status state="up" reason="arp-response"/>
+<address addr="10.0.0.2" addrtype="ipv4"/>
+<ports><port protocol="tcp" portid="443"><state state="open" reason="syn-ack"/></port></ports></host>
+<runstats><finished time="1700000002" elapsed="2.00" exit="success"/></runstats>
+</nmaprun>
+"""
+
+# Stand-in for nmap: reports the first port of its -p range open on every host,
+# one host at a time with a pause between them
+FAKE_NMAP = """#!{python}
+import sys, time
+args = sys.argv[1:]
+spec = args[args.index("-p") + 1]
+hosts = args[args.index("-p") + 2:]
+if "fail.invalid" in hosts:
+    sys.stderr.write("Failed to resolve fail.invalid\\nQUITTING!\\n")
+    sys.exit(1)
+first = spec.split(",")[0].split("-")[0]
+out = sys.stdout
+out.write('<?xml version="1.0"?><nmaprun>')
+out.write('<taskprogress task="SYN Stealth Scan" percent="10.00"/>')
+out.flush()
+for host in hosts:
+    out.write('<host><address addr="%s" addrtype="ipv4"/><ports>' % host)
+    out.write('<port protocol="tcp" portid="%s"><state state="open"/><service name="x"/></port>' % first)
+    out.write('</ports></host>')
+    out.flush()
+    time.sleep({pause})
+out.write('</nmaprun>')
+"""
+
+
+class TestNmapStreaming(unittest.TestCase):
+    """Test target expansion, shard planning and incremental XML parsing"""
+
+    def fake_nmap(self, pause=0.0):
+        handle, path = tempfile.mkstemp(suffix=".py")
+        with os.fdopen(handle, "w") as f:
+            f.write(FAKE_NMAP.format(python=sys.executable, pause=pause))
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_expand_targets(self):
+        self.assertEqual(expand_targets("10.0.0.0/30, db.internal 10.0.0.1"), ["10.0.0.1", "10.0.0.2", "db.internal"])
+        self.assertEqual(expand_targets(["192.168.1.7/32"]), ["192.168.1.7"])
+        with self.assertRaises(ValueError):
+            expand_targets("10.0.0.0/8")
+
+    def test_plan_shards(self):
+        """Test that one host is split by port range and many hosts by host group"""
+        ports = list(range(1, 1001))
+        shards = plan_shards(["a"], ports, parallel=4)
+        self.assertEqual([spec for _, spec, _ in shards], ["1-250", "251-500", "501-750", "751-1000"])
+
+        hosts = [f"h{n}" for n in range(40)]
+        shards = plan_shards(hosts, ports, parallel=4, hosts_per_shard=16)
+        self.assertEqual([len(group) for group, _, _ in shards], [16, 16, 8])
+        self.assertEqual(sum(probes for _, _, probes in shards), 40 * 1000)
+        self.assertEqual(plan_shards(hosts, []), [])
+        self.assertEqual(compress_ports([1, 2, 3, 80, 443, 444]), "1-3,80,443-444")
+
+    def test_stream_parser_byte_by_byte(self):
+        """Test that events come out as soon as their element is complete"""
+        stream = NmapXMLStream()
+        events = []
+        for i in range(len(SAMPLE_XML)):
+            events += stream.feed(SAMPLE_XML[i:i + 1])
+        events += stream.close()
+
+        self.assertEqual(events[0], ("progress", "SYN Stealth Scan", 50.0))
+        ports = [(host, info["port"], info["service"]) for kind, host, info in events if kind == "port"]
+        self.assertEqual(ports, [("10.0.0.1", 22, "ssh (OpenSSH 8.9p1)"), ("10.0.0.1", 80, "http"),
+                                 ("10.0.0.2", 443, "unknown")])
+        self.assertEqual([host for kind, host, _ in events if kind == "host"], ["10.0.0.1", "10.0.0.2"])
+        # Finished hosts are not kept in the tree
+        self.assertEqual(stream.root.findall("host"), [])
+
+    def test_ports_reported_while_nmap_runs(self):
+        """Test that the first open port arrives before the process exits"""
+        binary = self.fake_nmap(pause=0.3)
+        arrivals = []
+        start = time.perf_counter()
+        results = run_shard(["10.0.0.1", "10.0.0.2"], "8080", on_event=lambda e: arrivals.append(time.perf_counter() - start)
+                            if e[0] == "port" else None, binary=binary)
+        finished = time.perf_counter() - start
+        self.assertEqual([(host, info["port"]) for host, info in results], [("10.0.0.1", 8080), ("10.0.0.2", 8080)])
+        self.assertLess(arrivals[0], finished - 0.4)
+
+    def test_failed_shard(self):
+        with self.assertRaises(RuntimeError) as raised:
+            run_shard(["fail.invalid"], "80", binary=self.fake_nmap())
+        self.assertEqual(str(raised.exception), "QUITTING!")
+
+    def test_scan_targets_sharded(self):
+        """Test that every shard runs and progress adds up to hosts x ports"""
+        binary = self.fake_nmap()
+        progress, found = [], []
+        original = nmapscan.NMAP_BINARY
+        nmapscan.NMAP_BINARY = binary
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = scan_targets("10.0.0.1, 10.0.0.2", "1-400", progress_callback=progress.append,
+                                       port_callback=lambda host, info: found.append((host, info["port"])), method="syn")
+        finally:
+            nmapscan.NMAP_BINARY = original
+
+        # One host group, ports split four ways
+        self.assertEqual({host: [info["port"] for info in ports] for host, ports in results.items()},
+                         {"10.0.0.1": [1, 101, 201, 301], "10.0.0.2": [1, 101, 201, 301]})
+        self.assertEqual(len(found), 8)
+        self.assertEqual(sum(progress), 2 * 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
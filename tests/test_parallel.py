@@ -0,0 +1,191 @@
+"""
+Tests for the work-stealing task scheduler
+"""
+import unittest
+import sys
+import os
+import threading
+import time
+from unittest import mock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.parallel import WorkStealingScheduler, TaskGroup, parallel_scan
+from scanner.endpoint import schedule_endpoint
+from scanner.xss import XSSDetector
+from scanner.sqli import SQLiDetector
+from scanner import timing
+from scanner.timing import TimingEngine
+from scanner.forms import FormSpec, FormField
+from tests.fixtures import LocalServerTestCase
+
+
+class TestWorkStealingScheduler(unittest.TestCase):
+    """Test task spawning, stealing, host limits, streaming and cancellation"""
+
+    def test_spawned_tasks_are_stolen(self):
+        """Test that subtasks spawned by one task run on every worker"""
+        scheduler = WorkStealingScheduler(threads=4)
+        group_done = threading.Event()
+        group = TaskGroup(group_done.set)
+
+        def leaf(n):
+            time.sleep(0.02)
+            return [(n, threading.current_thread().name)]
+
+        def root():
+            for n in range(40):
+                scheduler.submit(leaf, n, group=group)
+
+        scheduler.submit(root, group=group)
+        scheduler.seal(group)
+        scheduler.close()
+        results = list(scheduler.results())
+        self.assertEqual(sorted(n for n, _ in results), list(range(40)))
+        self.assertEqual(len({name for _, name in results}), 4)
+        self.assertTrue(group_done.is_set())
+
+    def test_per_host_limit(self):
+        """Test that no more than per_host tasks hit one host at once"""
+        scheduler = WorkStealingScheduler(threads=8, per_host=2)
+        lock = threading.Lock()
+        running = {"a": 0, "b": 0}
+        peaks = {"a": 0, "b": 0}
+
+        def task(host):
+            with lock:
+                running[host] += 1
+                peaks[host] = max(peaks[host], running[host])
+            time.sleep(0.02)
+            with lock:
+                running[host] -= 1
+
+        for n in range(20):
+            scheduler.submit(task, "a" if n % 2 else "b", host="a" if n % 2 else "b")
+        scheduler.close()
+        list(scheduler.results())
+        self.assertEqual(peaks, {"a": 2, "b": 2})
+
+    def test_results_stream_and_cancel(self):
+        """Test that results arrive before slow tasks finish and that leaving early cancels"""
+        scheduler = WorkStealingScheduler(threads=2)
+        ran = []
+
+        def task(n):
+            time.sleep(0 if n == 9 else 0.3)
+            ran.append(n)
+            return [n]
+
+        for n in range(10):
+            scheduler.submit(task, n)
+        scheduler.close()
+        start = time.perf_counter()
+        for result in scheduler.results():
+            self.assertEqual(result, 9)
+            self.assertLess(time.perf_counter() - start, 0.25)
+            break
+        # Only tasks already running when the loop was left completed
+        self.assertLessEqual(len(ran), 3)
+
+    def test_group_completes_once(self):
+        """Test that a group's first tasks finishing before the rest are submitted do not complete it"""
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for _ in range(50):
+                scheduler = WorkStealingScheduler(threads=4)
+                calls = []
+                group = TaskGroup(lambda: calls.append(1))
+
+                def batch():
+                    for n in range(20):
+                        scheduler.submit(lambda n: [n], n, group=group)
+                    scheduler.seal(group)
+
+                scheduler.submit(batch)
+                scheduler.close()
+                self.assertEqual(len(list(scheduler.results())), 20)
+                self.assertEqual(calls, [1])
+        finally:
+            sys.setswitchinterval(interval)
+
+    def test_parallel_scan_keeps_order(self):
+        """Test the compatibility wrapper"""
+        results = parallel_scan(lambda n: [n, n] if n % 2 else n, range(6), threads=3)
+        self.assertEqual(results, [1, 1, 2, 3, 3, 4, 5, 5])
+
+    def test_parallel_scan_errors_and_hosts(self):
+        """Test that scan errors propagate and URL items follow the per-host limit"""
+        def fail(n):
+            if n == 3:
+                raise ValueError("boom")
+            return n
+        with self.assertRaises(ValueError):
+            parallel_scan(fail, range(6), threads=3)
+
+        hosts = []
+        submit = WorkStealingScheduler.submit
+
+        def record(scheduler, func, *args, host=None, group=None):
+            hosts.append(host)
+            submit(scheduler, func, *args, host=host, group=group)
+
+        urls = ["http://one.test/a", "http://two.test/b"]
+        with mock.patch.object(WorkStealingScheduler, "submit", record):
+            self.assertEqual(parallel_scan(lambda url: url, urls, threads=2), urls)
+            parallel_scan(lambda item: None, [("page", "http://three.test/")], host=lambda item: item[1])
+        self.assertEqual(hosts, ["one.test", "two.test", "http://three.test/"])
+
+
+def forms_app(method, path, params, headers):
+    """'q' is reflected raw; 'id' breaks a MySQL query on an odd number of quotes"""
+    if params.get("id", "").count("'") % 2:
+        return 500, "<p>You have an error in your SQL syntax</p>"
+    return 200, f"<p>Results for {params.get('q', '')}</p>"
+
+
+class TestScheduledForms(LocalServerTestCase):
+    """Test XSS and SQLi scheduled as one task stream per endpoint"""
+
+    app = staticmethod(forms_app)
+
+    def schedule(self, forms, threads=4):
+        scheduler = WorkStealingScheduler(threads=threads)
+        detectors = [XSSDetector(), SQLiDetector(TimingEngine())]
+        done = []
+        for form in forms:
+            schedule_endpoint(scheduler, self.base_url, form, detectors, on_done=done.append)
+        scheduler.close()
+        return list(scheduler.results()), done
+
+    def test_schedule_forms(self):
+        """Test that each form is fully tested and reported done once per detector"""
+        forms = [FormSpec(self.base_url + f"page/{n}", "get", [FormField("q"), FormField("id")]) for n in range(3)]
+        results, done = self.schedule(forms)
+
+        self.assertEqual(sorted(done), ["sqli"] * 3 + ["xss"] * 3)
+        for form in forms:
+            reported = sorted((f["type"], f["details"].split("'")[1]) for test_form, f in results if test_form is form)
+            self.assertEqual(reported, [("SQL Injection", "id"), ("XSS", "q")])
+
+    def test_shared_pre_probe_and_baseline(self):
+        """Test that the detectors share one canary pre-probe and one baseline request"""
+        form = FormSpec(self.base_url + "shared", "get", [FormField("q"), FormField("id"), FormField("page")])
+        defaults = form.default_inputs()
+        results, done = self.schedule([form], threads=1)
+        requests_sent = [params for _, path, params in self.server.requests if path == "/shared"]
+
+        canary_requests = [params for params in requests_sent if any(value.startswith("vsx") for value in params.values())]
+        self.assertEqual(len(canary_requests), 4)  # Batched, rejected by the SQL error, then one per field
+        # One baseline fetch serves the boolean pass and the first timing sample
+        self.assertEqual(requests_sent.count(defaults), timing.BASELINE_SAMPLES)
+
+        # The SQL error caused by the canary's quote is reported without an SQLi payload of its own
+        sqli = [f for _, f in results if f["type"] == "SQL Injection"]
+        self.assertEqual(len(sqli), 1)
+        self.assertTrue(sqli[0]["payload"].startswith("vsx"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests for GET parameter testing from crawled links
+"""
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import xss
+from scanner.params import ParameterInventory, path_template, url_pattern
+from scanner.pipeline import ScanPipeline
+from tests.fixtures import LocalServerTestCase
+
+
+class TestParameterInventory(unittest.TestCase):
+    """Test URL-pattern grouping of parameterized links"""
+
+    def test_url_pattern(self):
+        """Test that variable path segments and parameter values do not split a pattern"""
+        self.assertEqual(path_template("/item/5012/reviews"), "/item/{int}/reviews")
+        self.assertEqual(path_template("/u/0f8fad5b-d9cb-469f-a165-70867728950e"), "/u/{uuid}")
+        self.assertEqual(path_template("/blob/9f86d081884c7d659a2feaa0"), "/blob/{hex}")
+        self.assertEqual(path_template("/v2/page"), "/v2/page")
+        self.assertEqual(url_pattern("http://a.test/item/7?b=2&a=1"),
+                         ("http://a.test/item/{int}", frozenset({"a", "b"})))
+
+    def test_links_grouped(self):
+        """Test that one link per pattern is kept, with every page linking to it"""
+        inventory = ParameterInventory()
+        forms = [inventory.add(f"http://a.test/list?page={n // 10}", f"http://a.test/item?id={n}") for n in range(50)]
+        forms += [inventory.add("http://a.test/", "http://a.test/item?id=3&sort=asc"),
+                  inventory.add("http://a.test/", "http://a.test/about"),
+                  inventory.add("http://a.test/", "http://a.test/item/9/reviews?page=2"),
+                  inventory.add("http://a.test/", "http://a.test/item/12/reviews?page=1")]
+        self.assertEqual(len([form for form in forms if form]), 3)
+
+        endpoints = inventory.endpoints()
+        self.assertEqual([url for url, _ in endpoints], ["http://a.test/item?id=0", "http://a.test/item?id=3&sort=asc",
+                                                         "http://a.test/item/9/reviews?page=2"])
+        url, form = endpoints[0]
+        self.assertEqual((form.action, form.method), ("http://a.test/item", "get"))
+        self.assertEqual(form.default_inputs(), {"id": "0"})
+        self.assertTrue(inventory.owns(form))
+        self.assertEqual(len(inventory.pages_for(form)), 5)
+
+        stats = inventory.stats(10)
+        self.assertEqual(stats, {'parameterized_links': 53, 'link_patterns': 3, 'link_requests_saved': 500})
+
+
+def catalog_app(method, path, params, headers):
+    """Item links reflect 'id' raw; there are no forms"""
+    if path == "/item":
+        return 200, f"<html><body><p>Item {params.get('id', '')}</p></body></html>"
+    links = "".join(f'<a href="/item?id={n}">item</a>' for n in range(40))
+    return 200, f"<html><body>{links}</body></html>"
+
+
+class TestLinkParameters(LocalServerTestCase):
+    """Test that link parameters reach the testers once per pattern"""
+
+    app = staticmethod(catalog_app)
+
+    def test_pipeline_tests_link_pattern_once(self):
+        """Test that 40 links to one endpoint give one tested endpoint and one finding"""
+        pipeline = ScanPipeline(self.base_url, max_pages=1, threads=2)
+        findings = [f for f in pipeline.run() if f["type"].startswith("XSS")]
+        self.assertEqual(len(findings), 1)
+        self.assertEqual(findings[0]["pages"], [self.base_url])
+        self.assertEqual((pipeline.inventory.total, len(pipeline.inventory.groups)), (40, 1))
+        self.assertEqual(pipeline.form_index.total, 0)
+
+        ids = {params["id"] for _, path, params in self.server.requests if path == "/item"}
+        # Only the representative's value is sent unprobed; the rest are probes
+        self.assertNotIn("1", ids)
+
+    def test_legacy_tester_uses_links(self):
+        """Test that test_xss() tests the links it is given"""
+        links = [f"{self.base_url}item?id={n}" for n in range(40)]
+        findings = xss.test_xss(links, [], finding_callback=lambda f: None)
+        self.assertEqual(len(findings), 1)
+        self.assertIn("'id'", findings[0]["details"])
+
+
+if __name__ == '__main__':
+    unittest.main()
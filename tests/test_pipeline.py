@@ -0,0 +1,74 @@
+"""
+Tests for the streaming crawl -> test pipeline
+"""
+import unittest
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.pipeline import ScanPipeline
+from tests.fixtures import LocalServerTestCase
+
+
+def site_app(method, path, params, headers):
+    """Chain of 8 slow pages, each with the same search form plus its own comment form"""
+    if path == "/search":
+        return 200, f"<p>Results for {params.get('q', '')}</p>"
+    if path.startswith("/comment/"):
+        return 200, "<p>Thanks</p>"
+    time.sleep(0.05)
+    n = int(path.rsplit("/", 1)[-1]) if path.startswith("/page/") else 0
+    next_link = f'<a href="/page/{n + 1}">next</a>' if n < 7 else ""
+    return 200, (
+        f"<html><body>{next_link}"
+        f'<form action="/search"><input name="q"></form>'
+        f'<form action="/comment/{n}" method="post"><textarea name="body"></textarea></form>'
+        f"</body></html>"
+    )
+
+
+class TestScanPipeline(LocalServerTestCase):
+    """Test that forms are tested while the crawl continues"""
+
+    app = staticmethod(site_app)
+
+    def run_pipeline(self, **kwargs):
+        updates = []
+        pipeline = ScanPipeline(self.base_url, max_pages=8, threads=4,
+                                progress_callback=lambda stage, counts: updates.append((stage, counts)), **kwargs)
+        findings = list(pipeline.run())
+        return pipeline, findings, updates
+
+    def test_testing_overlaps_crawling(self):
+        """Test that the first test request is sent before the last page is fetched"""
+        pipeline, findings, updates = self.run_pipeline()
+        paths = [path for _, path, _ in self.server.requests]
+        first_test = min(i for i, path in enumerate(paths) if path in ("/search", "/comment/0"))
+        last_page = max(i for i, path in enumerate(paths) if path.startswith("/page/"))
+        self.assertLess(first_test, last_page)
+
+        self.assertEqual([f["details"] for f in findings], [f"Possible XSS in field 'q' at {self.base_url}search"])
+        # Tagged with every page the search form was seen on, including pages crawled after the finding
+        self.assertEqual(len(findings[0]["pages"]), 8)
+
+        self.assertEqual({stage for stage, _ in updates}, {"crawl", "dedup", "xss", "sqli", "finding"})
+        final = pipeline.progress.snapshot()
+        self.assertEqual(final["pages"], 8)
+        self.assertEqual(final["forms_found"], 16)
+        self.assertEqual(final["unique_forms"], 9)
+        self.assertEqual(final["tests_total"], final["tests_done"])
+        self.assertEqual(final["findings"], 1)
+
+    def test_backpressure_windows(self):
+        """Test that the smallest queue and in-flight window still drain every form"""
+        pipeline, findings, updates = self.run_pipeline(form_queue_size=1, max_forms_in_flight=1)
+        self.assertEqual(len(findings), 1)
+        self.assertEqual(pipeline.form_index.total, 16)
+        self.assertEqual(pipeline.progress.snapshot()["tests_done"], 18)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Tests for tech-stack-aware scan planning
+"""
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.planner import build_plan, ScanPlanner
+from scanner.fingerprinting import TechFingerprinter
+from scanner.pipeline import ScanPipeline
+from scanner.sqli import SQLiDetector
+from tests.fixtures import LocalServerTestCase
+
+
+def stack(categories):
+    """{tech: category} into TechFingerprinter.stack() entries"""
+    return {tech: {'category': category, 'version': "", 'evidence': []} for tech, category in categories.items()}
+
+
+class TestBuildPlan(unittest.TestCase):
+    """Test the plan chosen for a detected stack"""
+
+    def test_static_site_skips_sqli(self):
+        """Test that a static-site generator without server-side code gets no SQLi checks"""
+        plan = build_plan("blog.test", stack({"Hugo": "static-site-generator", "nginx": "web-server"}))
+        self.assertEqual(plan.modules, ["xss"])
+        self.assertIn("sqli", plan.skipped)
+
+        class Detector:
+            def __init__(self, name):
+                self.name = name
+        detectors = plan.detectors([Detector("xss"), SQLiDetector(None)])
+        self.assertEqual([detector.name for detector in detectors], ["xss"])
+        self.assertEqual(plan.summary()['requests_saved'], SQLiDetector.min_requests)
+
+        # Server-side code next to the generator keeps SQLi
+        plan = build_plan("blog.test", stack({"Hugo": "static-site-generator", "PHP": "language"}))
+        self.assertEqual(plan.modules, ["sqli", "xss"])
+
+    def test_payload_order(self):
+        """Test that the expected backend's payloads run first, and others are dropped only when it is certain"""
+        tags = {"a": ("mssql",), "b": ("mysql",), "c": ("mysql", "mssql")}
+        likely = build_plan("app.test", stack({"ASP.NET": "framework", "Microsoft IIS": "web-server"}))
+        self.assertEqual((likely.dbms, likely.certain), ("mssql", False))
+        self.assertEqual(likely.order_payloads(["generic", "b", "a", "c"], tags), ["a", "c", "generic", "b"])
+        self.assertEqual(likely.requests_saved, 0)
+
+        certain = build_plan("app.test", stack({"PHP": "language", "MySQL": "database"}))
+        self.assertEqual((certain.dbms, certain.certain), ("mysql", True))
+        self.assertEqual(certain.order_payloads(["generic", "b", "a", "c"], tags), ["b", "c", "generic"])
+        self.assertEqual(certain.requests_saved, 1)
+
+        unknown = build_plan("app.test", {})
+        self.assertEqual(unknown.modules, ["xss", "sqli"])
+        self.assertEqual(unknown.order_payloads(["generic", "b", "a"], tags), ["generic", "b", "a"])
+
+    def test_implied_backend_is_likely(self):
+        """Test that a CMS-implied database is only likely, and certain once seen directly"""
+        fingerprinter = TechFingerprinter()
+        fingerprinter.observe("http://cms.test/", generators=["Joomla! - Open Source Content Management"])
+        plan = build_plan("cms.test", fingerprinter.stack("cms.test"))
+        self.assertEqual((plan.dbms, plan.certain), ("mysql", False))
+        self.assertEqual(plan.order_payloads(["generic", "b", "a"], {"a": ("mssql",), "b": ("mysql",)}),
+                         ["b", "generic", "a"])
+
+        plan = build_plan("cms.test", dict(fingerprinter.stack("cms.test"), **stack({"MySQL": "database"})))
+        self.assertEqual((plan.dbms, plan.certain), ("mysql", True))
+
+    def test_plan_follows_stack_changes(self):
+        """Test that a host's plan is rebuilt in place when the fingerprint changes"""
+        fingerprinter = TechFingerprinter()
+        planner = ScanPlanner(fingerprinter)
+        fingerprinter.observe("http://app.test/", generators=["Hugo 0.121.1"])
+        plan = planner.plan_for("app.test")
+        plan.detectors([SQLiDetector(None)])
+        self.assertEqual(plan.modules, ["xss"])
+
+        self.assertIs(planner.plan_for("app.test"), plan)
+        fingerprinter.observe("http://app.test/search", headers={"X-Powered-By": "PHP/8.2.1"})
+        self.assertIs(planner.plan_for("app.test"), plan)
+        self.assertEqual((plan.modules, plan.dbms), (["sqli", "xss"], "mysql"))
+        self.assertEqual((plan.forms, plan.requests_saved), (1, SQLiDetector.min_requests))
+
+
+def static_site_app(method, path, params, headers):
+    if path == "/search":
+        return 200, "<p>No results</p>"
+    return 200, ('<html><head><meta name="generator" content="Hugo 0.121.1"></head>'
+                 '<body><form action="/search"><input name="q"></form></body></html>')
+
+
+class TestPlannedPipeline(LocalServerTestCase):
+    """Test that the pipeline follows the host's plan"""
+
+    app = staticmethod(static_site_app)
+
+    def test_static_site_plan(self):
+        """Test that SQLi payloads are never sent to a static site, unless planning is off"""
+        pipeline = ScanPipeline(self.base_url, max_pages=1, threads=2)
+        self.assertEqual(list(pipeline.run()), [])
+        searches = [params for _, path, params in self.server.requests if path == "/search"]
+        self.assertFalse(any("'" in value and "vsx" not in value for params in searches for value in params.values()))
+
+        plan = pipeline.planner.stats()[self.base_url.split("/")[2]]
+        self.assertEqual(plan['checks'], "xss")
+        self.assertEqual(plan['forms'], 1)
+        self.assertEqual(plan['requests_saved'], SQLiDetector.min_requests)
+        self.assertEqual(pipeline.progress.snapshot()["tests_total"], 1)
+
+        self.server.requests.clear()
+        full = ScanPipeline(self.base_url, max_pages=1, threads=2, plan=False)
+        list(full.run())
+        searches = [params for _, path, params in self.server.requests if path == "/search"]
+        self.assertTrue(any(params.get("q") == "' OR '1'='1" for params in searches))
+
+
+if __name__ == '__main__':
+    unittest.main()
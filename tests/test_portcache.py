@@ -0,0 +1,123 @@
+"""
+Tests for the port-state cache and incremental rescans
+"""
+import unittest
+import sys
+import os
+import json
+import socket
+import tempfile
+import contextlib
+import io
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.portcache import PortStateCache, incremental_scan
+from scanner.portscan import scan_targets
+
+
+class TestIncrementalRescan(unittest.TestCase):
+    """Test full scans, re-verification, sampling and TTL expiry against local listeners"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, "cache", "ports.json")
+        self.listeners = {}
+        # Six consecutive free ports; the first three listen
+        while True:
+            sockets = [socket.socket() for _ in range(6)]
+            try:
+                sockets[0].bind(("127.0.0.1", 0))
+                base = sockets[0].getsockname()[1]
+                for offset, sock in enumerate(sockets[1:], 1):
+                    sock.bind(("127.0.0.1", base + offset))
+                break
+            except OSError:
+                for sock in sockets:
+                    sock.close()
+        self.ports = list(range(base, base + 6))
+        for port, sock in zip(self.ports, sockets):
+            if port < base + 3:
+                sock.listen(8)
+                self.listeners[port] = sock
+            else:
+                sock.close()
+        self.scanned = []
+
+    def tearDown(self):
+        for sock in self.listeners.values():
+            sock.close()
+
+    def scan(self, targets, ports, progress_callback=None, port_callback=None, method="auto", quiet=False):
+        """scan_targets() over the connect scanner, recording what each call probed"""
+        self.scanned.append(ports)
+        return scan_targets(targets, ports, progress_callback, port_callback, method="connect", quiet=quiet)
+
+    def rescan(self, cache, sample_rate=0.0, targets="127.0.0.1"):
+        self.output = io.StringIO()
+        with contextlib.redirect_stdout(self.output):
+            return incremental_scan(targets, f"{self.ports[0]}-{self.ports[-1]}", cache=cache,
+                                    sample_rate=sample_rate, scan=self.scan)
+
+    def test_rescan_reports_only_changes(self):
+        results, changes = self.rescan(PortStateCache(self.path))
+        self.assertEqual([info['port'] for info in results["127.0.0.1"]], self.ports[:3])
+        self.assertEqual(len(changes), 3)
+        self.assertEqual(json.load(open(self.path))["127.0.0.1"]["ports"], f"{self.ports[0]}-{self.ports[-1]}")
+
+        # Nothing changed: only the known-open ports are probed and nothing is reported
+        self.scanned.clear()
+        results, changes = self.rescan(PortStateCache(self.path))
+        self.assertEqual(self.scanned, [f"{self.ports[0]}-{self.ports[2]}"])
+        self.assertEqual(changes, [])
+        self.assertEqual(len(results["127.0.0.1"]), 3)
+        self.assertNotIn("Found open port", self.output.getvalue())
+
+        # One port closes and another opens; a full sample finds the new one
+        self.listeners.pop(self.ports[1]).close()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", self.ports[4]))
+        sock.listen(8)
+        self.listeners[self.ports[4]] = sock
+        self.scanned.clear()
+        results, changes = self.rescan(PortStateCache(self.path), sample_rate=1.0)
+        self.assertEqual(len(self.scanned), 1)
+        self.assertEqual(sorted((c['change'], c['port_info']['port']) for c in changes),
+                         [("closed", self.ports[1]), ("opened", self.ports[4])])
+        self.assertIn(f"New open port: 127.0.0.1 {self.ports[4]}/tcp", self.output.getvalue())
+        self.assertIn(f"Port closed: 127.0.0.1 {self.ports[1]}/tcp", self.output.getvalue())
+        self.assertEqual(sorted(PortStateCache(self.path).hosts["127.0.0.1"]["open"]),
+                         sorted(str(port) for port in (self.ports[0], self.ports[2], self.ports[4])))
+
+    def test_hosts_batched(self):
+        """Test that uncached hosts share one full scan and cached ones one rescan"""
+        results, _ = self.rescan(PortStateCache(self.path), targets="127.0.0.1, 127.0.0.2")
+        self.assertEqual(self.scanned, [f"{self.ports[0]}-{self.ports[-1]}"])
+        self.assertEqual((len(results["127.0.0.1"]), results["127.0.0.2"]), (3, []))
+
+        self.scanned.clear()
+        results, changes = self.rescan(PortStateCache(self.path), targets="127.0.0.1, 127.0.0.2, 127.0.0.3")
+        # 127.0.0.3 is new: one full scan for it, one rescan for both cached hosts
+        self.assertEqual(self.scanned, [f"{self.ports[0]}-{self.ports[-1]}", f"{self.ports[0]}-{self.ports[2]}"])
+        self.assertEqual(changes, [])
+        self.assertEqual(sorted(PortStateCache(self.path).hosts), ["127.0.0.1", "127.0.0.2", "127.0.0.3"])
+
+    def test_nothing_to_probe(self):
+        """Test that a rescan with no known-open ports and an empty sample probes nothing"""
+        self.rescan(PortStateCache(self.path), targets="127.0.0.2")
+        self.scanned.clear()
+        results, changes = self.rescan(PortStateCache(self.path), sample_rate=0.05, targets="127.0.0.2")
+        self.assertEqual((self.scanned, results, changes), ([], {"127.0.0.2": []}, []))
+        self.assertNotIn("Error", self.output.getvalue())
+        self.assertIn("127.0.0.2", PortStateCache(self.path).hosts)
+
+    def test_expired_entry_rescanned_in_full(self):
+        self.rescan(PortStateCache(self.path))
+        self.scanned.clear()
+        self.rescan(PortStateCache(self.path, ttl=-1))
+        self.assertEqual(self.scanned, [f"{self.ports[0]}-{self.ports[-1]}"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Tests for the built-in TCP connect port scanner
+"""
+import unittest
+import sys
+import os
+import socket
+import asyncio
+import contextlib
+import io
+from unittest import mock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import portscan
+from scanner.portscan import ConnectScanner, connect_scan, parse_ports, MIN_TIMEOUT, INITIAL_TIMEOUT
+
+
+def free_port():
+    """A localhost port with nothing listening on it"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestConnectScan(unittest.TestCase):
+    """Test the asyncio connect scan against local listeners"""
+
+    def setUp(self):
+        self.listeners = []
+        for _ in range(3):
+            sock = socket.socket()
+            sock.bind(("127.0.0.1", 0))
+            sock.listen(16)
+            self.listeners.append(sock)
+        self.open_ports = sorted(sock.getsockname()[1] for sock in self.listeners)
+
+    def tearDown(self):
+        for sock in self.listeners:
+            sock.close()
+
+    def test_parse_ports(self):
+        self.assertEqual(parse_ports("22, 80,8000-8002"), [22, 80, 8000, 8001, 8002])
+        self.assertEqual(parse_ports("5-3"), [])
+        with self.assertRaises(ValueError):
+            parse_ports("0-10")
+
+    def test_open_ports_found(self):
+        """Test that listeners are reported as scan_ports() result dicts, with progress per port"""
+        closed = [free_port() for _ in range(5)]
+        ports = ",".join(str(port) for port in self.open_ports + closed)
+        progress = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = connect_scan("127.0.0.1", ports, progress_callback=progress.append)
+
+        self.assertEqual([r["port"] for r in results], self.open_ports)
+        self.assertTrue(all(r["protocol"] == "tcp" and r["state"] == "open" and r["service"] for r in results))
+        self.assertEqual(sum(progress), len(set(self.open_ports + closed)))
+
+    def test_timeout_adapts(self):
+        """Test that measured round trips shrink the connect timeout"""
+        scanner = ConnectScanner(concurrency=4)
+        self.assertEqual(scanner.timeout(), INITIAL_TIMEOUT)
+        states = asyncio.run(scanner.scan("127.0.0.1", self.open_ports + [free_port()]))
+        self.assertEqual(sorted(port for port, state in states.items() if state == "open"), self.open_ports)
+        self.assertEqual(scanner.timeout(), MIN_TIMEOUT)
+
+    def test_hosts_share_one_loop(self):
+        """Test that a multi-host connect scan runs every host under one event loop"""
+        ports = ",".join(str(port) for port in self.open_ports + [free_port()])
+        progress, found = [], []
+        with mock.patch.object(portscan.asyncio, "run", wraps=asyncio.run) as run, \
+                contextlib.redirect_stdout(io.StringIO()):
+            results = portscan.scan_targets("127.0.0.1, 127.0.0.2", ports,
+                                            progress_callback=progress.append,
+                                            port_callback=lambda host, info: found.append(host), method="connect")
+        self.assertEqual(run.call_count, 1)
+        self.assertEqual([info["port"] for info in results["127.0.0.1"]], self.open_ports)
+        self.assertNotIn("127.0.0.2", results)
+        self.assertEqual(found, ["127.0.0.1"] * 3)
+        self.assertEqual(sum(progress), 2 * (len(self.open_ports) + 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Tests for the open redirect scanner
+"""
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import redirect
+from scanner.redirect import redirect_candidates
+from scanner.forms import FormSpec, FormField
+from tests.fixtures import LocalServerTestCase
+
+
+def redirect_app(method, path, params, headers):
+    """/go redirects anywhere, /safe only to local paths, /login keeps its body"""
+    target = params.get("next", "/")
+    if path == "/go":
+        return 302, "x" * 100000, {"Location": target}
+    if path == "/safe":
+        return 302, "", {"Location": target if target.startswith("/") and not target.startswith(("//", "/\\")) else "/"}
+    if path == "/back":
+        # Rejects absolute URLs but lets a backslash through
+        return 302, "", {"Location": "/" if "//" in target else target}
+    return 200, "<html>" + "y" * 100000 + "</html>"
+
+
+class TestOpenRedirect(LocalServerTestCase):
+    """Test single-hop open redirect probes"""
+
+    app = staticmethod(redirect_app)
+
+    def test_candidates_deduplicated(self):
+        """Test that one pattern is tested once, and redirect-like values count without a known name"""
+        links = [f"{self.base_url}go?next=/item/{n}&lang=en" for n in range(50)] + \
+                [f"{self.base_url}page?id=3", f"{self.base_url}jump?dest_page=/home"]
+        forms = [(self.base_url, FormSpec(f"{self.base_url}login", "post",
+                                          [FormField("user"), FormField("return_to", "hidden", "/account")]))]
+        candidates = redirect_candidates(links, forms)
+        self.assertEqual([(action.rsplit("/", 1)[1], param) for _, action, _, _, param in candidates],
+                         [("go", "next"), ("jump", "dest_page"), ("login", "return_to")])
+
+    def test_open_redirect(self):
+        """Test that redirects are read from Location alone, without following them"""
+        links = [f"{self.base_url}go?next=/home", f"{self.base_url}safe?next=/home",
+                 f"{self.base_url}back?next=/home", f"{self.base_url}page?next=/home"]
+        progress = []
+        findings = redirect.test_open_redirect(links, [], threads=2, progress_callback=progress.append)
+
+        self.assertEqual(sorted(f["details"].rsplit("/", 1)[1] for f in findings), ["back", "go"])
+        by_path = {f["details"].rsplit("/", 1)[1]: f for f in findings}
+        self.assertTrue(by_path["go"]["payload"].startswith("https://example.org/vsr"))
+        self.assertTrue(by_path["back"]["payload"].startswith("/\\example.org/"))
+        self.assertEqual(len(progress), 4)
+
+        paths = [path for _, path, _ in self.server.requests]
+        # /go on the first probe, /safe through all three, /back on the third, /page stops at the 200
+        self.assertEqual(sorted(paths), ["/back"] * 3 + ["/go"] + ["/page"] + ["/safe"] * 3)
+        self.assertNotIn("/home", paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Tests for banner grabbing and service identification
+"""
+import unittest
+import sys
+import os
+import socket
+import threading
+import asyncio
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import services
+from scanner.services import identify, identify_services, signature_db, probes_for
+
+
+class StubListener:
+    """TCP listener on localhost answering each connection with `reply(request)`"""
+
+    def __init__(self, banner=b"", reply=None):
+        self.banner = banner
+        self.reply = reply
+        self.connections = 0
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                if self.banner:
+                    conn.sendall(self.banner)
+                if self.reply:
+                    conn.settimeout(2)
+                    request = conn.recv(4096)
+                    if request:
+                        conn.sendall(self.reply(request))
+                time.sleep(0.1)
+            except OSError:
+                pass
+
+    def close(self):
+        self.sock.close()
+
+
+class TestServiceIdentification(unittest.TestCase):
+    """Test probes and signatures against local listener stubs"""
+
+    def setUp(self):
+        self.listeners = []
+        self.original_wait = services.BANNER_WAIT
+        services.BANNER_WAIT = 0.3
+
+    def tearDown(self):
+        services.BANNER_WAIT = self.original_wait
+        for listener in self.listeners:
+            listener.close()
+
+    def listen(self, **kwargs):
+        listener = StubListener(**kwargs)
+        self.listeners.append(listener)
+        return listener
+
+    def test_signature_db_compiled_once(self):
+        self.assertIs(signature_db(), signature_db())
+        self.assertEqual([probe.name for probe in probes_for(6379)][:2], ["RedisPing", "NULL"])
+        self.assertEqual(probes_for(22)[0].name, "NULL")
+
+    def test_banner_and_probe_matches(self):
+        """Test a volunteered banner, a request/response service and an unknown banner"""
+        ssh = self.listen(banner=b"SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.4\r\n")
+        http = self.listen(reply=lambda request: b"HTTP/1.1 200 OK\r\nServer: nginx/1.24.0\r\n\r\nhi"
+                           if request.startswith(b"GET ") else b"")
+        odd = self.listen(banner=b"WELCOME TO THE MAINFRAME\r\n")
+
+        ports = [("127.0.0.1", {'port': listener.port, 'protocol': 'tcp', 'service': 'unknown', 'state': 'open'})
+                 for listener in (ssh, http, odd)]
+        progress = []
+        identify_services(ports, progress_callback=progress.append)
+
+        self.assertEqual(ports[0][1]['service'], "ssh (OpenSSH 8.9p1)")
+        self.assertEqual(ports[1][1]['service'], "http (nginx 1.24.0)")
+        self.assertEqual(ports[2][1]['service'], "unknown")
+        self.assertEqual(ports[2][1]['banner'], "WELCOME TO THE MAINFRAME")
+        self.assertEqual(sum(progress), 3)
+        # The unknown banner is not followed by probes for other protocols
+        self.assertEqual(odd.connections, 1)
+
+    def test_port_specific_probe_first(self):
+        """Test that a Redis port gets its own probe before any banner wait"""
+        redis = self.listen(reply=lambda request: b"+PONG\r\n" if b"PING" in request else b"-ERR\r\n")
+        original = signature_db()[2].ports
+        signature_db()[2].ports = frozenset([redis.port])
+        try:
+            start = time.perf_counter()
+            identified = asyncio.run(identify("127.0.0.1", redis.port))
+            elapsed = time.perf_counter() - start
+        finally:
+            signature_db()[2].ports = original
+        self.assertEqual(identified['service'], "redis")
+        self.assertEqual(redis.connections, 1)
+        self.assertLess(elapsed, services.BANNER_WAIT)
+
+    def test_silent_port(self):
+        silent = self.listen()
+        self.assertIsNone(asyncio.run(identify("127.0.0.1", silent.port)))
+
+
+if __name__ == '__main__':
+    unittest.main()
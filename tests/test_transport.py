@@ -0,0 +1,62 @@
+"""
+Tests for the shared pooled HTTP transport
+"""
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner.transport import create_session, get_session, crawl_session, submit, connection_stats, CONNECTION_STATS
+from tests.fixtures import LocalServerTestCase
+
+
+class TestTransport(LocalServerTestCase):
+    """Test keep-alive reuse, default headers and statistics"""
+
+    @staticmethod
+    def app(method, path, params, headers):
+        if path == "/cookie":
+            return 200, headers.get("Cookie", ""), {"Set-Cookie": "session=probe1; Path=/"}
+        return 200, headers.get("User-Agent", "")
+
+    def test_shared_session(self):
+        """Test that every module gets the same session"""
+        self.assertIs(get_session(), get_session())
+
+    def test_probes_keep_no_cookies(self):
+        """Test that a cookie set on one probe is not sent with the next, while a crawl keeps its own"""
+        self.assertEqual(submit(self.base_url + "cookie", "get", {}).text, "")
+        self.assertEqual(submit(self.base_url + "cookie", "get", {}).text, "")
+        self.assertEqual(len(get_session().cookies), 0)
+
+        session = crawl_session()
+        session.get(self.base_url + "cookie")
+        self.assertEqual(session.get(self.base_url + "cookie").text, "session=probe1")
+        self.assertIs(session.get_adapter(self.base_url), get_session().get_adapter(self.base_url))
+        self.assertEqual(len(get_session().cookies), 0)
+
+    def test_connection_reuse_stats(self):
+        """Test that sequential requests reuse one keep-alive connection"""
+        CONNECTION_STATS.reset()
+        session = create_session(user_agent="VulnScanner/test")
+        for _ in range(5):
+            response = session.get(self.base_url)
+            self.assertEqual(response.text, "VulnScanner/test")
+
+        host = self.base_url.split("//")[1].rstrip("/")
+        stats = connection_stats()[host]
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["new_connections"], 1)
+        self.assertEqual(stats["reused_connections"], 4)
+
+    def test_default_timeout(self):
+        """Test that calls without a timeout get the configured default"""
+        session = create_session(timeout=3)
+        adapter = session.get_adapter(self.base_url)
+        self.assertEqual(adapter.default_timeout, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()